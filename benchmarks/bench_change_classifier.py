@@ -0,0 +1,101 @@
+"""Compare the token diff classifier with the previous SequenceMatcher implementation.
+
+Usage: PYTHONPATH=. python benchmarks/bench_change_classifier.py [--max-kb 2048] [--legacy-max-kb 256]
+
+The legacy matcher is quadratic-ish and its autojunk heuristic distorts ratios on large
+inputs, so it is skipped above --legacy-max-kb; "truth" is the ratio implied by the edit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from difflib import SequenceMatcher
+
+from tos_radar.change_classifier import classify_change
+from tos_radar.models import ChangeLevel
+
+_WORDS = (
+    "terms service user agreement company data personal provider account liability party law "
+    "clause section notice payment fee rights license content privacy consent processing "
+    "пользователь соглашение услуги данные оператор договор стороны ответственность"
+).split()
+_EDIT_RATES = {"noise": 0.002, "minor": 0.03, "major": 0.25}
+
+
+def legacy_classify(previous: str, current: str) -> tuple[ChangeLevel, float]:
+    tokenize = lambda text: " ".join(re.findall(r"[A-Za-zА-Яа-я0-9]+", text.lower()))  # noqa: E731
+    ratio = 1.0 - SequenceMatcher(None, tokenize(previous), tokenize(current)).ratio()
+    if ratio < 0.015:
+        return (ChangeLevel.NOISE, ratio)
+    if ratio < 0.12:
+        return (ChangeLevel.MINOR, ratio)
+    return (ChangeLevel.MAJOR, ratio)
+
+
+def make_document(rng: random.Random, size_bytes: int) -> list[str]:
+    words: list[str] = []
+    length = 0
+    while length < size_bytes:
+        word = rng.choice(_WORDS) + (str(rng.randint(1, 99)) if rng.random() < 0.05 else "")
+        words.append(word)
+        length += len(word) + 1
+    return words
+
+
+def mutate(rng: random.Random, words: list[str], rate: float) -> tuple[list[str], float]:
+    """Rewrite clustered spans of words; also return the true change ratio of the edit."""
+    out = list(words)
+    edits = max(1, int(len(out) * rate))
+    for _ in range(edits // 8 + 1):
+        # Clustered rewrites, like a paragraph being replaced.
+        start = rng.randrange(len(out))
+        span = min(8, len(out) - start)
+        out[start : start + span] = [rng.choice(_WORDS) + "x" for _ in range(span)]
+    kept = sum(len(old) + 1 for old, new in zip(words, out) if old == new)
+    total = sum(len(w) + 1 for w in words) + sum(len(w) + 1 for w in out)
+    return out, 1.0 - 2.0 * kept / total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-kb", type=int, default=2048)
+    parser.add_argument("--legacy-max-kb", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes_kb = [kb for kb in (1, 8, 64, 256, 512, 1024, 2048) if kb <= args.max_kb]
+    print(
+        f"{'size':>7} {'edit':>6} {'truth':>7} {'legacy_s':>9} {'token_s':>8} "
+        f"{'legacy':>15} {'token':>15} agree"
+    )
+    for size_kb in sizes_kb:
+        base = make_document(rng, size_kb * 1024)
+        previous = " ".join(base)
+        for label, rate in _EDIT_RATES.items():
+            mutated, truth = mutate(rng, base, rate)
+            current = " ".join(mutated)
+
+            started = time.perf_counter()
+            level, ratio = classify_change(previous, current)
+            token_sec = time.perf_counter() - started
+
+            if size_kb <= args.legacy_max_kb:
+                started = time.perf_counter()
+                legacy_level, legacy_ratio = legacy_classify(previous, current)
+                legacy_sec = f"{time.perf_counter() - started:9.3f}"
+                legacy_cell = f"{legacy_level.value}/{legacy_ratio:.4f}"
+                agree = "yes" if legacy_level == level else "NO"
+            else:
+                legacy_sec, legacy_cell, agree = f"{'skipped':>9}", "-", "-"
+            print(
+                f"{size_kb:>6}K {label:>6} {truth:7.4f} {legacy_sec} {token_sec:8.3f} "
+                f"{legacy_cell:>15} {level.value + '/' + format(ratio, '.4f'):>15} {agree}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare diff_utils.build_diff with the previous difflib.HtmlDiff renderer.
+
+Usage: PYTHONPATH=. python benchmarks/bench_diff_render.py [--max-kb 4096] [--legacy-max-kb 512]
+
+Documents are line-oriented (one clause per line) with a few clustered edits. The legacy
+renderer chunks lines at 800 chars and truncates at 4000 lines, so its output is incomplete
+on the larger sizes; "bytes" is the JSON/HTML size that ends up in the report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from difflib import HtmlDiff
+from itertools import islice
+
+from tos_radar.diff_utils import build_diff
+
+_WORDS = (
+    "terms service user agreement company data personal provider account liability party law "
+    "clause section notice payment fee rights license content privacy consent processing "
+    "пользователь соглашение услуги данные оператор договор стороны ответственность"
+).split()
+
+
+def legacy_diff_html(previous: str, current: str) -> str:
+    return HtmlDiff(wrapcolumn=100).make_table(
+        _legacy_lines(previous),
+        _legacy_lines(current),
+        fromdesc="Previous",
+        todesc="Current",
+        context=True,
+        numlines=2,
+    )
+
+
+def _legacy_lines(text: str, chunk_size: int = 800, max_lines: int = 4000) -> list[str]:
+    out: list[str] = []
+    for line in text.splitlines() or [text]:
+        out.extend([line[i : i + chunk_size] for i in range(0, len(line), chunk_size)] or [""])
+    if len(out) > max_lines:
+        return [*islice(out, max_lines), "[... diff truncated ...]"]
+    return out
+
+
+def make_document(rng: random.Random, size_bytes: int) -> list[str]:
+    lines: list[str] = []
+    length = 0
+    while length < size_bytes:
+        line = f"{len(lines) + 1}. " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 30)))
+        lines.append(line)
+        length += len(line) + 1
+    return lines
+
+
+def mutate(rng: random.Random, lines: list[str], edits: int) -> list[str]:
+    out = list(lines)
+    for _ in range(edits):
+        idx = rng.randrange(len(out))
+        kind = rng.random()
+        if kind < 0.6:
+            words = out[idx].split()
+            words[rng.randrange(1, len(words))] = rng.choice(_WORDS) + "x"
+            out[idx] = " ".join(words)
+        elif kind < 0.8:
+            del out[idx]
+        else:
+            out.insert(idx, "new " + " ".join(rng.choice(_WORDS) for _ in range(12)))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-kb", type=int, default=4096)
+    parser.add_argument("--legacy-max-kb", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes_kb = [kb for kb in (8, 64, 256, 512, 1024, 4096) if kb <= args.max_kb]
+    print(f"{'size':>7} {'lines':>7} {'legacy_s':>9} {'legacy_bytes':>13} {'new_s':>8} {'new_bytes':>10} hunks")
+    for size_kb in sizes_kb:
+        base = make_document(rng, size_kb * 1024)
+        previous = "\n".join(base)
+        current = "\n".join(mutate(rng, base, edits=20))
+
+        started = time.perf_counter()
+        diff = build_diff(previous, current)
+        new_sec = time.perf_counter() - started
+        new_bytes = len(json.dumps(diff, ensure_ascii=False).encode("utf-8"))
+
+        if size_kb <= args.legacy_max_kb:
+            started = time.perf_counter()
+            legacy = legacy_diff_html(previous, current)
+            legacy_sec = f"{time.perf_counter() - started:9.3f}"
+            legacy_bytes = f"{len(legacy.encode('utf-8')):>13}"
+        else:
+            legacy_sec, legacy_bytes = f"{'skipped':>9}", f"{'-':>13}"
+        print(
+            f"{size_kb:>6}K {len(base):>7} {legacy_sec} {legacy_bytes} "
+            f"{new_sec:8.3f} {new_bytes:>10} {len(diff['hunks'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
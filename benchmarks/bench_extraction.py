@@ -0,0 +1,126 @@
+"""Compare extraction.clean_extracted_text with the previous per-token line filter.
+
+Usage: PYTHONPATH=. python benchmarks/bench_extraction.py [--max-kb 2048]
+
+Pages are synthetic legal documents wrapped in the usual chrome (header, nav, cookie bar,
+footer links) with a share of short noise lines inside the text. "parse_s" is the HTTP-tier
+HTML walk (parse_html_document), the clean columns filter its main text; outputs must match.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+
+from tos_radar.extraction import clean_extracted_text, parse_html_document
+
+_WORDS = (
+    "terms service user agreement company data personal provider account liability party law "
+    "clause section notice payment fee rights license content privacy consent processing "
+    "пользователь соглашение услуги данные оператор договор стороны ответственность"
+).split()
+_NOISE = (
+    "Accept all cookies",
+    "Follow us on social media",
+    "Subscribe to our newsletter",
+    "© 2024 Example Inc. All rights reserved",
+    "Мы сохраняем «куки» для удобства",
+    "Помощь и обратная связь",
+    "Read more https://example.com/more",
+)
+
+
+def legacy_clean(text: str) -> str:
+    lines = text.splitlines()
+    out: list[str] = []
+    noise_tokens = (
+        "cookie",
+        "privacy center",
+        "all rights reserved",
+        "follow us",
+        "subscribe",
+        "newsletter",
+        "accept all",
+        "reject all",
+        "мы сохраняем «куки»",
+        "мы сохраняем \"куки\"",
+        "help and feedback",
+    )
+    for raw in lines:
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line:
+            continue
+        lower = line.lower()
+        if lower.startswith("©") or "лицензия банка россии" in lower:
+            continue
+        if "помощь и обратная связь" in lower and len(line) < 220:
+            continue
+        if any(token in lower for token in noise_tokens) and len(line) < 160:
+            continue
+        if any(token in lower for token in ("сохраняем «куки»", "сохраняем \"куки\"")):
+            continue
+        words = line.split()
+        url_like = sum(1 for w in words if "http://" in w.lower() or "https://" in w.lower())
+        if url_like > 0 and len(words) <= 8:
+            continue
+        if len(line) < 3:
+            continue
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+def make_page(rng: random.Random, size_bytes: int) -> str:
+    parts = [
+        "<html><head><title>Terms</title><script>window.app = {};</script></head><body>",
+        "<header><nav><a href='/'>Home</a> <a href='/about'>About</a></nav></header>",
+        "<div class='cookie'>We use cookies. <button>Accept all</button></div><main>",
+    ]
+    length = 0
+    clause = 0
+    while length < size_bytes:
+        if rng.random() < 0.15:
+            line = rng.choice(_NOISE)
+        else:
+            clause += 1
+            line = f"{clause}. " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 40)))
+        parts.append(f"<p>{line}</p>")
+        length += len(line) + 7
+    parts.append("</main><footer><a href='/privacy'>Privacy</a> © 2024</footer></body></html>")
+    return "\n".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-kb", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes_kb = [kb for kb in (16, 64, 256, 1024, 2048) if kb <= args.max_kb]
+    print(f"{'size':>7} {'lines':>7} {'parse_s':>8} {'legacy_s':>9} {'new_s':>8} {'speedup':>8} same")
+    for size_kb in sizes_kb:
+        html = make_page(rng, size_kb * 1024)
+
+        started = time.perf_counter()
+        text = parse_html_document(html).main_text
+        parse_sec = time.perf_counter() - started
+
+        legacy_sec = new_sec = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            legacy = legacy_clean(text)
+            legacy_sec = min(legacy_sec, time.perf_counter() - started)
+            started = time.perf_counter()
+            cleaned = clean_extracted_text(text)
+            new_sec = min(new_sec, time.perf_counter() - started)
+        print(
+            f"{size_kb:>6}K {text.count(chr(10)) + 1:>7} {parse_sec:8.3f} {legacy_sec:9.4f} {new_sec:8.4f} "
+            f"{legacy_sec / new_sec:7.1f}x {cleaned == legacy}"
+        )
+
+
+if __name__ == "__main__":
+    main()
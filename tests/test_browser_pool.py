@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from tos_radar.browser_pool import BrowserPool
+from tos_radar.models import Proxy
+
+
+class _FakeContext:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self) -> None:
+        self.connected = True
+        self.closed = False
+        self.contexts: list[_FakeContext] = []
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def new_context(self, **kwargs) -> _FakeContext:  # type: ignore[no-untyped-def]
+        context = _FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakeBrowserPool(BrowserPool):
+    def __init__(self, max_browsers: int = 4, max_pages_per_browser: int = 100) -> None:
+        super().__init__(max_browsers=max_browsers, max_pages_per_browser=max_pages_per_browser)
+        self.launched: list[tuple[Proxy | None, _FakeBrowser]] = []
+        self.launch_delay = 0.0
+        self.launch_error: Exception | None = None
+
+    async def _launch(self, proxy: Proxy | None) -> _FakeBrowser:  # type: ignore[override]
+        await asyncio.sleep(self.launch_delay)
+        if self.launch_error is not None:
+            raise self.launch_error
+        browser = _FakeBrowser()
+        self.launched.append((proxy, browser))
+        return browser
+
+
+async def _use(pool: BrowserPool, proxy: Proxy | None) -> None:
+    async with pool.context(proxy):
+        pass
+
+
+class BrowserPoolTests(unittest.TestCase):
+    def test_reuses_browser_per_proxy_key_with_fresh_context(self) -> None:
+        async def scenario() -> _FakeBrowserPool:
+            pool = _FakeBrowserPool()
+            async with pool:
+                await _use(pool, None)
+                await _use(pool, None)
+                await _use(pool, Proxy(host="1.1.1.1", port=8080))
+            return pool
+
+        pool = asyncio.run(scenario())
+        self.assertEqual(pool.stats.launches, 2)
+        self.assertEqual(pool.stats.hits, 1)
+        self.assertEqual(pool.stats.misses, 2)
+        first_browser = pool.launched[0][1]
+        self.assertEqual(len(first_browser.contexts), 2)
+        self.assertTrue(all(ctx.closed for ctx in first_browser.contexts))
+        self.assertTrue(all(browser.closed for _, browser in pool.launched))
+
+    def test_recycles_browser_after_max_pages(self) -> None:
+        async def scenario() -> _FakeBrowserPool:
+            pool = _FakeBrowserPool(max_pages_per_browser=2)
+            async with pool:
+                for _ in range(5):
+                    await _use(pool, None)
+            return pool
+
+        pool = asyncio.run(scenario())
+        self.assertEqual(pool.stats.launches, 3)
+        self.assertEqual(pool.stats.recycles, 2)
+        self.assertTrue(pool.launched[0][1].closed)
+
+    def test_relaunches_crashed_browser(self) -> None:
+        async def scenario() -> _FakeBrowserPool:
+            pool = _FakeBrowserPool()
+            async with pool:
+                await _use(pool, None)
+                pool.launched[0][1].connected = False
+                await _use(pool, None)
+            return pool
+
+        pool = asyncio.run(scenario())
+        self.assertEqual(pool.stats.launches, 2)
+        self.assertEqual(pool.stats.crashes, 1)
+
+    def test_evicts_least_recently_used_idle_browser_when_full(self) -> None:
+        async def scenario() -> _FakeBrowserPool:
+            pool = _FakeBrowserPool(max_browsers=1)
+            async with pool:
+                await _use(pool, None)
+                await _use(pool, Proxy(host="1.1.1.1", port=8080))
+                self.assertTrue(pool.launched[0][1].closed)
+            return pool
+
+        pool = asyncio.run(scenario())
+        self.assertEqual(pool.stats.launches, 2)
+
+    def test_concurrent_callers_share_one_launch_per_key(self) -> None:
+        async def scenario() -> tuple[_FakeBrowserPool, float]:
+            pool = _FakeBrowserPool()
+            pool.launch_delay = 0.05
+            async with pool:
+                started = asyncio.get_running_loop().time()
+                await asyncio.gather(
+                    *(_use(pool, None) for _ in range(3)),
+                    _use(pool, Proxy(host="1.1.1.1", port=8080)),
+                )
+                elapsed = asyncio.get_running_loop().time() - started
+            return pool, elapsed
+
+        pool, elapsed = asyncio.run(scenario())
+        self.assertEqual(pool.stats.launches, 2)
+        self.assertEqual((pool.stats.misses, pool.stats.hits), (2, 2))
+        self.assertEqual(len(pool.launched[0][1].contexts), 3)
+        # Launches for different proxies overlap instead of queueing on the pool lock.
+        self.assertLess(elapsed, 0.095)
+
+    def test_launch_error_reaches_every_waiter(self) -> None:
+        async def scenario() -> list[object]:
+            pool = _FakeBrowserPool()
+            pool.launch_delay = 0.01
+            pool.launch_error = RuntimeError("no chromium")
+            async with pool:
+                results = await asyncio.gather(*(_use(pool, None) for _ in range(2)), return_exceptions=True)
+                pool.launch_error = None
+                await _use(pool, None)
+            return [*results, pool.stats.launches]
+
+        first, second, launches = asyncio.run(scenario())
+        self.assertIsInstance(first, RuntimeError)
+        self.assertIsInstance(second, RuntimeError)
+        self.assertEqual(launches, 1)
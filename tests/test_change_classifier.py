@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import unittest
+from unittest.mock import patch
 
-from tos_radar.change_classifier import classify_change, is_suspicious_changed
+from tos_radar.change_classifier import change_ratio, classify_change, is_suspicious_changed
 from tos_radar.models import ChangeLevel
 
 
@@ -26,3 +27,33 @@ class ChangeClassifierTests(unittest.TestCase):
     def test_suspicious_changed_rule(self) -> None:
         self.assertTrue(is_suspicious_changed(ChangeLevel.MAJOR, 0.5, 900))
         self.assertFalse(is_suspicious_changed(ChangeLevel.MINOR, 0.5, 900))
+
+    def test_levels_of_a_known_short_rewrite(self) -> None:
+        clauses = [f"clause {i} the operator processes personal data of user account {i}" for i in range(16)]
+        rewrite = "new payment terms apply to every subscription from next month"
+        expected = {1: (ChangeLevel.MINOR, False), 2: (ChangeLevel.MAJOR, False), 4: (ChangeLevel.MAJOR, True)}
+        for rewritten, (expected_level, suspicious) in expected.items():
+            changed = list(clauses)
+            for idx in range(rewritten):
+                changed[idx * 3] = f"section {idx} {rewrite}"
+            current = "\n".join(changed)
+            level, ratio = classify_change("\n".join(clauses), current)
+            self.assertEqual(level, expected_level, rewritten)
+            self.assertAlmostEqual(ratio, 0.06 * rewritten, delta=0.02)
+            self.assertEqual(is_suspicious_changed(level, ratio, len(current)), suspicious, rewritten)
+
+    def test_large_rewrite_is_linear_and_keeps_thresholds(self) -> None:
+        base = [f"clause{i} applies to the user account" for i in range(4000)]
+        changed = list(base)
+        changed[1000:1400] = [f"rewritten{i} obligations of the operator" for i in range(400)]
+        level, ratio = classify_change("\n".join(base), "\n".join(changed))
+        self.assertEqual(level, ChangeLevel.MINOR)
+        self.assertAlmostEqual(ratio, 0.1, delta=0.03)
+
+    def test_sketch_estimate_for_very_large_inputs(self) -> None:
+        base = " ".join(f"word{i % 997} item{i}" for i in range(3000))
+        changed = base.replace("item15", "other15")
+        exact = change_ratio(base, changed)
+        with patch("tos_radar.change_classifier._SKETCH_MIN_TOKENS", 10):
+            estimated = change_ratio(base, changed)
+        self.assertAlmostEqual(estimated, exact, delta=0.05)
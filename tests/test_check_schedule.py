@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from tos_radar.check_schedule import CheckSchedule, SchedulePolicy, next_interval
+from tos_radar.models import Service, Status
+
+_POLICY = SchedulePolicy(min_interval_sec=3600, max_interval_sec=7 * 86400, default_interval_sec=86400)
+
+
+def _services(*domains: str) -> list[Service]:
+    return [Service(domain=domain, url=f"https://{domain}/terms") for domain in domains]
+
+
+class NextIntervalTests(unittest.TestCase):
+    def test_outcome_moves_interval_within_bounds(self) -> None:
+        self.assertEqual(next_interval(86400, Status.UNCHANGED, _POLICY), 129600)
+        self.assertEqual(next_interval(86400, Status.CHANGED, _POLICY), 21600)
+        self.assertEqual(next_interval(86400, Status.FAILED, _POLICY), 43200)
+        self.assertEqual(next_interval(3600, Status.NEW, _POLICY), 86400)
+        self.assertEqual(next_interval(6 * 86400, Status.UNCHANGED, _POLICY), 7 * 86400)
+        self.assertEqual(next_interval(7200, Status.CHANGED, _POLICY), 3600)
+
+
+class CheckScheduleTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self) -> None:
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_new_domains_are_spread_over_default_interval(self) -> None:
+        schedule = CheckSchedule("t1", _POLICY)
+        schedule.sync(_services(*(f"site{i}.com" for i in range(50))), now=0.0)
+        self.assertEqual(schedule.pop_due(now=0.0, limit=100), [])
+        first_half = schedule.pop_due(now=43200.0, limit=100)
+        self.assertTrue(5 < len(first_half) < 45)
+        rest = schedule.pop_due(now=86400.0, limit=100)
+        self.assertEqual(len(first_half) + len(rest), 50)
+
+    def test_pop_due_in_time_order_and_respects_limit(self) -> None:
+        schedule = CheckSchedule("t1", _POLICY)
+        schedule.sync(_services("a.com", "b.com", "c.com"), now=0.0)
+        due = schedule.pop_due(now=86400.0, limit=2)
+        self.assertEqual(len(due), 2)
+        self.assertEqual(len(schedule.pop_due(now=86400.0, limit=2)), 1)
+        # In flight until recorded.
+        self.assertEqual(schedule.pop_due(now=10 * 86400.0, limit=10), [])
+        self.assertIsNone(schedule.next_due_at())
+
+    def test_record_reschedules_and_persists(self) -> None:
+        schedule = CheckSchedule("t1", _POLICY)
+        schedule.sync(_services("a.com"), now=0.0)
+        [service] = schedule.pop_due(now=86400.0, limit=1)
+        entry = schedule.record(service.domain, Status.UNCHANGED, now=100000.0)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.interval_sec, 129600)
+        self.assertEqual(entry.unchanged_streak, 1)
+        self.assertEqual(schedule.next_due_at(), 229600.0)
+
+        restarted = CheckSchedule("t1", _POLICY)
+        restarted.sync(_services("a.com"), now=150000.0)
+        self.assertEqual(restarted.next_due_at(), 229600.0)
+        [service] = restarted.pop_due(now=229600.0, limit=1)
+        entry = restarted.record(service.domain, Status.CHANGED, now=230000.0)
+        self.assertEqual(entry.interval_sec, 32400)
+        self.assertEqual(entry.unchanged_streak, 0)
+
+    def test_sync_forgets_removed_domains(self) -> None:
+        schedule = CheckSchedule("t1", _POLICY)
+        schedule.sync(_services("a.com", "b.com"), now=0.0)
+        schedule.sync(_services("b.com"), now=0.0)
+        self.assertEqual(len(schedule), 1)
+        self.assertEqual([s.domain for s in schedule.pop_due(now=86400.0, limit=10)], ["b.com"])
+
+    def test_domain_removed_while_in_flight_is_not_rescheduled(self) -> None:
+        schedule = CheckSchedule("t1", _POLICY)
+        schedule.sync(_services("a.com"), now=0.0)
+        schedule.pop_due(now=86400.0, limit=1)
+        schedule.sync([], now=86400.0)
+        self.assertIsNone(schedule.record("a.com", Status.UNCHANGED, now=86400.0))
+        self.assertIsNone(schedule.next_due_at())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from tos_radar.checkpoint import RunCheckpoint
+from tos_radar.models import ChangeLevel, ErrorCode, RunEntry, SourceType, Status
+
+
+def _entry(domain: str, status: Status, **kwargs: object) -> RunEntry:
+    values: dict[str, object] = {
+        "domain": domain,
+        "url": f"https://{domain}/tos",
+        "status": status,
+        "source_type": SourceType.HTML,
+        "duration_sec": 1.5,
+        "text_length": 1000,
+        "change_level": None,
+        "change_ratio": None,
+        "error_code": None,
+        "error": None,
+        "diff": None,
+    }
+    values.update(kwargs)
+    return RunEntry(**values)  # type: ignore[arg-type]
+
+
+class RunCheckpointTests(unittest.TestCase):
+    def test_entries_survive_an_interrupted_run(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                started = datetime(2024, 5, 1, 12, 0, 0)
+                changed = _entry(
+                    "a.com",
+                    Status.CHANGED,
+                    change_level=ChangeLevel.MAJOR,
+                    change_ratio=0.4,
+                    diff={"added": 1, "removed": 0, "changed": 0, "hunks": []},
+                    attempt=2,
+                    proxy_used="10.0.0.1:8080",
+                )
+                failed = _entry("b.com", Status.FAILED, error_code=ErrorCode.TIMEOUT, error="slow", timeout_sec=30)
+                checkpoint = RunCheckpoint("t1")
+                checkpoint.open("run", started, resume=False)
+                checkpoint.append(changed)
+                checkpoint.append(failed)
+                checkpoint.close()
+                with checkpoint.path.open("a", encoding="utf-8") as handle:
+                    handle.write('{"domain": "c.com", "url"')  # killed mid-write
+
+                self.assertEqual(RunCheckpoint("t1").started_at("run"), started)
+                self.assertEqual(list(RunCheckpoint("t1").entries()), [changed, failed])
+                self.assertIsNone(RunCheckpoint("t1").started_at("init"))
+
+                # Resuming appends after the torn line; the retry result replaces the failure.
+                checkpoint = RunCheckpoint("t1")
+                checkpoint.open("run", started, resume=True)
+                checkpoint.append(_entry("b.com", Status.UNCHANGED))
+                checkpoint.close()
+                self.assertEqual(
+                    [(entry.domain, entry.status) for entry in RunCheckpoint("t1").entries()],
+                    [("a.com", Status.CHANGED), ("b.com", Status.FAILED), ("b.com", Status.UNCHANGED)],
+                )
+
+                checkpoint.discard()
+                self.assertFalse(checkpoint.exists())
+            finally:
+                os.chdir(old_cwd)
+
+    def test_fresh_run_replaces_an_old_checkpoint(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                checkpoint = RunCheckpoint("t1")
+                checkpoint.open("run", datetime(2024, 5, 1), resume=False)
+                checkpoint.append(_entry("a.com", Status.NEW))
+                checkpoint.close()
+                checkpoint.open("run", datetime(2024, 5, 2), resume=False)
+                checkpoint.close()
+                self.assertEqual(RunCheckpoint("t1").started_at("run"), datetime(2024, 5, 2))
+                self.assertEqual(list(RunCheckpoint("t1").entries()), [])
+            finally:
+                os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    unittest.main()
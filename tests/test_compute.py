@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from tos_radar.change_classifier import classify_change
+from tos_radar.compute import ComputeStage
+from tos_radar.models import ChangeLevel
+
+
+class ComputeStageTests(unittest.TestCase):
+    def test_process_pool_runs_jobs_and_records_stage_stats(self) -> None:
+        async def scenario() -> tuple[list[tuple[ChangeLevel, float]], ComputeStage]:
+            async with ComputeStage(workers=1, max_pending=2) as stage:
+                results = await asyncio.gather(
+                    *(stage.run("classify", classify_change, "alpha beta gamma", "alpha beta delta") for _ in range(3))
+                )
+            return results, stage
+
+        results, stage = asyncio.run(scenario())
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(level == ChangeLevel.MAJOR for level, _ in results))
+        stats = stage.stats["classify"]
+        self.assertEqual(stats.tasks, 3)
+        self.assertGreaterEqual(stats.queue_wait_sec, 0.0)
+        self.assertGreaterEqual(stats.max_queue_wait_sec, 0.0)
+        self.assertGreaterEqual(stats.cpu_sec, 0.0)
+
+    def test_thread_mode_propagates_errors(self) -> None:
+        async def scenario() -> ComputeStage:
+            async with ComputeStage(workers=0) as stage:
+                with self.assertRaises(ValueError):
+                    await stage.run("pdf", int, "not-a-number")
+                self.assertEqual(await stage.run("pdf", int, "42"), 42)
+            return stage
+
+        stage = asyncio.run(scenario())
+        self.assertEqual(stage.stats["pdf"].tasks, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
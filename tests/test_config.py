@@ -4,7 +4,13 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from tos_radar.config import load_proxies, load_services
+from tos_radar.config import (
+    load_extraction_overrides,
+    load_proxies,
+    load_resource_allowlist,
+    load_services,
+    load_tenant_services,
+)
 
 
 class ConfigTests(unittest.TestCase):
@@ -29,6 +35,60 @@ class ConfigTests(unittest.TestCase):
             self.assertEqual(len(services), 1)
             self.assertEqual(services[0].url, "https://example.com/terms")
 
+    def test_priority_option_after_url(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tos_urls.txt"
+            path.write_text("https://example.com/terms priority=3\nhttps://other.org/tos\n", encoding="utf-8")
+            services = load_services(str(path))
+            self.assertEqual(
+                [(s.url, s.priority) for s in services],
+                [("https://example.com/terms", 3), ("https://other.org/tos", 0)],
+            )
+            path.write_text("https://example.com/terms urgent\n", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_services(str(path))
+
+    def test_load_resource_allowlist(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "resource_allowlist.txt"
+            path.write_text("# needs fonts for icons\nExample.com font,subframe\nbroken.org\n", encoding="utf-8")
+            allowlist = load_resource_allowlist(str(path))
+            self.assertEqual(allowlist, {"example.com": frozenset({"font", "subframe"}), "broken.org": frozenset()})
+            path.write_text("example.com pictures\n", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_resource_allowlist(str(path))
+            self.assertEqual(load_resource_allowlist(str(Path(tmp) / "missing.txt")), {})
+
+    def test_load_extraction_overrides(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "extraction_rules.txt"
+            path.write_text(
+                "# site chrome\nExample.com noise Back to top\nexample.com KEEP subscribe\nother.org drop ad\n",
+                encoding="utf-8",
+            )
+            self.assertEqual(
+                load_extraction_overrides(str(path)),
+                {
+                    "example.com": (("noise", "back to top"), ("keep", "subscribe")),
+                    "other.org": (("drop", "ad"),),
+                },
+            )
+            path.write_text("example.com hide footer\n", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_extraction_overrides(str(path))
+            self.assertEqual(load_extraction_overrides(str(Path(tmp) / "missing.txt")), {})
+
+    def test_load_tenant_services_by_file_name(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "beta.txt").write_text("https://example.com/terms\n", encoding="utf-8")
+            (root / "alpha.txt").write_text("https://example.com/terms\nhttps://other.org/tos\n", encoding="utf-8")
+            (root / "empty.txt").write_text("# nothing yet\n", encoding="utf-8")
+            tenants = load_tenant_services(tmp)
+            self.assertEqual(list(tenants), ["alpha", "beta"])
+            self.assertEqual([s.domain for s in tenants["alpha"]], ["example.com", "other.org"])
+            self.assertEqual(load_tenant_services(str(root / "missing")), {})
+
     def test_load_proxies_formats(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             path = Path(tmp) / "proxies.txt"
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import unittest
 
-from tos_radar.diff_utils import build_diff_html, is_changed
+from tos_radar.diff_utils import build_diff, compare_digest, is_changed
 
 
 class DiffTests(unittest.TestCase):
@@ -12,12 +12,41 @@ class DiffTests(unittest.TestCase):
     def test_is_changed_true_when_text_differs(self) -> None:
         self.assertTrue(is_changed("terms v1", "terms v2"))
 
-    def test_build_diff_html_has_table(self) -> None:
-        html = build_diff_html("old", "new")
-        self.assertIn("<table class=\"diff\"", html)
+    def test_compare_digest_matches_is_changed(self) -> None:
+        self.assertEqual(compare_digest("Hello, World!"), compare_digest("hello   world"))
+        self.assertNotEqual(compare_digest("terms v1"), compare_digest("terms v2"))
 
-    def test_build_diff_html_handles_very_long_lines(self) -> None:
-        long_old = "a" * 20000
-        long_new = "a" * 19999 + "b"
-        html = build_diff_html(long_old, long_new)
-        self.assertIn("<table class=\"diff\"", html)
+    def test_build_diff_marks_word_changes_inside_line(self) -> None:
+        diff = build_diff("intro\nthe user agrees to terms\noutro", "intro\nthe client agrees to terms\noutro")
+        self.assertEqual(diff["changed"], 1)
+        self.assertEqual(
+            diff["hunks"],
+            [
+                {
+                    "a": 1,
+                    "b": 1,
+                    "lines": [
+                        [" ", "intro"],
+                        ["~", [["=", "the "], ["-", "user"], ["+", "client"], ["=", " agrees to terms"]]],
+                        [" ", "outro"],
+                    ],
+                }
+            ],
+        )
+
+    def test_build_diff_keeps_only_context_around_changes(self) -> None:
+        previous = "\n".join(f"clause {i}" for i in range(100))
+        current = previous.replace("clause 10\n", "").replace("clause 90", "clause 90\nnew obligations apply")
+        diff = build_diff(previous, current)
+        self.assertEqual((diff["removed"], diff["added"]), (1, 1))
+        self.assertEqual([(h["a"], h["b"]) for h in diff["hunks"]], [(9, 9), (90, 89)])
+        self.assertEqual(diff["hunks"][0]["lines"][2], ["-", "clause 10"])
+        self.assertEqual(sum(len(h["lines"]) for h in diff["hunks"]), 10)
+
+    def test_build_diff_handles_very_long_lines_without_truncation(self) -> None:
+        long_old = " ".join(f"word{i}" for i in range(50_000))
+        long_new = long_old.replace("word49999", "changed")
+        diff = build_diff(long_old, long_new)
+        segments = diff["hunks"][0]["lines"][0][1]
+        self.assertEqual(segments[-2:], [["-", "word49999"], ["+", "changed"]])
+        self.assertEqual(len(segments[0][1]), len(long_old) - len("word49999"))
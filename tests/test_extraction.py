@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import unittest
+
+from tos_radar.extraction import (
+    BROWSER_EXTRACT_JS,
+    DEFAULT_RULES,
+    MIN_LINE_LENGTH,
+    clean_extracted_text,
+    decode_html,
+    extract_text_from_html,
+    looks_like_bot_block,
+    looks_like_js_only_page,
+    parse_html_document,
+    rules_for,
+)
+
+_LEGAL = "These terms of service govern your use of the platform and its features."
+
+
+class ExtractionTests(unittest.TestCase):
+    def test_drops_noise_selectors_and_short_lines(self) -> None:
+        html = f"""
+        <html><head><title>Terms</title><script>var x = "{_LEGAL}";</script></head>
+        <body>
+          <header><p>{_LEGAL} header copy</p></header>
+          <div class="cookie banner"><p>{_LEGAL} cookie copy</p></div>
+          <div role="navigation"><p>{_LEGAL} nav copy</p></div>
+          <div>
+            <h1>Terms</h1>
+            <p>{_LEGAL}</p>
+            <p>Contact our support team for anything else you might need.</p>
+            <p>Read more at <a href="https://x.com">https://x.com/terms page</a> today please.</p>
+          </div>
+        </body></html>
+        """
+        text = extract_text_from_html(html)
+        self.assertEqual(text, f"{_LEGAL}\nRead more at today please.")
+
+    def test_prefers_longest_candidate_block(self) -> None:
+        html = f"""
+        <body>
+          <div class="content"><p>Short candidate block with one line.</p></div>
+          <main><p>{_LEGAL}</p><div>Second paragraph of the legal document body.</div></main>
+        </body>
+        """
+        self.assertEqual(
+            extract_text_from_html(html),
+            f"{_LEGAL}\nSecond paragraph of the legal document body.",
+        )
+
+    def test_body_text_and_title_are_exposed_for_bot_checks(self) -> None:
+        document = parse_html_document("<title>Just a moment</title><body><p>Checking <b>captcha</b></p></body>")
+        self.assertEqual(document.title, "Just a moment")
+        self.assertIn("Checking captcha", document.body_text)
+
+    def test_decode_html_follows_header_then_meta_charset(self) -> None:
+        body = '<meta charset="windows-1251"><p>Соглашение</p>'.encode("cp1251")
+        self.assertIn("Соглашение", decode_html(body, "text/html"))
+        self.assertIn("Соглашение", decode_html("Соглашение".encode("koi8-r"), "text/html; charset=KOI8-R"))
+        self.assertEqual(decode_html("Соглашение".encode(), "text/html; charset=no-such-codec"), "Соглашение")
+
+    def test_implied_end_tags_keep_the_tree_flat(self) -> None:
+        html = (
+            "<body><main><ul><li>First list item of the agreement text<li>Second list item of the agreement"
+            "</ul><table><tr><td>Cell one of the tariff table here<td>Cell two of the tariff table here"
+            "<tr><td>Cell three of the tariff table here</table>"
+            + "".join(f"<p>Paragraph {i} of the terms of service document" for i in range(3000))
+            + "</main></body>"
+        )
+        lines = parse_html_document(html).main_text.splitlines()
+        self.assertEqual(
+            lines[:6],
+            [
+                "First list item of the agreement text",
+                "Second list item of the agreement",
+                "Cell one of the tariff table here",
+                "Cell two of the tariff table here",
+                "Cell three of the tariff table here",
+                "Paragraph 0 of the terms of service document",
+            ],
+        )
+        self.assertEqual(len(lines), 3005)
+
+    def test_js_only_page_detection(self) -> None:
+        html = '<body><noscript>Please enable JavaScript</noscript><div id="root"></div></body>'
+        self.assertTrue(looks_like_js_only_page(html, "", min_text_length=100))
+        self.assertFalse(looks_like_js_only_page(html, "x" * 200, min_text_length=100))
+
+    def test_clean_drops_page_chrome_lines(self) -> None:
+        text = "\n".join(
+            [
+                "  Terms   of\tService  ",
+                "© 2024 Example",
+                "We use cookies to improve the site",
+                f"{_LEGAL} Cookie files are described in section 7. " * 3,
+                "Помощь и обратная связь",
+                "Лицензия Банка России № 1234 " * 10,
+                "See https://example.com/terms",
+                "ok",
+                _LEGAL,
+            ]
+        )
+        long_cookie_line = (f"{_LEGAL} Cookie files are described in section 7. " * 3).strip()
+        self.assertEqual(clean_extracted_text(text), f"Terms of Service\n{long_cookie_line}\n{_LEGAL}")
+
+    def test_domain_overrides_adjust_rules(self) -> None:
+        text = f"Subscribe to plan updates\nBack to top\n{_LEGAL} Advertising partners apply."
+        rules = rules_for((("keep", "subscribe"), ("noise", "Back to top"), ("drop", "advertising partners")))
+        self.assertEqual(clean_extracted_text(text, rules), "Subscribe to plan updates")
+        self.assertIs(rules_for(()), DEFAULT_RULES)
+        self.assertIs(rules_for((("keep", "subscribe"),)), rules_for((("keep", "subscribe"),)))
+        with self.assertRaises(ValueError):
+            DEFAULT_RULES.with_overrides([("hide", "footer")])
+
+    def test_bot_markers(self) -> None:
+        self.assertTrue(looks_like_bot_block("just a moment\nchecking your browser... cloudflare"))
+        self.assertTrue(looks_like_bot_block("мы заметили необычный трафик"))
+        self.assertFalse(looks_like_bot_block("terms of service"))
+
+    def test_browser_script_uses_shared_selectors(self) -> None:
+        self.assertIn('[role=\\"navigation\\"]', BROWSER_EXTRACT_JS)
+        self.assertIn(".breadcrumbs", BROWSER_EXTRACT_JS)
+        self.assertIn(f"line.length < {MIN_LINE_LENGTH}", BROWSER_EXTRACT_JS)
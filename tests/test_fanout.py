@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from tos_radar.fanout import FetchFanout
+from tos_radar.models import ErrorCode, FetchResult, SourceType
+
+
+def _result(ok: bool = True) -> FetchResult:
+    return FetchResult(
+        ok=ok,
+        text="Terms" if ok else "",
+        source_type=SourceType.HTML,
+        attempt=1,
+        error_code=None if ok else ErrorCode.NETWORK,
+    )
+
+
+class FetchFanoutTests(unittest.TestCase):
+    def test_shared_url_is_fetched_once_for_all_subscribers(self) -> None:
+        calls = []
+
+        async def fetch() -> FetchResult:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _result()
+
+        async def scenario() -> tuple[FetchFanout, list[FetchResult]]:
+            fanout = FetchFanout({"https://a.com/tos": 3, "https://b.com/tos": 1})
+            results = await asyncio.gather(
+                fanout.fetch("https://a.com/tos", fetch),
+                fanout.fetch("https://a.com/tos", fetch),
+                fanout.fetch("https://b.com/tos", fetch),
+            )
+            # The last subscriber comes after the fetch has finished and still reuses it.
+            results.append(await fanout.fetch("https://a.com/tos", fetch))
+            return fanout, list(results)
+
+        fanout, results = asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((fanout.stats.fetches, fanout.stats.saved), (2, 2))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertTrue(fanout.is_shared("https://a.com/tos"))
+        self.assertFalse(fanout.is_shared("https://b.com/tos"))
+
+    def test_failed_fetch_is_retried_by_the_next_subscriber(self) -> None:
+        outcomes = [_result(ok=False), _result(ok=True)]
+
+        async def fetch() -> FetchResult:
+            return outcomes.pop(0)
+
+        async def scenario() -> tuple[FetchResult, FetchResult]:
+            fanout = FetchFanout({"https://a.com/tos": 2})
+            first = await fanout.fetch("https://a.com/tos", fetch)
+            second = await fanout.fetch("https://a.com/tos", fetch)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertFalse(first.ok)
+        self.assertTrue(second.ok)
+
+    def test_cancelled_subscriber_does_not_cancel_the_shared_fetch(self) -> None:
+        async def fetch() -> FetchResult:
+            await asyncio.sleep(0.02)
+            return _result()
+
+        async def scenario() -> FetchResult:
+            fanout = FetchFanout({"https://a.com/tos": 2})
+            first = asyncio.create_task(fanout.fetch("https://a.com/tos", fetch))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(fanout.fetch("https://a.com/tos", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertTrue(asyncio.run(scenario()).ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import unittest
+
+from tos_radar.fetch_profile import (
+    HUMANIZE_SEC,
+    FetchProfile,
+    derive_attempt_timeout,
+    derive_ready_max_ms,
+    latency_percentile,
+)
+
+
+class FetchProfileTests(unittest.TestCase):
+    def test_latency_percentile_nearest_rank(self) -> None:
+        samples = tuple(float(i) for i in range(1, 101))
+        self.assertEqual(latency_percentile(samples, 0.99), 99.0)
+        self.assertEqual(latency_percentile(samples, 0.5), 50.0)
+        self.assertIsNone(latency_percentile((), 0.99))
+
+    def test_history_is_capped(self) -> None:
+        profile = FetchProfile()
+        for i in range(60):
+            profile = profile.with_latency(float(i))
+        self.assertEqual(len(profile.latencies), 50)
+        self.assertEqual(profile.latencies[-1], 59.0)
+
+    def test_derived_timeout_is_clamped_and_needs_history(self) -> None:
+        def derive(*latencies: float) -> int:
+            profile = FetchProfile(latencies=latencies)
+            return derive_attempt_timeout(profile, default_sec=60, min_sec=10, max_sec=120, factor=3.0).attempt_sec
+
+        self.assertEqual(derive(1.0, 1.2), 60)
+        self.assertEqual(derive(1.0, 1.2, 0.9, 1.1, 2.0), 10)
+        self.assertEqual(derive(5.0, 6.0, 7.0, 8.0, 9.5), 29)
+        self.assertEqual(derive(30.0, 35.0, 40.0, 45.0, 60.0), 120)
+
+    def test_ready_wait_bound_follows_history(self) -> None:
+        self.assertEqual(derive_ready_max_ms(FetchProfile(ready_waits=(0.3, 0.4))), 12000)
+        self.assertEqual(derive_ready_max_ms(FetchProfile(ready_waits=(0.3, 0.4, 0.5))), 4000)
+        self.assertEqual(derive_ready_max_ms(FetchProfile(ready_waits=(1.5, 2.0, 2.5))), 7500)
+        self.assertEqual(derive_ready_max_ms(FetchProfile(ready_waits=(6.0, 9.0, 12.0))), 12000)
+
+    def test_humanize_window_and_round_trip(self) -> None:
+        profile = FetchProfile().with_ready_wait(0.75).humanized(now=1000.0)
+        self.assertTrue(profile.needs_humanize(1000.0 + HUMANIZE_SEC - 1))
+        self.assertFalse(profile.needs_humanize(1000.0 + HUMANIZE_SEC))
+        self.assertFalse(FetchProfile().needs_humanize(1000.0))
+        self.assertEqual(FetchProfile.from_dict(profile.to_dict()), profile)
+        self.assertEqual(FetchProfile.from_dict({"latencies": [1.0]}).ready_waits, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,56 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import http.client
+import io
+import pickle
+import tempfile
 import unittest
+from unittest.mock import patch
 
+from tos_radar.browser_pool import BrowserPool
 from tos_radar.fetcher import (
+    FetchError,
+    FetchOptions,
+    _HttpResponse,
+    _PageStats,
+    _http_get,
+    _resource_router,
     build_attempts,
     classify_untyped_error,
     compute_retry_delay,
+    _fetch_http_tier,
+    _download_pdf,
+    _fetch_pdf_document,
+    _fetch_single_attempt,
     _looks_like_binary_doc_url,
+    fetch_with_retries,
 )
-from tos_radar.models import ErrorCode, Proxy
+from tos_radar.extraction import DEFAULT_RULES, parse_html_document
+from tos_radar.models import ErrorCode, FetchMode, FetchResult, HttpValidators, Proxy, Service, SourceType
+from tos_radar.text_cache import TextCache
+
+_STATIC_PAGE = (
+    "<html><body><main>"
+    + "".join(f"<p>Clause {i}: the user agrees to the terms of this legal agreement.</p>" for i in range(12))
+    + "</main></body></html>"
+).encode("utf-8")
+
+
+class _FakeResponse(io.BytesIO):
+    def __init__(self, body: bytes, headers: dict[str, str]) -> None:
+        super().__init__(body)
+        self.status = 200
+        self.headers = headers
+
+
+def _opener_for(response: _FakeResponse):  # type: ignore[no-untyped-def]
+    class _Opener:
+        def open(self, req, timeout):  # type: ignore[no-untyped-def]
+            return response
+
+    return lambda *handlers: _Opener()
 
 
 class FetcherTests(unittest.TestCase):
@@ -38,8 +80,239 @@ class FetcherTests(unittest.TestCase):
         self.assertEqual(classify_untyped_error(RuntimeError("connection reset")), ErrorCode.NETWORK)
         self.assertEqual(classify_untyped_error(RuntimeError("verify you are human")), ErrorCode.BOT_DETECTED)
 
+    def test_fetch_error_keeps_code_across_pickling(self) -> None:
+        restored = pickle.loads(pickle.dumps(FetchError(ErrorCode.PDF_PARSE, "PDF parsing failed: bad xref")))
+        self.assertEqual(restored.code, ErrorCode.PDF_PARSE)
+        self.assertEqual(str(restored), "PDF parsing failed: bad xref")
+
     def test_binary_doc_url_detection(self) -> None:
         self.assertTrue(_looks_like_binary_doc_url("https://mkb.ru/file/abc-123"))
         self.assertTrue(_looks_like_binary_doc_url("https://site.com/attachment/1"))
         self.assertTrue(_looks_like_binary_doc_url("https://site.com/docs/terms.pdf"))
         self.assertFalse(_looks_like_binary_doc_url("https://alfabank.ru/retail/tariffs/"))
+
+    def test_http_tier_returns_text_for_static_page(self) -> None:
+        response = _HttpResponse(status=200, headers={"content-type": "text/html; charset=utf-8"}, body=_STATIC_PAGE)
+        with patch("tos_radar.fetcher._http_get", return_value=response):
+            result = asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=200))
+        self.assertIsNotNone(result)
+        assert result is not None
+        self.assertEqual(result.source_type, SourceType.HTML)
+        self.assertIn("Clause 11", result.text or "")
+        self.assertIsNotNone(result.validators.body_sha256)
+
+    def test_http_tier_handles_unclosed_paragraphs_and_escalates_on_parse_errors(self) -> None:
+        body = "<html><body><main>" + "".join(
+            f"<p>Clause {i}: the user agrees to the terms of this legal agreement." for i in range(1500)
+        )
+        response = _HttpResponse(status=200, headers={"content-type": "text/html"}, body=body.encode("utf-8"))
+        with patch("tos_radar.fetcher._http_get", return_value=response):
+            result = asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=200))
+        assert result is not None
+        self.assertEqual(len((result.text or "").splitlines()), 1500)
+
+        with (
+            patch("tos_radar.fetcher._http_get", return_value=response),
+            patch("tos_radar.fetcher.parse_html_document", side_effect=RecursionError("too deep")),
+        ):
+            self.assertIsNone(asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=200)))
+
+    def test_http_tier_escalates_on_broken_responses_and_unparsable_pdfs(self) -> None:
+        class _Truncated(_FakeResponse):
+            def read(self, size: int = -1) -> bytes:
+                raise http.client.IncompleteRead(b"partial", 100)
+
+        class _BadStatusOpener:
+            def open(self, req, timeout):  # type: ignore[no-untyped-def]
+                raise http.client.BadStatusLine("HTTP/9 ???")
+
+        for opener in (_opener_for(_Truncated(b"", {})), lambda *handlers: _BadStatusOpener()):
+            with patch("tos_radar.fetcher.build_opener", opener):
+                with self.assertRaises(FetchError) as ctx:
+                    _http_get("https://a.com/tos", 30, None, "text/html")
+                self.assertEqual(ctx.exception.code, ErrorCode.NETWORK)
+                self.assertIsNone(asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=200)))
+
+        pdf = _HttpResponse(status=200, headers={"content-type": "application/pdf"}, body=b"%PDF-1.7 broken")
+        with (
+            patch("tos_radar.fetcher._http_get", return_value=pdf),
+            patch("tos_radar.fetcher._pdf_to_text", side_effect=FetchError(ErrorCode.PDF_PARSE, "bad xref")),
+        ):
+            self.assertIsNone(asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=200)))
+
+    def test_http_tier_reuses_cached_text_for_identical_body(self) -> None:
+        response = _HttpResponse(status=200, headers={"content-type": "text/html"}, body=_STATIC_PAGE)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TextCache(tmp, max_bytes=1024 * 1024)
+            with (
+                patch("tos_radar.fetcher._http_get", return_value=response),
+                patch("tos_radar.fetcher.parse_html_document", side_effect=parse_html_document) as parse,
+            ):
+                first = asyncio.run(
+                    _fetch_http_tier("https://a.com/tos", 30, None, 200, None, None, DEFAULT_RULES, cache)
+                )
+                second = asyncio.run(
+                    _fetch_http_tier("https://b.com/tos", 30, None, 200, None, None, DEFAULT_RULES, cache)
+                )
+        assert first is not None and second is not None
+        self.assertEqual(second.text, first.text)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+
+    def test_http_tier_escalates_on_short_text_bot_marker_and_error_status(self) -> None:
+        cases = [
+            _HttpResponse(status=200, headers={"content-type": "text/html"}, body=_STATIC_PAGE),
+            _HttpResponse(
+                status=200,
+                headers={"content-type": "text/html"},
+                body=b"<title>Attention Required! | Cloudflare</title>" + _STATIC_PAGE,
+            ),
+            _HttpResponse(status=403, headers={}, body=b""),
+        ]
+        min_lengths = [5000, 200, 200]
+        for response, min_length in zip(cases, min_lengths):
+            with patch("tos_radar.fetcher._http_get", return_value=response):
+                result = asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, min_text_length=min_length))
+            self.assertIsNone(result)
+
+    def test_http_tier_stops_reading_at_the_body_limit(self) -> None:
+        body = b"%PDF-1.7 " + b"x" * 600_000
+        for headers in ({}, {"Content-Length": str(len(body))}):
+            response = _FakeResponse(body, headers)
+            read = response.read
+            with (
+                patch.object(response, "read", side_effect=read) as reads,
+                patch("tos_radar.fetcher.build_opener", _opener_for(response)),
+            ):
+                result = asyncio.run(
+                    _fetch_http_tier("https://a.com/tos", 30, None, 200, None, None, DEFAULT_RULES, None, 500_000)
+                )
+            self.assertIsNone(result)
+            # Only bounded chunk reads, never the whole body at once.
+            self.assertTrue(all(call.args for call in reads.call_args_list))
+
+    def test_http_tier_not_modified_on_304_or_identical_body(self) -> None:
+        known = HttpValidators(etag='"v1"', body_sha256="0" * 64, source_type=SourceType.HTML, text_length=900)
+        response = _HttpResponse(status=304, headers={"etag": '"v2"'}, body=b"")
+        with patch("tos_radar.fetcher._http_get", return_value=response) as http_get:
+            result = asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, 200, known))
+        self.assertEqual(http_get.call_args.args[-1], known)
+        assert result is not None
+        self.assertIsNone(result.text)
+        self.assertEqual(result.validators.etag, '"v2"')
+        self.assertEqual(result.validators.text_length, 900)
+
+        same_body = HttpValidators(body_sha256=hashlib.sha256(_STATIC_PAGE).hexdigest(), source_type=SourceType.HTML)
+        response = _HttpResponse(status=200, headers={"content-type": "text/html"}, body=_STATIC_PAGE)
+        with patch("tos_radar.fetcher._http_get", return_value=response):
+            result = asyncio.run(_fetch_http_tier("https://a.com/tos", 30, None, 200, same_body))
+        assert result is not None
+        self.assertIsNone(result.text)
+
+    def test_resource_router_aborts_blocked_requests_and_counts_them(self) -> None:
+        class _Request:
+            def __init__(self, resource_type: str, url: str) -> None:
+                self.resource_type = resource_type
+                self.url = url
+
+            def is_navigation_request(self) -> bool:
+                return self.resource_type == "document"
+
+            @property
+            def frame(self):  # type: ignore[no-untyped-def]
+                raise RuntimeError("service worker request")
+
+        class _Route:
+            def __init__(self, resource_type: str, url: str) -> None:
+                self.request = _Request(resource_type, url)
+                self.outcome = ""
+
+            async def abort(self, error_code: str) -> None:
+                self.outcome = error_code
+
+            async def continue_(self) -> None:
+                self.outcome = "continued"
+
+        stats = _PageStats()
+        router = _resource_router(frozenset({"image", "tracker"}), "example.com", stats)
+        routes = [
+            _Route("document", "https://example.com/terms"),
+            _Route("image", "https://example.com/logo.png"),
+            _Route("script", "https://mc.yandex.ru/metrika/tag.js"),
+            _Route("script", "https://example.com/app.js"),
+        ]
+
+        async def scenario() -> None:
+            for route in routes:
+                await router(route)
+
+        asyncio.run(scenario())
+        self.assertEqual(
+            [route.outcome for route in routes], ["continued", "blockedbyclient", "blockedbyclient", "continued"]
+        )
+        self.assertEqual(stats.blocked_requests, 2)
+
+    def test_browser_gets_what_the_http_tier_left_of_the_attempt(self) -> None:
+        service = Service(domain="a.com", url="https://a.com/terms")
+        options = FetchOptions(fetch_mode=FetchMode.TIERED)
+        for spent, expected in ((12.5, 17), (27.0, None)):
+            clock = iter((100.0, 100.0 + spent))
+            with (
+                patch("tos_radar.fetcher._fetch_http_tier", return_value=None),
+                patch("tos_radar.fetcher.time.perf_counter", side_effect=lambda: next(clock)),
+                patch("tos_radar.fetcher._fetch_html_text", return_value=("", False)) as browser,
+            ):
+                with self.assertRaises(FetchError) as ctx:
+                    asyncio.run(_fetch_single_attempt(service, 30, None, 1, BrowserPool(), options))
+            if expected is None:
+                self.assertEqual(ctx.exception.code, ErrorCode.TIMEOUT)
+                browser.assert_not_called()
+            else:
+                self.assertEqual(ctx.exception.code, ErrorCode.EMPTY_CONTENT)
+                self.assertEqual(browser.call_args.args[1], expected)
+
+    def test_bot_detection_on_an_earlier_attempt_is_reported(self) -> None:
+        ok = FetchResult(ok=True, text="Terms", source_type=SourceType.HTML, attempt=2)
+        attempts = [FetchError(ErrorCode.BOT_DETECTED, "Anti-bot page detected"), ok]
+        with patch("tos_radar.fetcher._fetch_single_attempt", side_effect=attempts):
+            result = asyncio.run(
+                fetch_with_retries(
+                    service=Service(domain="a.com", url="https://a.com/terms"),
+                    timeout_sec=30,
+                    retry_proxy_count=1,
+                    retry_backoff_base_sec=0.0,
+                    retry_backoff_max_sec=0.0,
+                    retry_jitter_sec=0.0,
+                    proxies=[Proxy(host="10.0.0.1", port=8080)],
+                    browser_pool=BrowserPool(),
+                )
+            )
+        self.assertTrue(result.ok)
+        self.assertTrue(result.bot_detected)
+
+    def test_pdf_download_streams_to_sink_within_size_limit(self) -> None:
+        body = b"%PDF-1.7 " + b"x" * 600_000
+        sink = io.BytesIO()
+        with patch("tos_radar.fetcher.build_opener", _opener_for(_FakeResponse(body, {}))):
+            response = _download_pdf("https://a.com/tos.pdf", 30, None, None, sink, len(body))
+        self.assertEqual(sink.getvalue(), body)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.sha256(), hashlib.sha256(body).hexdigest())
+
+        for headers in ({}, {"Content-Length": str(len(body))}):
+            with patch("tos_radar.fetcher.build_opener", _opener_for(_FakeResponse(body, headers))):
+                with self.assertRaises(FetchError) as ctx:
+                    _download_pdf("https://a.com/tos.pdf", 30, None, None, io.BytesIO(), 500_000)
+            self.assertEqual(ctx.exception.code, ErrorCode.PDF_DOWNLOAD)
+
+    def test_pdf_document_not_modified_skips_parsing(self) -> None:
+        known = HttpValidators(last_modified="Mon, 01 Jan 2024 00:00:00 GMT", source_type=SourceType.PDF)
+        response = _HttpResponse(status=304, headers={}, body=b"")
+        with (
+            patch("tos_radar.fetcher._http_get", return_value=response),
+            patch("tos_radar.fetcher.extract_pdf_text") as extract,
+        ):
+            result = asyncio.run(_fetch_pdf_document("https://a.com/tos.pdf", 30, None, known))
+        self.assertIsNone(result.text)
+        self.assertEqual(result.source_type, SourceType.PDF)
+        extract.assert_not_called()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+from tos_radar.pdf_text import PAGES_PER_TASK, PdfTextCache, extract_pdf_text, spooled_pdf
+
+
+def _fake_pages(page_count: int, calls: list[tuple[int, int]]):  # type: ignore[no-untyped-def]
+    def extract_pages(path: str, start: int, stop: int) -> tuple[list[str], int]:
+        calls.append((start, stop))
+        return [f"page {idx}" for idx in range(start, min(stop, page_count))], page_count
+
+    return extract_pages
+
+
+class PdfTextCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used_over_size(self) -> None:
+        cache = PdfTextCache(max_chars=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        self.assertEqual(cache.get("a"), "aaaa")
+        cache.put("c", "cccc")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "aaaa")
+        self.assertEqual(cache.get("c"), "cccc")
+        cache.put("huge", "x" * 11)
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (3, 2))
+
+
+class ExtractPdfTextTests(unittest.TestCase):
+    def test_pages_are_split_into_ranges_and_joined_in_order(self) -> None:
+        calls: list[tuple[int, int]] = []
+        page_count = PAGES_PER_TASK * 2 + 3
+        cache = PdfTextCache()
+        with patch("tos_radar.pdf_text.extract_pages", _fake_pages(page_count, calls)):
+            text = asyncio.run(extract_pdf_text("doc.pdf", "sha", None, cache))
+        self.assertEqual(text, "\n".join(f"page {idx}" for idx in range(page_count)))
+        self.assertEqual(
+            sorted(calls),
+            [(0, PAGES_PER_TASK), (PAGES_PER_TASK, 2 * PAGES_PER_TASK), (2 * PAGES_PER_TASK, 3 * PAGES_PER_TASK)],
+        )
+        self.assertEqual(cache.stats.pages, page_count)
+
+    def test_same_content_hash_is_not_parsed_again(self) -> None:
+        calls: list[tuple[int, int]] = []
+        cache = PdfTextCache()
+        with patch("tos_radar.pdf_text.extract_pages", _fake_pages(2, calls)):
+            first = asyncio.run(extract_pdf_text("a.pdf", "sha", None, cache))
+            second = asyncio.run(extract_pdf_text("b.pdf", "sha", None, cache))
+        self.assertEqual(first, second)
+        self.assertEqual(calls, [(0, PAGES_PER_TASK)])
+        self.assertEqual(cache.stats.hits, 1)
+
+
+class SpooledPdfTests(unittest.TestCase):
+    def test_file_is_removed_on_exit(self) -> None:
+        with spooled_pdf() as sink:
+            sink.write(b"%PDF-1.7")
+            sink.flush()
+            self.assertEqual(os.path.getsize(sink.name), 8)
+        self.assertFalse(os.path.exists(sink.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
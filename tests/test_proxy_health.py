@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from tos_radar.models import ErrorCode, Proxy
+from tos_radar.proxy_health import ProxyHealthRegistry
+
+_P1 = Proxy(host="10.0.0.1", port=8080, login="user", password="secret")
+_P2 = Proxy(host="10.0.0.2", port=8080)
+_P3 = Proxy(host="10.0.0.3", port=8080)
+
+
+class ProxyHealthTests(unittest.TestCase):
+    def test_quarantines_proxy_after_consecutive_proxy_faults(self) -> None:
+        registry = ProxyHealthRegistry(Path("proxy_health.json"), quarantine_failures=2, quarantine_sec=60)
+        registry.record(_P1, "a.com", False, 1.0, ErrorCode.EMPTY_CONTENT)
+        self.assertEqual(registry.rank([_P1, _P2], "a.com"), [_P1, _P2])
+        registry.record(_P1, "a.com", False, 30.0, ErrorCode.PROXY)
+        registry.record(_P1, "b.com", False, 30.0, ErrorCode.NETWORK)
+        self.assertEqual(registry.rank([_P1, _P2], "a.com"), [_P2])
+        self.assertEqual(registry.skipped, 1)
+        self.assertEqual(dict(registry.proxies["10.0.0.1:8080"].errors), {"EMPTY_CONTENT": 1, "PROXY": 1, "NETWORK": 1})
+
+        registry.proxies["10.0.0.1:8080"].last_failure_at = time.time() - 120
+        self.assertIn(_P1, registry.rank([_P1, _P2], "a.com"))
+
+    def test_target_side_failures_do_not_quarantine(self) -> None:
+        registry = ProxyHealthRegistry(Path("proxy_health.json"), quarantine_failures=2, quarantine_sec=60)
+        registry.record(_P1, "a.com", True, 1.0)
+        for domain in ("a.com", "b.com", "c.com"):
+            for proxy in (_P1, _P2):
+                registry.record(proxy, domain, False, 30.0, ErrorCode.TIMEOUT)
+                registry.record(proxy, domain, False, 5.0, ErrorCode.BOT_DETECTED)
+        self.assertCountEqual(registry.rank([_P1, _P2], "d.com"), [_P1, _P2])
+        self.assertEqual(registry.quarantined_count(), 0)
+        self.assertEqual(registry.proxies["10.0.0.2:8080"].success_rate, 1.0)
+        # A failure on the domain still drops the proxy as the domain's preferred one.
+        self.assertNotIn("a.com", registry.last_success)
+
+    def test_ranks_by_score_and_prefers_last_successful_proxy(self) -> None:
+        registry = ProxyHealthRegistry(Path("proxy_health.json"))
+        registry.record(_P1, "x.com", False, 5.0, ErrorCode.PROXY)
+        registry.record(_P2, "x.com", True, 1.0)
+        registry.record(_P3, "a.com", True, 8.0)
+        # score = success_rate / (1 + latency / 10): P2 0.91, P1 0.70, P3 0.56.
+        self.assertEqual(registry.rank([_P1, _P2, _P3], "x.com"), [_P2, _P1, _P3])
+        self.assertEqual(registry.rank([_P1, _P2, _P3], "a.com"), [_P3, _P2, _P1])
+
+    def test_persists_per_tenant_without_credentials(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                registry = ProxyHealthRegistry.load("t1")
+                registry.record(_P1, "a.com", True, 2.0)
+                registry.save()
+                raw = open("data/t1/proxy_health.json", encoding="utf-8").read()
+                restored = ProxyHealthRegistry.load("t1")
+            finally:
+                os.chdir(old_cwd)
+
+        self.assertNotIn("secret", raw)
+        self.assertEqual(restored.last_success, {"a.com": "10.0.0.1:8080"})
+        self.assertEqual(restored.proxies["10.0.0.1:8080"].latency_ewma_sec, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
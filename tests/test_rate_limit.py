@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from tos_radar.fetcher import build_attempts
+from tos_radar.models import Proxy
+from tos_radar.rate_limit import RateLimits, RequestScheduler, TokenBucket, registrable_domain
+
+
+class RateLimitTests(unittest.TestCase):
+    def test_registrable_domain(self) -> None:
+        self.assertEqual(registrable_domain("www.legal.example.com"), "example.com")
+        self.assertEqual(registrable_domain("terms.example.co.uk:8443"), "example.co.uk")
+        self.assertEqual(registrable_domain("bank.com.ru"), "bank.com.ru")
+        self.assertEqual(registrable_domain("10.0.0.1"), "10.0.0.1")
+
+    def test_token_bucket_refills_at_rate(self) -> None:
+        bucket = TokenBucket(rate_per_sec=2.0, burst=2)
+        now = bucket._updated
+        bucket.take(now)
+        bucket.take(now)
+        self.assertAlmostEqual(bucket.delay(now), 0.5)
+        self.assertEqual(bucket.delay(now + 0.5), 0.0)
+        self.assertAlmostEqual(bucket.reserve(now + 0.5), 0.0)
+        self.assertAlmostEqual(bucket.reserve(now + 0.5), 0.5)
+
+    def test_throttled_domain_does_not_block_free_slot(self) -> None:
+        limits = RateLimits(domain_per_min=1200, burst=1, resolve_hosts=False)
+
+        async def scenario() -> tuple[list[str], RequestScheduler]:
+            scheduler = RequestScheduler(concurrency=1, limits=limits)
+            order: list[str] = []
+
+            async def visit(domain: str) -> None:
+                async with scheduler.slot(domain):
+                    order.append(domain)
+                    await asyncio.sleep(0)
+
+            await asyncio.gather(visit("a.example.com"), visit("b.example.com"), visit("other.org"))
+            return order, scheduler
+
+        order, scheduler = asyncio.run(scenario())
+        self.assertEqual(order, ["a.example.com", "other.org", "b.example.com"])
+        self.assertEqual(scheduler.stats.throttled["domain"], 1)
+
+    def test_limits_are_opt_in_and_hosts_resolve_only_when_asked(self) -> None:
+        async def keys(limits: RateLimits) -> tuple[tuple[str, ...], list[str]]:
+            scheduler = RequestScheduler(concurrency=1, limits=limits)
+            resolved: list[str] = []
+
+            async def resolve(host: str) -> str:
+                resolved.append(host)
+                return "192.0.2.1"
+
+            with patch.object(scheduler, "_resolve", side_effect=resolve):
+                return await scheduler._bucket_keys("legal.example.com"), resolved
+
+        self.assertEqual(asyncio.run(keys(RateLimits())), ((), []))
+        self.assertEqual(asyncio.run(keys(RateLimits(host_per_min=60))), (("host:legal.example.com",), []))
+        # The opt-in values from the README: per registrable domain and per resolved IP.
+        opted_in = RateLimits(domain_per_min=30, host_per_min=60, proxy_per_min=60, burst=3, resolve_hosts=True)
+        self.assertEqual(
+            asyncio.run(keys(opted_in)),
+            (("domain:example.com", "host:192.0.2.1"), ["legal.example.com"]),
+        )
+
+    def test_proxies_are_assigned_round_robin(self) -> None:
+        proxies = [Proxy(host=f"10.0.0.{i}", port=8080) for i in range(1, 5)]
+        scheduler = RequestScheduler(concurrency=1, limits=RateLimits())
+        starts = [scheduler.next_proxy_start(len(proxies), retry_proxy_count=3) for _ in range(3)]
+        self.assertEqual(starts, [0, 3, 2])
+        attempts = build_attempts(proxies, retry_proxy_count=3, start=starts[1])
+        self.assertIsNone(attempts[0])
+        self.assertEqual([proxy.host for proxy in attempts[1:]], ["10.0.0.4", "10.0.0.1", "10.0.0.2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from tos_radar.models import ChangeLevel, ErrorCode, ReportLayout, RunEntry, SourceType, Status
+from tos_radar.report import ReportWriter, find_latest_report, write_report
+
+
+def _entry(domain: str, status: Status, diff: dict[str, object] | None = None) -> RunEntry:
+    return RunEntry(
+        domain=domain,
+        url=f"https://{domain}/tos",
+        status=status,
+        source_type=SourceType.HTML,
+        duration_sec=1.0,
+        text_length=1000,
+        change_level=ChangeLevel.MINOR if diff else None,
+        change_ratio=0.05 if diff else None,
+        error_code=ErrorCode.TIMEOUT if status == Status.FAILED else None,
+        error=None,
+        diff=diff,
+    )
+
+
+def _payload(report_path: Path) -> dict[str, object]:
+    html = report_path.read_text(encoding="utf-8")
+    line = next(line for line in html.splitlines() if line.startswith("const REPORT_DATA = "))
+    return json.loads(line.removeprefix("const REPORT_DATA = ").removesuffix(";"))
+
+
+class ReportWriterTests(unittest.TestCase):
+    def test_streams_items_sorted_with_latest_entry_per_domain(self) -> None:
+        diff = {"added": 1, "removed": 0, "changed": 0, "hunks": [{"a": 1, "b": 1, "lines": [["+", "</script>"]]}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                writer = ReportWriter("run", "t1")
+                writer.add(_entry("b.com", Status.FAILED))
+                writer.add(_entry("a.com", Status.CHANGED, diff))
+                writer.add(_entry("b.com", Status.UNCHANGED))
+                report_path = writer.finish()
+
+                self.assertEqual(find_latest_report("t1"), report_path)
+                self.assertEqual([p.name for p in Path("reports/t1").iterdir()], [report_path.name])
+                html = report_path.read_text(encoding="utf-8")
+                self.assertEqual(html.count("</script>"), 1)
+                payload = _payload(report_path)
+            finally:
+                os.chdir(old_cwd)
+
+        self.assertEqual(payload["mode"], "run")
+        items = payload["items"]
+        self.assertEqual([(i["domain"], i["status"]) for i in items], [("a.com", "CHANGED"), ("b.com", "UNCHANGED")])
+        self.assertEqual(items[0]["diff"], diff)
+
+    def test_sharded_layout_writes_index_and_diff_fragments(self) -> None:
+        diff = {"added": 2, "removed": 1, "changed": 0, "hunks": [{"a": 1, "b": 1, "lines": [["+", "x"]]}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                older = write_report([_entry("a.com", Status.UNCHANGED)], "run", "t1")
+                older.rename(older.with_name("report-20000101-000000.html"))
+                writer = ReportWriter("run", "t1", ReportLayout.SHARDED)
+                writer.add(_entry("b.com:8443", Status.CHANGED, diff))
+                writer.add(_entry("c.com", Status.CHANGED, diff))
+                writer.add(_entry("c.com", Status.FAILED))
+                index = writer.finish()
+
+                self.assertEqual(index.name, "index.html")
+                self.assertEqual(find_latest_report("t1"), index)
+                self.assertEqual(len(list(Path("reports/t1").glob("*.partial"))), 0)
+                fragments = sorted(p.name for p in (index.parent / "diffs").iterdir())
+                self.assertEqual(fragments, ["b.com_8443.js"])
+                fragment = (index.parent / "diffs" / "b.com_8443.js").read_text(encoding="utf-8")
+                self.assertTrue(fragment.startswith('__reportDiff("diffs/b.com_8443.js", '))
+                payload = _payload(index)
+            finally:
+                os.chdir(old_cwd)
+
+        first, second = payload["items"]
+        self.assertIsNone(first["diff"])
+        self.assertEqual(first["diff_ref"], "diffs/b.com_8443.js")
+        self.assertEqual(first["diff_summary"], {"added": 2, "removed": 1, "changed": 0})
+        self.assertNotIn("diff_ref", second)
+
+    def test_idn_domains_get_distinct_fragments(self) -> None:
+        diff = {"added": 1, "removed": 0, "changed": 0, "hunks": []}
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                writer = ReportWriter("run", "t1", ReportLayout.SHARDED)
+                writer.add(_entry("банк.рф", Status.CHANGED, diff))
+                writer.add(_entry("сайт.рф", Status.CHANGED, diff))
+                writer.add(_entry("a b.com", Status.CHANGED, diff))
+                writer.add(_entry("a~b.com", Status.CHANGED, diff))
+                index = writer.finish()
+                fragments = sorted(p.name for p in (index.parent / "diffs").iterdir())
+            finally:
+                os.chdir(old_cwd)
+
+        self.assertEqual(len(fragments), 4)
+        self.assertIn("xn--80ab2al.xn--p1ai.js", fragments)
+        self.assertIn("xn--80aswg.xn--p1ai.js", fragments)
+
+
+if __name__ == "__main__":
+    unittest.main()
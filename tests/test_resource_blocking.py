@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import unittest
+
+from tos_radar.resource_blocking import (
+    DEFAULT_BLOCKED_RESOURCES,
+    blocked_for,
+    is_tracker_host,
+    parse_blocked_resources,
+    should_block,
+)
+
+_DEFAULT = parse_blocked_resources(DEFAULT_BLOCKED_RESOURCES)
+
+
+class ResourceBlockingTests(unittest.TestCase):
+    def test_parse_blocked_resources(self) -> None:
+        self.assertEqual(_DEFAULT, frozenset({"image", "media", "font", "tracker", "subframe"}))
+        self.assertEqual(parse_blocked_resources(" Image , font,"), frozenset({"image", "font"}))
+        self.assertEqual(parse_blocked_resources(""), frozenset())
+        with self.assertRaises(ValueError):
+            parse_blocked_resources("image,document")
+
+    def test_should_block_types_trackers_and_subframes(self) -> None:
+        self.assertTrue(should_block(_DEFAULT, "image", "https://example.com/logo.png", site="example.com"))
+        self.assertTrue(should_block(_DEFAULT, "font", "https://fonts.gstatic.com/a.woff2", site="example.com"))
+        self.assertFalse(should_block(_DEFAULT, "stylesheet", "https://example.com/a.css", site="example.com"))
+        self.assertFalse(should_block(_DEFAULT, "script", "https://example.com/app.js", site="example.com"))
+        self.assertTrue(
+            should_block(_DEFAULT, "script", "https://www.googletagmanager.com/gtm.js", site="example.com")
+        )
+        self.assertTrue(should_block(_DEFAULT, "document", "https://widget.example.net/", subframe=True))
+        self.assertFalse(should_block(_DEFAULT, "document", "https://example.com/terms", site="example.com"))
+        self.assertFalse(should_block(frozenset(), "image", "https://example.com/logo.png"))
+
+    def test_tracker_hosts_match_subdomains_but_not_first_party(self) -> None:
+        self.assertTrue(is_tracker_host("mc.yandex.ru"))
+        self.assertTrue(is_tracker_host("region1.google-analytics.com"))
+        self.assertFalse(is_tracker_host("yandex.ru"))
+        self.assertFalse(is_tracker_host("cdn.amplitude.com", site="www.amplitude.com"))
+        self.assertTrue(is_tracker_host("cdn.amplitude.com", site="example.com"))
+
+    def test_allowlist_per_domain(self) -> None:
+        allowlist = {"fonts.example": frozenset({"font", "tracker"}), "broken.example": frozenset()}
+        self.assertEqual(blocked_for("fonts.example", _DEFAULT, allowlist), frozenset({"image", "media", "subframe"}))
+        self.assertEqual(blocked_for("broken.example", _DEFAULT, allowlist), frozenset())
+        self.assertEqual(blocked_for("other.example", _DEFAULT, allowlist), _DEFAULT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from tos_radar.models import ChangeLevel, ErrorCode, RunEntry, SourceType, Status
+from tos_radar.run_history import RunHistory, history_lines
+
+
+def _entry(domain: str, status: Status, error_code: ErrorCode | None = None) -> RunEntry:
+    return RunEntry(
+        domain=domain,
+        url=f"https://{domain}/tos",
+        status=status,
+        source_type=SourceType.HTML,
+        duration_sec=2.5,
+        text_length=1000,
+        change_level=ChangeLevel.MINOR if status == Status.CHANGED else None,
+        change_ratio=0.05 if status == Status.CHANGED else None,
+        error_code=error_code,
+        error=None,
+        diff=None,
+        attempt=2,
+        proxy_used="10.0.0.1:8080",
+    )
+
+
+class RunHistoryTests(unittest.TestCase):
+    def test_records_runs_and_answers_domain_queries(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            history = RunHistory(Path(tmp) / "history.sqlite3")
+            now = datetime.now()
+            history.record_run(
+                "t1",
+                "run",
+                now - timedelta(days=2, minutes=5),
+                now - timedelta(days=2),
+                [_entry("a.com", Status.FAILED, ErrorCode.TIMEOUT), _entry("b.com", Status.CHANGED)],
+            )
+            history.record_run(
+                "t1",
+                "run",
+                now - timedelta(minutes=5),
+                now,
+                [_entry("a.com", Status.FAILED, ErrorCode.TIMEOUT), _entry("b.com", Status.UNCHANGED)],
+            )
+            history.record_run("t2", "run", now, now, [_entry("a.com", Status.UNCHANGED)])
+
+            summaries = history.domain_summaries("t1", now - timedelta(days=30))
+            recent = history.domain_summaries("t1", now - timedelta(days=1))
+            rows = history.domain_entries("t1", "a.com")
+            runs = history.recent_runs("t1")
+            lines = history_lines(history, "t1", None, 30, 20, runs=False)
+
+        self.assertEqual(
+            [(s.domain, s.runs, s.failed, s.changed) for s in summaries],
+            [("a.com", 2, 2, 0), ("b.com", 2, 0, 1)],
+        )
+        self.assertEqual(summaries[0].top_error, "TIMEOUT")
+        self.assertEqual(summaries[1].last_status, "UNCHANGED")
+        self.assertEqual([s.runs for s in recent], [1, 1])
+        self.assertEqual(
+            [(row["status"], row["attempt"], row["proxy"]) for row in rows],
+            [("FAILED", 2, "10.0.0.1:8080")] * 2,
+        )
+        self.assertEqual([(row["services"], row["failed"]) for row in runs], [(2, 1), (2, 1)])
+        self.assertIn("100.0%", lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
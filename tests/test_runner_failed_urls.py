@@ -27,7 +27,7 @@ class RunnerFailedUrlsTests(unittest.TestCase):
                         change_ratio=None,
                         error_code=None,
                         error="x",
-                        diff_html=None,
+                        diff=None,
                     ),
                     RunEntry(
                         domain="b.com",
@@ -40,7 +40,7 @@ class RunnerFailedUrlsTests(unittest.TestCase):
                         change_ratio=None,
                         error_code=None,
                         error=None,
-                        diff_html=None,
+                        diff=None,
                     ),
                 ]
                 _write_last_failed_urls("tenant-a", entries)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import unittest
+
+from tos_radar.models import Service
+from tos_radar.run_history import DomainSummary
+from tos_radar.scan_planner import estimate_services, plan_lines, plan_scan, predict_makespan
+
+
+def _summary(domain: str, runs: int, failed: int, avg_sec: float) -> DomainSummary:
+    return DomainSummary(
+        domain=domain,
+        runs=runs,
+        failed=failed,
+        changed=0,
+        top_error=None,
+        last_status="UNCHANGED",
+        avg_duration_sec=avg_sec,
+    )
+
+
+class ScanPlannerTests(unittest.TestCase):
+    def test_predict_makespan_list_scheduling(self) -> None:
+        self.assertEqual(predict_makespan([1, 1, 1, 1, 10], 2), 12)
+        self.assertEqual(predict_makespan([10, 1, 1, 1, 1], 2), 10)
+        self.assertEqual(predict_makespan([5, 5], 8), 5)
+        self.assertEqual(predict_makespan([], 4), 0.0)
+
+    def test_estimates_include_retry_cost_and_fallback(self) -> None:
+        services = [Service(domain, f"https://{domain}") for domain in ("a.com", "b.com", "c.com")]
+        summaries = {"a.com": _summary("a.com", 4, 2, 10.0), "b.com": _summary("b.com", 2, 0, 2.0)}
+        estimates = estimate_services(services, summaries, default_sec=60)
+        self.assertEqual([e.service.domain for e in estimates], ["a.com", "b.com", "c.com"])
+        self.assertEqual(estimates[0].expected_sec, 15.0)
+        self.assertEqual(estimates[0].failure_rate, 0.5)
+        self.assertEqual(estimates[1].expected_sec, 2.0)
+        self.assertEqual(estimates[2].expected_sec, 8.5)
+        self.assertEqual(estimates[2].samples, 0)
+
+        unknown = estimate_services(services, {}, default_sec=60)
+        self.assertTrue(all(e.expected_sec == 60 for e in unknown))
+
+    def test_plan_orders_by_priority_then_longest_first(self) -> None:
+        services = [
+            Service("quick.com", "https://quick.com"),
+            Service("slow.com", "https://slow.com"),
+            Service("vip.com", "https://vip.com", priority=5),
+            Service("mid.com", "https://mid.com"),
+        ]
+        summaries = {
+            "quick.com": _summary("quick.com", 3, 0, 1.0),
+            "slow.com": _summary("slow.com", 3, 0, 30.0),
+            "vip.com": _summary("vip.com", 3, 0, 2.0),
+            "mid.com": _summary("mid.com", 3, 0, 5.0),
+        }
+        plan = plan_scan(estimate_services(services, summaries, default_sec=60), concurrency=2)
+        self.assertEqual([s.domain for s in plan.services], ["vip.com", "slow.com", "mid.com", "quick.com"])
+        self.assertLessEqual(plan.makespan_sec, plan.file_order_makespan_sec)
+        lines = plan_lines(plan)
+        self.assertEqual(len(lines), 6)
+        self.assertIn("predicted makespan", lines[-1])
+
+    def test_lpt_beats_file_order_with_slow_tail(self) -> None:
+        services = [Service(f"s{i}.com", f"https://s{i}.com") for i in range(9)]
+        summaries = {f"s{i}.com": _summary(f"s{i}.com", 1, 0, 1.0) for i in range(8)}
+        summaries["s8.com"] = _summary("s8.com", 1, 0, 8.0)
+        plan = plan_scan(estimate_services(services, summaries, default_sec=60), concurrency=2)
+        self.assertEqual(plan.services[0].domain, "s8.com")
+        self.assertEqual(plan.makespan_sec, 8.0)
+        self.assertEqual(plan.file_order_makespan_sec, 12.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import random
+import unittest
+from difflib import SequenceMatcher
+
+from tos_radar.sequence_diff import intern_tokens, matching_blocks
+
+
+def _matched(blocks: list[tuple[int, int, int]]) -> int:
+    return sum(size for _, _, size in blocks)
+
+
+class SequenceDiffTests(unittest.TestCase):
+    def test_intern_tokens_shares_ids(self) -> None:
+        a, b = intern_tokens(["x", "y", "x"], ["y", "z"])
+        self.assertEqual(a, [0, 1, 0])
+        self.assertEqual(b, [1, 2])
+
+    def test_blocks_form_valid_common_subsequence(self) -> None:
+        rng = random.Random(3)
+        a = [rng.randrange(50) for _ in range(3000)]
+        b = list(a)
+        for _ in range(40):
+            pos = rng.randrange(len(b))
+            b[pos : pos + 5] = [rng.randrange(50, 60) for _ in range(rng.randrange(8))]
+        blocks = matching_blocks(a, b)
+        last_i = last_j = -1
+        for i, j, size in blocks:
+            self.assertGreater(i, last_i)
+            self.assertGreater(j, last_j)
+            self.assertEqual(a[i : i + size], b[j : j + size])
+            last_i, last_j = i + size - 1, j + size - 1
+        exact = _matched(SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks())
+        self.assertGreaterEqual(_matched(blocks), int(exact * 0.97))
+
+    def test_disjoint_and_empty_inputs(self) -> None:
+        self.assertEqual(matching_blocks([], [1, 2]), [])
+        self.assertEqual(matching_blocks([1, 2], [3, 4]), [])
+        self.assertEqual(matching_blocks([1, 2, 3], [1, 2, 3]), [(0, 0, 3)])
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
-from tos_radar.state_store import read_current, write_current_and_rotate
+from tos_radar.diff_utils import compare_digest
+from tos_radar.fetch_profile import FetchProfile, read_fetch_profile, write_fetch_profile
+from tos_radar.models import FetchTier, HttpValidators, SourceType
+from tos_radar import state_store
+from tos_radar.state_store import (
+    DocumentUpdate,
+    commit_documents,
+    list_versions,
+    read_current,
+    read_current_digest,
+    read_validators,
+    read_version,
+    recover_journal,
+    write_current_and_rotate,
+    write_validators,
+)
 
 
 class StateStoreTests(unittest.TestCase):
@@ -19,3 +37,153 @@ class StateStoreTests(unittest.TestCase):
                 self.assertEqual(read_current("t1", "example.com"), "v2")
             finally:
                 os.chdir(old_cwd)
+
+    def test_digest_is_stored_and_backfilled_for_legacy_state(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                self.assertIsNone(read_current_digest("t1", "example.com"))
+                write_current_and_rotate("t1", "example.com", "Terms, v1")
+                self.assertEqual(read_current_digest("t1", "example.com"), compare_digest("terms v1"))
+
+                legacy_dir = Path("data/state/t1/legacy.com")
+                legacy_dir.mkdir(parents=True)
+                (legacy_dir / "current.txt").write_text("Old terms", encoding="utf-8")
+                self.assertEqual(read_current_digest("t1", "legacy.com"), compare_digest("Old terms"))
+                self.assertTrue((legacy_dir / "current.digest").exists())
+            finally:
+                os.chdir(old_cwd)
+
+    def test_versions_are_kept_as_shared_content_addressed_blobs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                for text in ("v1", "v2", "v2", "v3"):
+                    write_current_and_rotate("t1", "example.com", text)
+                write_current_and_rotate("t2", "example.com", "v1")
+
+                self.assertEqual([read_version("t1", "example.com", n) for n in range(4)], ["v3", "v2", "v1", None])
+                self.assertIsNone(read_version("t1", "example.com", -1))
+                versions = list_versions("t1", "example.com")
+                self.assertEqual([version.length for version in versions], [2, 2, 2])
+                self.assertEqual(versions[0].digest, compare_digest("v3"))
+                self.assertEqual(read_current("t2", "example.com"), "v1")
+                self.assertEqual(len(list(Path("data/blobs").rglob("*.txt.gz"))), 3)
+            finally:
+                os.chdir(old_cwd)
+
+    def test_legacy_current_and_previous_are_migrated_on_write(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                legacy_dir = Path("data/state/t1/legacy.com")
+                legacy_dir.mkdir(parents=True)
+                (legacy_dir / "previous.txt").write_text("Old", encoding="utf-8")
+                (legacy_dir / "current.txt").write_text("Current", encoding="utf-8")
+                self.assertEqual(read_version("t1", "legacy.com", 1), "Old")
+
+                write_current_and_rotate("t1", "legacy.com", "New")
+                self.assertEqual([read_version("t1", "legacy.com", n) for n in range(3)], ["New", "Current", "Old"])
+                self.assertEqual(read_current_digest("t1", "legacy.com"), compare_digest("New"))
+                self.assertFalse((legacy_dir / "current.txt").exists())
+                self.assertFalse((legacy_dir / "previous.txt").exists())
+            finally:
+                os.chdir(old_cwd)
+
+    def test_interrupted_batch_is_committed_when_all_blobs_exist(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                write_current_and_rotate("t1", "a.com", "a1")
+                updates = [DocumentUpdate("a.com", "a2"), DocumentUpdate("b.com", "b1")]
+                real_store = state_store._store_manifest
+                calls = []
+
+                def crash_after_first(service_dir, versions):  # type: ignore[no-untyped-def]
+                    calls.append(service_dir)
+                    if len(calls) > 1:
+                        raise OSError("disk gone")
+                    real_store(service_dir, versions)
+
+                with patch.object(state_store, "_store_manifest", side_effect=crash_after_first):
+                    with self.assertRaises(OSError):
+                        commit_documents("t1", updates)
+                self.assertIsNone(read_current("t1", "b.com"))
+
+                self.assertEqual(recover_journal("t1"), "committed")
+                self.assertEqual([read_version("t1", "a.com", n) for n in range(2)], ["a2", "a1"])
+                self.assertEqual(read_current("t1", "b.com"), "b1")
+                self.assertIsNone(recover_journal("t1"))
+            finally:
+                os.chdir(old_cwd)
+
+    def test_interrupted_batch_is_rolled_back_when_a_blob_is_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                write_current_and_rotate("t1", "a.com", "a1")
+                real_write_blob = state_store._write_blob
+
+                def crash_on_b(text):  # type: ignore[no-untyped-def]
+                    if text == "b1":
+                        raise OSError("disk gone")
+                    return real_write_blob(text)
+
+                with patch.object(state_store, "_write_blob", side_effect=crash_on_b):
+                    with self.assertRaises(OSError):
+                        commit_documents("t1", [DocumentUpdate("a.com", "a2"), DocumentUpdate("b.com", "b1")])
+
+                b1_blob = state_store._blob_path(hashlib.sha256(b"b1").hexdigest())
+                b1_blob.parent.mkdir(parents=True, exist_ok=True)
+                stale = b1_blob.parent / f"{b1_blob.name.split('.')[0]}.crashed.tmp"
+                fresh = b1_blob.parent / f"{b1_blob.name.split('.')[0]}.writing.tmp"
+                other = b1_blob.parent / "other-tenant.tmp"
+                for path in (stale, fresh, other):
+                    path.write_bytes(b"partial")
+                os.utime(stale, (0, 0))
+                os.utime(other, (0, 0))
+
+                self.assertEqual(recover_journal("t1"), "rolled_back")
+                self.assertEqual([path.exists() for path in (stale, fresh, other)], [False, True, True])
+                self.assertEqual([version.length for version in list_versions("t1", "a.com")], [2])
+                self.assertEqual(read_current("t1", "a.com"), "a1")
+                self.assertIsNone(read_current("t1", "b.com"))
+            finally:
+                os.chdir(old_cwd)
+
+    def test_fetch_profile_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                self.assertIsNone(read_fetch_profile("t1", "example.com").tier)
+                write_fetch_profile("t1", "example.com", FetchProfile(tier=FetchTier.HTTP).with_latency(1.23456))
+                profile = read_fetch_profile("t1", "example.com")
+                self.assertEqual(profile.tier, FetchTier.HTTP)
+                self.assertEqual(profile.latencies, (1.235,))
+            finally:
+                os.chdir(old_cwd)
+
+    def test_validators_round_trip_and_clear(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                validators = HttpValidators(
+                    etag='"abc"',
+                    last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+                    body_sha256="f" * 64,
+                    source_type=SourceType.PDF,
+                    text_length=1200,
+                )
+                write_validators("t1", "example.com", validators)
+                self.assertEqual(read_validators("t1", "example.com"), validators)
+                write_validators("t1", "example.com", None)
+                self.assertIsNone(read_validators("t1", "example.com"))
+            finally:
+                os.chdir(old_cwd)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tos_radar import state_writer
+from tos_radar.state_store import read_current, read_version
+from tos_radar.state_writer import StateWriter
+
+
+class StateWriterTests(unittest.TestCase):
+    def test_updates_are_committed_in_batches(self) -> None:
+        async def scenario() -> StateWriter:
+            async with StateWriter("t1", batch_size=4) as writer:
+                for idx in range(10):
+                    await writer.submit(f"d{idx}.com", f"text {idx}")
+                await writer.submit("d0.com", "text 0 v2")
+            return writer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                writer = asyncio.run(scenario())
+                self.assertEqual(writer.stats.updates, 11)
+                self.assertEqual(writer.stats.versions, 11)
+                self.assertLessEqual(writer.stats.max_batch, 4)
+                self.assertLess(writer.stats.batches, 11)
+                self.assertEqual(read_current("t1", "d9.com"), "text 9")
+                self.assertEqual(read_version("t1", "d0.com", 1), "text 0")
+            finally:
+                os.chdir(old_cwd)
+
+    def test_write_returns_once_the_update_is_on_disk(self) -> None:
+        async def scenario() -> tuple[str | None, StateWriter]:
+            async with StateWriter("t1") as writer:
+                await writer.write("a.com", "stored")
+                stored = read_current("t1", "a.com")
+            return stored, writer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                stored, writer = asyncio.run(scenario())
+                self.assertEqual(stored, "stored")
+                self.assertEqual(writer.stats.batches, 1)
+            finally:
+                os.chdir(old_cwd)
+
+    def test_failed_batch_is_counted_and_later_batches_still_run(self) -> None:
+        real_commit = state_writer.commit_documents
+
+        def fail_first(tenant_id, updates):  # type: ignore[no-untyped-def]
+            if any(update.domain == "bad.com" for update in updates):
+                raise OSError("disk full")
+            return real_commit(tenant_id, updates)
+
+        async def scenario() -> StateWriter:
+            async with StateWriter("t1", batch_size=1) as writer:
+                await writer.submit("bad.com", "x")
+                await writer.flush()
+                await writer.submit("good.com", "y")
+            return writer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                with patch.object(state_writer, "commit_documents", side_effect=fail_first):
+                    writer = asyncio.run(scenario())
+                self.assertEqual(writer.stats.failed, 1)
+                self.assertEqual(writer.stats.versions, 1)
+                self.assertEqual(read_current("t1", "good.com"), "y")
+            finally:
+                os.chdir(old_cwd)
+
+
+    def test_write_raises_when_its_batch_fails(self) -> None:
+        async def scenario() -> StateWriter:
+            async with StateWriter("t1") as writer:
+                with self.assertRaises(OSError):
+                    await writer.write("a.com", "lost")
+            return writer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                with patch.object(state_writer, "commit_documents", side_effect=OSError("disk full")):
+                    writer = asyncio.run(scenario())
+                self.assertEqual(writer.stats.failed, 1)
+                self.assertIsNone(read_current("t1", "a.com"))
+            finally:
+                os.chdir(old_cwd)
+
+    def test_file_writes_run_after_earlier_documents_and_failures_are_counted(self) -> None:
+        seen: list[str | None] = []
+
+        def record_current(domain: str) -> None:
+            seen.append(read_current("t1", domain))
+
+        def broken(domain: str) -> None:
+            raise OSError("disk full")
+
+        async def scenario() -> StateWriter:
+            async with StateWriter("t1", batch_size=8) as writer:
+                await writer.submit("a.com", "stored")
+                await writer.submit_file(record_current, "a.com")
+                await writer.submit_file(broken, "a.com")
+                await writer.submit("b.com", "after")
+            return writer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            old_cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                writer = asyncio.run(scenario())
+                self.assertEqual(seen, ["stored"])
+                self.assertEqual(writer.stats.files, 1)
+                self.assertEqual(writer.stats.failed_files, 1)
+                self.assertEqual(read_current("t1", "b.com"), "after")
+            finally:
+                os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    unittest.main()
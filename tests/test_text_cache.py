@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tos_radar import fetcher, text_cache
+from tos_radar.extraction import DEFAULT_RULES, rules_for
+from tos_radar.text_cache import TextCache, extractor_version
+
+
+class TextCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_round_trip_and_hit_rate(self) -> None:
+        cache = TextCache(self.root, max_bytes=1024 * 1024)
+        key = cache.key(DEFAULT_RULES, "HTML", "ab" * 32)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "Terms of service\nСоглашение")
+        self.assertEqual(TextCache(self.root, max_bytes=1024 * 1024).get(key), "Terms of service\nСоглашение")
+        self.assertEqual(cache.get(key), "Terms of service\nСоглашение")
+        self.assertEqual((cache.stats.hits, cache.stats.misses, cache.stats.stores), (1, 1, 1))
+        self.assertEqual(cache.stats.hit_rate, 0.5)
+
+    def test_rule_changes_change_the_key(self) -> None:
+        cache = TextCache(self.root, max_bytes=1024)
+        overridden = rules_for((("noise", "back to top"),))
+        self.assertNotEqual(extractor_version(DEFAULT_RULES), extractor_version(overridden))
+        self.assertNotEqual(cache.key(DEFAULT_RULES, "HTML", "00"), cache.key(overridden, "HTML", "00"))
+        self.assertNotEqual(cache.key(DEFAULT_RULES, "HTML", "00"), cache.key(DEFAULT_RULES, "PDF", "00"))
+
+    def test_fetcher_extraction_changes_change_the_key(self) -> None:
+        async def other_pdf_to_text(data: bytes, compute_stage: object) -> str:
+            return data.decode("latin-1")
+
+        def version() -> str:
+            text_cache._code_version.cache_clear()
+            extractor_version.cache_clear()
+            return extractor_version(DEFAULT_RULES)
+
+        before = version()
+        with patch.object(fetcher, "_pdf_to_text", other_pdf_to_text):
+            self.assertNotEqual(version(), before)
+        self.assertEqual(version(), before)
+
+    def test_evicts_least_recently_used_files_over_limit(self) -> None:
+        keys = [f"{idx:02d}" + "0" * 62 for idx in range(4)]
+        for idx, key in enumerate(keys):
+            TextCache(self.root, max_bytes=1024 * 1024).put(key, os.urandom(500).hex())
+            os.utime(self.root / key[:2] / f"{key}.gz", (1000 + idx, 1000 + idx))
+        cache = TextCache(self.root, max_bytes=2500)
+        # Touching the oldest entry makes it the most recently used one.
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put("99" + "0" * 62, os.urandom(500).hex())
+        self.assertGreater(cache.stats.evicted, 0)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        size = sum(path.stat().st_size for path in self.root.glob("*/*.gz"))
+        self.assertLessEqual(size, 2500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from tos_radar.models import Proxy
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+LOGGER = logging.getLogger(__name__)
+_NO_PROXY_KEY = "none"
+_LAUNCH_ARGS = (
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-first-run",
+)
+
+
+@dataclass
+class BrowserPoolStats:
+    hits: int = 0
+    misses: int = 0
+    launches: int = 0
+    recycles: int = 0
+    crashes: int = 0
+    contexts: int = 0
+
+
+@dataclass
+class _PooledBrowser:
+    key: str
+    browser: Browser
+    pages_served: int = 0
+    in_use: int = 0
+    retired: bool = False
+    last_used: float = 0.0
+
+
+class BrowserPool:
+    """Long-lived Chromium browsers keyed by proxy, one Playwright driver per pool.
+
+    Every fetch gets a fresh BrowserContext; browsers are recycled after
+    `max_pages_per_browser` contexts or when they disconnect (crash).
+    The driver is started lazily, so runs that never need a browser pay nothing.
+    Launches run outside the pool lock; concurrent callers for the same proxy wait on one launch.
+    """
+
+    def __init__(self, max_browsers: int = 4, max_pages_per_browser: int = 100) -> None:
+        self._max_browsers = max(1, max_browsers)
+        self._max_pages = max(1, max_pages_per_browser)
+        self._playwright: Playwright | None = None
+        self._browsers: dict[str, _PooledBrowser] = {}
+        self._retiring: list[_PooledBrowser] = []
+        # Launches in flight by key; the future carries the launch error, or None on success.
+        self._pending: dict[str, asyncio.Future[BaseException | None]] = {}
+        self._lock = asyncio.Lock()
+        self._driver_lock = asyncio.Lock()
+        self.stats = BrowserPoolStats()
+
+    async def __aenter__(self) -> BrowserPool:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        await self.close()
+
+    @asynccontextmanager
+    async def context(self, proxy: Proxy | None, **context_kwargs: Any) -> AsyncIterator[BrowserContext]:
+        entry = await self._acquire(proxy)
+        context: BrowserContext | None = None
+        try:
+            context = await entry.browser.new_context(**context_kwargs)
+            self.stats.contexts += 1
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:  # noqa: BLE001
+                    LOGGER.debug("Browser context close failed key=%s", _safe_key(entry.key))
+            await self._release(entry)
+
+    async def close(self) -> None:
+        entries = list(self._browsers.values()) + self._retiring
+        self._browsers.clear()
+        self._retiring.clear()
+        for entry in entries:
+            await self._close_browser(entry)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:  # noqa: BLE001
+                LOGGER.debug("Playwright driver stop failed")
+            self._playwright = None
+
+    async def _acquire(self, proxy: Proxy | None) -> _PooledBrowser:
+        key = proxy.to_proxy_url() if proxy is not None else _NO_PROXY_KEY
+        while True:
+            async with self._lock:
+                entry = self._browsers.get(key)
+                if entry is not None and not entry.browser.is_connected():
+                    LOGGER.warning("Browser disconnected, relaunching key=%s", _safe_key(key))
+                    self.stats.crashes += 1
+                    self._retire(entry)
+                    entry = None
+                if entry is not None and entry.pages_served >= self._max_pages:
+                    self.stats.recycles += 1
+                    self._retire(entry)
+                    entry = None
+
+                if entry is not None:
+                    self.stats.hits += 1
+                    self._check_out(entry)
+                    break
+                pending = self._pending.get(key)
+                launching = pending is None
+                if pending is None:
+                    self.stats.misses += 1
+                    self._evict_idle_if_full()
+                    pending = asyncio.get_running_loop().create_future()
+                    self._pending[key] = pending
+
+            if not launching:
+                # Shielded: a cancelled waiter must not cancel the launch other callers wait on.
+                error = await asyncio.shield(pending)
+                if error is not None:
+                    raise error
+                continue
+
+            try:
+                browser = await self._launch(proxy)
+            except BaseException as exc:
+                del self._pending[key]
+                # On cancellation the waiters retry and one of them launches instead.
+                pending.set_result(exc if isinstance(exc, Exception) else None)
+                raise
+            async with self._lock:
+                del self._pending[key]
+                self.stats.launches += 1
+                entry = _PooledBrowser(key=key, browser=browser)
+                self._browsers[key] = entry
+                self._check_out(entry)
+            pending.set_result(None)
+            break
+        await self._close_retired_idle()
+        return entry
+
+    def _check_out(self, entry: _PooledBrowser) -> None:
+        entry.pages_served += 1
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+
+    async def _release(self, entry: _PooledBrowser) -> None:
+        entry.in_use -= 1
+        if not entry.retired and not entry.browser.is_connected():
+            self.stats.crashes += 1
+            self._retire(entry)
+        await self._close_retired_idle()
+
+    def _retire(self, entry: _PooledBrowser) -> None:
+        entry.retired = True
+        if self._browsers.get(entry.key) is entry:
+            del self._browsers[entry.key]
+        self._retiring.append(entry)
+
+    def _evict_idle_if_full(self) -> None:
+        if len(self._browsers) < self._max_browsers:
+            return
+        idle = [entry for entry in self._browsers.values() if entry.in_use == 0]
+        if not idle:
+            # All browsers are busy: allow a temporary overshoot instead of blocking the fetch.
+            return
+        self._retire(min(idle, key=lambda entry: entry.last_used))
+
+    async def _close_retired_idle(self) -> None:
+        idle = [entry for entry in self._retiring if entry.in_use <= 0]
+        if not idle:
+            return
+        self._retiring = [entry for entry in self._retiring if entry.in_use > 0]
+        for entry in idle:
+            await self._close_browser(entry)
+
+    async def _close_browser(self, entry: _PooledBrowser) -> None:
+        try:
+            await entry.browser.close()
+        except Exception:  # noqa: BLE001
+            LOGGER.debug("Browser close failed key=%s", _safe_key(entry.key))
+
+    async def _launch(self, proxy: Proxy | None) -> Browser:
+        async with self._driver_lock:
+            if self._playwright is None:
+                self._playwright = await _start_playwright()
+        launch_kwargs: dict[str, object] = {"headless": True, "args": list(_LAUNCH_ARGS)}
+        if proxy is not None:
+            launch_kwargs["proxy"] = proxy.to_playwright_proxy()
+        return await self._playwright.chromium.launch(**launch_kwargs)
+
+
+async def _start_playwright() -> Playwright:
+    try:
+        from playwright.async_api import async_playwright
+    except Exception as exc:  # noqa: BLE001
+        msg = "Playwright is not installed. Run: python -m playwright install chromium"
+        raise RuntimeError(msg) from exc
+    return await async_playwright().start()
+
+
+def _safe_key(key: str) -> str:
+    # Proxy keys may embed credentials; keep only host:port in logs.
+    return key.rsplit("@", 1)[-1]
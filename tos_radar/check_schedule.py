@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+from dataclasses import dataclass, replace
+from typing import Any, Sequence
+
+from tos_radar.models import Service, Status
+from tos_radar.state_store import read_service_json, write_service_json
+
+_SCHEDULE_FILE = "schedule.json"
+# Interval factors per outcome: a change or failure pulls the next check closer, a quiet check pushes it out.
+_CHANGED_FACTOR = 0.25
+_FAILED_FACTOR = 0.5
+_UNCHANGED_FACTOR = 1.5
+
+
+@dataclass(frozen=True)
+class SchedulePolicy:
+    min_interval_sec: float
+    max_interval_sec: float
+    default_interval_sec: float
+
+
+@dataclass(frozen=True)
+class DomainSchedule:
+    interval_sec: float
+    next_at: float
+    last_status: str | None = None
+    unchanged_streak: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DomainSchedule:
+        return cls(
+            interval_sec=float(data["interval_sec"]),
+            next_at=float(data["next_at"]),
+            last_status=data.get("last_status"),
+            unchanged_streak=int(data.get("unchanged_streak", 0)),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "interval_sec": round(self.interval_sec, 1),
+            "next_at": round(self.next_at, 1),
+            "last_status": self.last_status,
+            "unchanged_streak": self.unchanged_streak,
+        }
+
+
+def next_interval(current_sec: float, status: Status, policy: SchedulePolicy) -> float:
+    """Interval until the next check after an outcome, clamped to the policy bounds."""
+    if status == Status.CHANGED:
+        value = current_sec * _CHANGED_FACTOR
+    elif status == Status.FAILED:
+        value = current_sec * _FAILED_FACTOR
+    elif status == Status.UNCHANGED:
+        value = current_sec * _UNCHANGED_FACTOR
+    else:
+        value = policy.default_interval_sec
+    return min(policy.max_interval_sec, max(policy.min_interval_sec, value))
+
+
+class CheckSchedule:
+    """Next-check times of one tenant's domains, kept in a min-heap and in `<domain>/schedule.json`.
+
+    Domains seen for the first time are spread over the default interval by a stable hash of the
+    domain, so a fresh URL list does not turn into one burst. Popped domains are in flight until
+    `record` puts them back with an interval adapted to the outcome.
+    """
+
+    def __init__(self, tenant_id: str, policy: SchedulePolicy) -> None:
+        self._tenant_id = tenant_id
+        self._policy = policy
+        self._services: dict[str, Service] = {}
+        self._entries: dict[str, DomainSchedule] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._in_flight: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+    def sync(self, services: Sequence[Service], now: float) -> None:
+        """Follow the current URL list: add new domains, forget removed ones."""
+        wanted = {service.domain: service for service in services}
+        for domain in set(self._services) - set(wanted):
+            del self._services[domain]
+            self._entries.pop(domain, None)
+        for domain, service in wanted.items():
+            known = domain in self._services
+            self._services[domain] = service
+            if known:
+                continue
+            entry = self._load(domain) or DomainSchedule(
+                interval_sec=self._policy.default_interval_sec,
+                next_at=now + self._policy.default_interval_sec * _spread(domain),
+            )
+            self._entries[domain] = entry
+            if domain not in self._in_flight:
+                heapq.heappush(self._heap, (entry.next_at, domain))
+
+    def next_due_at(self) -> float | None:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: int) -> list[Service]:
+        due: list[Service] = []
+        while len(due) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, domain = heapq.heappop(self._heap)
+            self._in_flight.add(domain)
+            due.append(self._services[domain])
+        return due
+
+    def record(self, domain: str, status: Status, now: float, persist: bool = True) -> DomainSchedule | None:
+        """Put a checked domain back with the next interval; `persist=False` leaves the file to the caller."""
+        self._in_flight.discard(domain)
+        current = self._entries.get(domain)
+        if current is None:
+            return None
+        interval = next_interval(current.interval_sec, status, self._policy)
+        entry = DomainSchedule(
+            interval_sec=interval,
+            next_at=now + interval,
+            last_status=status.value,
+            unchanged_streak=current.unchanged_streak + 1 if status == Status.UNCHANGED else 0,
+        )
+        self._entries[domain] = entry
+        if persist:
+            write_schedule(self._tenant_id, domain, entry)
+        heapq.heappush(self._heap, (entry.next_at, domain))
+        return entry
+
+    def _load(self, domain: str) -> DomainSchedule | None:
+        data = read_service_json(self._tenant_id, domain, _SCHEDULE_FILE)
+        if data is None:
+            return None
+        try:
+            entry = DomainSchedule.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            return None
+        # Bounds may have been changed in the settings since the entry was written.
+        interval = min(self._policy.max_interval_sec, max(self._policy.min_interval_sec, entry.interval_sec))
+        return replace(entry, interval_sec=interval)
+
+    def _drop_stale(self) -> None:
+        # Heap items are never removed in place: skip those of removed or rescheduled domains.
+        while self._heap:
+            next_at, domain = self._heap[0]
+            entry = self._entries.get(domain)
+            if entry is not None and entry.next_at == next_at and domain not in self._in_flight:
+                return
+            heapq.heappop(self._heap)
+
+
+def write_schedule(tenant_id: str, domain: str, entry: DomainSchedule) -> None:
+    write_service_json(tenant_id, domain, _SCHEDULE_FILE, entry.to_dict())
+
+
+def _spread(domain: str) -> float:
+    digest = hashlib.sha256(domain.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+from tos_radar.models import ChangeLevel, ErrorCode, RunEntry, SourceType, Status
+
+LOGGER = logging.getLogger(__name__)
+_CHECKPOINT_FILE = "run_checkpoint.jsonl"
+
+
+class RunCheckpoint:
+    """Finished RunEntry results of the current run, appended to `data/<tenant>/run_checkpoint.jsonl`.
+
+    The first line is a header with the mode and start time; every further line is one entry,
+    diff included, so an interrupted run can be resumed and still produce the full report.
+    A later line for the same domain (the end-of-run retry) replaces the earlier one.
+    `entries` reads the file one line at a time, so resuming never holds every diff at once.
+    """
+
+    def __init__(self, tenant_id: str) -> None:
+        self.path = Path("data") / tenant_id / _CHECKPOINT_FILE
+        self._handle: IO[str] | None = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def started_at(self, mode: str) -> datetime | None:
+        """Start time of an interrupted run of `mode`; None if there is none."""
+        if not self.path.exists():
+            return None
+        with self.path.open(encoding="utf-8") as handle:
+            first = handle.readline()
+        try:
+            header = json.loads(first) if first else {}
+        except ValueError:
+            header = {}
+        if header.get("mode") != mode or "started_at" not in header:
+            return None
+        return datetime.fromisoformat(header["started_at"])
+
+    def entries(self) -> Iterator[RunEntry]:
+        """Checkpointed entries in file order; a domain repeats when its retry was checkpointed too."""
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as handle:
+            handle.readline()
+            for line in handle:
+                try:
+                    yield _entry_from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # The process was killed mid-write: only the last line can be torn.
+                    LOGGER.warning("Skipping unreadable checkpoint line in %s", self.path)
+
+    def open(self, mode: str, started_at: datetime, resume: bool) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            torn = not self.path.read_bytes().endswith(b"\n")
+            self._handle = self.path.open("a", encoding="utf-8")
+            if torn:
+                # Terminate a half-written line so the next entry starts on its own line.
+                self._handle.write("\n")
+            return
+        self._handle = self.path.open("w", encoding="utf-8")
+        _write_line(self._handle, {"mode": mode, "started_at": started_at.isoformat(timespec="seconds")})
+
+    def append(self, entry: RunEntry) -> None:
+        if self._handle is not None:
+            _write_line(self._handle, _entry_to_dict(entry))
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def discard(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def _write_line(handle: IO[str], data: dict[str, Any]) -> None:
+    handle.write(json.dumps(data, ensure_ascii=False) + "\n")
+    # Flushed per entry: a killed process keeps everything the OS already has.
+    handle.flush()
+
+
+def _entry_to_dict(entry: RunEntry) -> dict[str, Any]:
+    return {
+        "domain": entry.domain,
+        "url": entry.url,
+        "status": entry.status.value,
+        "source_type": entry.source_type.value if entry.source_type else None,
+        "duration_sec": entry.duration_sec,
+        "text_length": entry.text_length,
+        "change_level": entry.change_level.value if entry.change_level else None,
+        "change_ratio": entry.change_ratio,
+        "error_code": entry.error_code.value if entry.error_code else None,
+        "error": entry.error,
+        "diff": entry.diff,
+        "revalidated": entry.revalidated,
+        "timeout_sec": entry.timeout_sec,
+        "attempt": entry.attempt,
+        "proxy_used": entry.proxy_used,
+    }
+
+
+def _entry_from_dict(data: dict[str, Any]) -> RunEntry:
+    return RunEntry(
+        domain=data["domain"],
+        url=data["url"],
+        status=Status(data["status"]),
+        source_type=SourceType(data["source_type"]) if data.get("source_type") else None,
+        duration_sec=float(data["duration_sec"]),
+        text_length=data.get("text_length"),
+        change_level=ChangeLevel(data["change_level"]) if data.get("change_level") else None,
+        change_ratio=data.get("change_ratio"),
+        error_code=ErrorCode(data["error_code"]) if data.get("error_code") else None,
+        error=data.get("error"),
+        diff=data.get("diff"),
+        revalidated=bool(data.get("revalidated")),
+        timeout_sec=data.get("timeout_sec"),
+        attempt=data.get("attempt"),
+        proxy_used=data.get("proxy_used"),
+    )
@@ -6,7 +6,18 @@ import sys
 from tos_radar.cabinet_api import run_api_server
 from tos_radar.logging_utils import setup_logging
 from tos_radar.mariadb import apply_mariadb_migrations
-from tos_radar.runner import open_last_report, run_init, run_rerun_failed, run_scan
+from tos_radar.run_history import RunHistory, history_lines
+from tos_radar.runner import (
+    open_last_report,
+    run_all_tenants,
+    run_coordinator,
+    run_init,
+    run_rerun_failed,
+    run_scan,
+    run_schedule,
+    run_worker,
+    scan_plan_lines,
+)
 from tos_radar.settings import load_settings
 
 
@@ -14,7 +25,39 @@ def main() -> int:
     parser = argparse.ArgumentParser(prog="tos-radar")
     parser.add_argument(
         "command",
-        choices=["init", "run", "rerun-failed", "report-open", "api-run", "db-migrate"],
+        choices=[
+            "init",
+            "run",
+            "run-all",
+            "coordinate",
+            "worker",
+            "schedule",
+            "rerun-failed",
+            "report-open",
+            "history",
+            "api-run",
+            "db-migrate",
+        ],
+    )
+    parser.add_argument("--domain", help="history: rows of one domain instead of the per-domain summary")
+    parser.add_argument("--days", type=int, default=30, help="history: summary window in days (default 30)")
+    parser.add_argument("--limit", type=int, default=20, help="history: max rows (default 20)")
+    parser.add_argument("--runs", action="store_true", help="history: list recent runs")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="run/run-all/coordinate: continue the interrupted run, skipping domains it already finished",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="run: print the planned scan order and predicted makespan without fetching",
+    )
+    parser.add_argument(
+        "--idle-exit",
+        type=float,
+        default=None,
+        help="worker: stop after this many seconds without jobs (default: run until interrupted)",
     )
     args = parser.parse_args()
 
@@ -23,10 +66,27 @@ def main() -> int:
 
     if args.command == "init":
         return run_init(settings)
+    if args.command == "run" and args.dry_run:
+        for line in scan_plan_lines(settings):
+            print(line)
+        return 0
     if args.command == "run":
-        return run_scan(settings)
+        return run_scan(settings, args.resume)
+    if args.command == "run-all":
+        return run_all_tenants(settings, args.resume)
+    if args.command == "coordinate":
+        return run_coordinator(settings, args.resume)
+    if args.command == "worker":
+        return run_worker(settings, args.idle_exit)
+    if args.command == "schedule":
+        return run_schedule(settings)
     if args.command == "rerun-failed":
         return run_rerun_failed(settings)
+    if args.command == "history":
+        history = RunHistory(settings.run_history_db)
+        for line in history_lines(history, settings.tenant_id, args.domain, args.days, args.limit, args.runs):
+            print(line)
+        return 0
     if args.command == "api-run":
         run_api_server(settings.api_host, settings.api_port)
         return 0
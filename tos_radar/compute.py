@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+@dataclass
+class ComputeStageStats:
+    tasks: int = 0
+    queue_wait_sec: float = 0.0
+    max_queue_wait_sec: float = 0.0
+    cpu_sec: float = 0.0
+
+
+class ComputeStage:
+    """Runs CPU-bound work (diff, classification, PDF parsing) off the event loop.
+
+    `workers > 0` uses a process pool so the GIL does not serialize work with the fetch loop;
+    `workers == 0` falls back to a single thread (useful for debugging and constrained hosts).
+    At most `max_pending` jobs are queued or running; further callers wait on the loop
+    instead of piling documents into the executor. Stats are kept per stage name.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8) -> None:
+        self._workers = max(0, workers)
+        self._slots = asyncio.Semaphore(max(1, max_pending))
+        self._executor: Executor | None = None
+        self.stats: dict[str, ComputeStageStats] = {}
+
+    async def __aenter__(self) -> ComputeStage:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        self.close()
+
+    async def run(self, stage: str, func: Callable[..., T], *args: Any) -> T:
+        submitted = time.time()
+        async with self._slots:
+            executor = self._ensure_executor()
+            loop = asyncio.get_running_loop()
+            try:
+                result, started, cpu_sec = await loop.run_in_executor(executor, _timed_call, func, args)
+            except BrokenProcessPool:
+                # A crashed worker poisons the whole pool; start a fresh one for later jobs.
+                LOGGER.warning("Compute pool broken stage=%s, restarting workers", stage)
+                if self._executor is executor:
+                    self._executor = None
+                    executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        stats = self.stats.setdefault(stage, ComputeStageStats())
+        wait = max(0.0, started - submitted)
+        stats.tasks += 1
+        stats.queue_wait_sec += wait
+        stats.max_queue_wait_sec = max(stats.max_queue_wait_sec, wait)
+        stats.cpu_sec += cpu_sec
+        return result
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self._workers == 0:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tos-compute")
+            else:
+                # spawn: forking a process that already runs asyncio and browser threads is unsafe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+
+def _timed_call(func: Callable[..., T], args: tuple[Any, ...]) -> tuple[T, float, float]:
+    started = time.time()
+    cpu_started = time.process_time() if _in_child() else time.thread_time()
+    result = func(*args)
+    cpu_sec = (time.process_time() if _in_child() else time.thread_time()) - cpu_started
+    return result, started, cpu_sec
+
+
+def _in_child() -> bool:
+    return multiprocessing.parent_process() is not None
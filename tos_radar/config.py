@@ -4,7 +4,9 @@ import logging
 from pathlib import Path
 from urllib.parse import urlparse
 
+from tos_radar.extraction import RULE_KINDS
 from tos_radar.models import Proxy, Service
+from tos_radar.resource_blocking import parse_blocked_resources
 
 LOGGER = logging.getLogger(__name__)
 
@@ -28,20 +30,72 @@ def load_services(path: str) -> list[Service]:
     seen_domains: set[str] = set()
 
     for line in lines:
-        parsed = urlparse(line)
+        url, *options = line.split()
+        parsed = urlparse(url)
         domain = parsed.netloc.lower()
         if not parsed.scheme or not domain:
             msg = f"Invalid URL in {path}: {line}"
             raise ValueError(msg)
+        priority = _parse_priority(options, path, line)
         if domain in seen_domains:
-            LOGGER.warning("Skip duplicate domain=%s url=%s", domain, line)
+            LOGGER.warning("Skip duplicate domain=%s url=%s", domain, url)
             continue
         seen_domains.add(domain)
-        services.append(Service(domain=domain, url=line))
+        services.append(Service(domain=domain, url=url, priority=priority))
 
     return services
 
 
+def _parse_priority(options: list[str], path: str, line: str) -> int:
+    priority = 0
+    for option in options:
+        key, _, value = option.partition("=")
+        if key != "priority" or not value.lstrip("-").isdigit():
+            msg = f"Invalid URL option in {path}: {line}"
+            raise ValueError(msg)
+        priority = int(value)
+    return priority
+
+
+def load_tenant_services(tenants_dir: str) -> dict[str, list[Service]]:
+    """URL lists of all tenants: `<tenants_dir>/<tenant_id>.txt`, same format as `TOS_URLS_FILE`."""
+    root = Path(tenants_dir)
+    if not root.is_dir():
+        return {}
+    tenants: dict[str, list[Service]] = {}
+    for path in sorted(root.glob("*.txt")):
+        services = load_services(str(path))
+        if services:
+            tenants[path.stem] = services
+    return tenants
+
+
+def load_resource_allowlist(path: str) -> dict[str, frozenset[str]]:
+    """`<domain> [token,...]` per line: resources the domain needs; a bare domain disables blocking."""
+    allowlist: dict[str, frozenset[str]] = {}
+    for line in _read_non_empty_lines(path):
+        domain, *tokens = line.split(maxsplit=1)
+        try:
+            allowlist[domain.lower()] = parse_blocked_resources(tokens[0] if tokens else "")
+        except ValueError as exc:
+            msg = f"Invalid allowlist entry in {path}: {line} ({exc})"
+            raise ValueError(msg) from exc
+    return allowlist
+
+
+def load_extraction_overrides(path: str) -> dict[str, tuple[tuple[str, str], ...]]:
+    """`<domain> noise|drop|keep <text>` per line: per-domain changes to the extraction line filters."""
+    overrides: dict[str, list[tuple[str, str]]] = {}
+    for line in _read_non_empty_lines(path):
+        parts = line.split(maxsplit=2)
+        if len(parts) != 3 or parts[1].lower() not in RULE_KINDS:
+            msg = f"Invalid extraction rule in {path}: {line}"
+            raise ValueError(msg)
+        domain, kind, token = parts
+        overrides.setdefault(domain.lower(), []).append((kind.lower(), token.lower()))
+    return {domain: tuple(rules) for domain, rules in overrides.items()}
+
+
 def load_proxies(path: str) -> list[Proxy]:
     lines = _read_non_empty_lines(path)
     proxies: list[Proxy] = []
@@ -1,43 +1,120 @@
 from __future__ import annotations
 
-from difflib import HtmlDiff
-from itertools import islice
+import hashlib
+import re
 
 from tos_radar.normalize import normalize_for_compare
+from tos_radar.sequence_diff import intern_tokens, matching_blocks
+
+_WORD_RE = re.compile(r"\w+|\s+|[^\w\s]+")
+# A removed and an added line are shown as one edited line when at least this share matches.
+_MIN_PAIR_SIMILARITY = 0.5
+_PAIR_WINDOW = 8
 
 
 def is_changed(previous: str, current: str) -> bool:
     return normalize_for_compare(previous) != normalize_for_compare(current)
 
 
-def build_diff_html(previous: str, current: str) -> str:
-    prev_lines = _prepare_lines(previous)
-    curr_lines = _prepare_lines(current)
-    return HtmlDiff(wrapcolumn=100).make_table(
-        prev_lines,
-        curr_lines,
-        fromdesc="Previous",
-        todesc="Current",
-        context=True,
-        numlines=2,
-    )
-
-
-def _prepare_lines(text: str, chunk_size: int = 800, max_lines: int = 4000) -> list[str]:
-    raw_lines = text.splitlines() or [text]
-    out: list[str] = []
-    for line in raw_lines:
-        if not line:
-            out.append("")
-            continue
-        if len(line) <= chunk_size:
-            out.append(line)
-            continue
-        # Protect HtmlDiff from deep recursion on very long tokens/lines.
-        for i in range(0, len(line), chunk_size):
-            out.append(line[i : i + chunk_size])
-    if len(out) > max_lines:
-        truncated = list(islice(out, max_lines))
-        truncated.append("[... diff truncated ...]")
-        return truncated
-    return out
+def compare_digest(text: str) -> str:
+    """Digest of the compare-normalized text: equal digests mean `is_changed` is False."""
+    return hashlib.sha256(normalize_for_compare(text).encode("utf-8")).hexdigest()
+
+
+def build_diff(previous: str, current: str, context: int = 2) -> dict[str, object]:
+    """Compact line diff with word-level highlighting for changed lines, rendered by report.html.
+
+    Shape: {"added", "removed", "changed", "hunks": [{"a", "b", "lines"}]}, where "a"/"b" are
+    1-based start lines and each line is [" ", text], ["-", text], ["+", text] or
+    ["~", [[op, text], ...]] with op in "=", "-", "+". Linear memory, no truncation.
+    """
+    prev_lines = previous.splitlines()
+    curr_lines = current.splitlines()
+    prev_ids, curr_ids = intern_tokens(prev_lines, curr_lines)
+    rows: list[tuple[int, int, list[object]]] = []
+    counts = {"added": 0, "removed": 0, "changed": 0}
+
+    i = j = 0
+    for bi, bj, size in [*matching_blocks(prev_ids, curr_ids), (len(prev_lines), len(curr_lines), 0)]:
+        rows.extend(_replace_rows(prev_lines, i, bi, curr_lines, j, bj, counts))
+        rows.extend((bi + k, bj + k, [" ", prev_lines[bi + k]]) for k in range(size))
+        i, j = bi + size, bj + size
+    return {**counts, "hunks": _group_hunks(rows, context)}
+
+
+def _replace_rows(
+    prev_lines: list[str],
+    alo: int,
+    ahi: int,
+    curr_lines: list[str],
+    blo: int,
+    bhi: int,
+    counts: dict[str, int],
+) -> list[tuple[int, int, list[object]]]:
+    rows: list[tuple[int, int, list[object]]] = []
+    j = blo
+    for i in range(alo, ahi):
+        # Pair the removed line with a nearby similar added line, if any, to show a word diff.
+        for candidate in range(j, min(bhi, j + _PAIR_WINDOW)):
+            segments = _word_segments(prev_lines[i], curr_lines[candidate])
+            if segments is None:
+                continue
+            for k in range(j, candidate):
+                rows.append((i, k, ["+", curr_lines[k]]))
+                counts["added"] += 1
+            rows.append((i, candidate, ["~", segments]))
+            counts["changed"] += 1
+            j = candidate + 1
+            break
+        else:
+            rows.append((i, j, ["-", prev_lines[i]]))
+            counts["removed"] += 1
+    for k in range(j, bhi):
+        rows.append((ahi, k, ["+", curr_lines[k]]))
+        counts["added"] += 1
+    return rows
+
+
+def _word_segments(old: str, new: str) -> list[list[str]] | None:
+    old_words = _WORD_RE.findall(old)
+    new_words = _WORD_RE.findall(new)
+    old_ids, new_ids = intern_tokens(old_words, new_words)
+    blocks = matching_blocks(old_ids, new_ids)
+    same = sum(len("".join(old_words[i : i + size])) for i, _, size in blocks)
+    if 2 * same < _MIN_PAIR_SIMILARITY * (len(old) + len(new)):
+        return None
+
+    segments: list[list[str]] = []
+    i = j = 0
+    for bi, bj, size in [*blocks, (len(old_words), len(new_words), 0)]:
+        _append_segment(segments, "-", "".join(old_words[i:bi]))
+        _append_segment(segments, "+", "".join(new_words[j:bj]))
+        _append_segment(segments, "=", "".join(old_words[bi : bi + size]))
+        i, j = bi + size, bj + size
+    return segments
+
+
+def _append_segment(segments: list[list[str]], op: str, text: str) -> None:
+    if not text:
+        return
+    if segments and segments[-1][0] == op:
+        segments[-1][1] += text
+    else:
+        segments.append([op, text])
+
+
+def _group_hunks(rows: list[tuple[int, int, list[object]]], context: int) -> list[dict[str, object]]:
+    changed = [idx for idx, (_, _, line) in enumerate(rows) if line[0] != " "]
+    hunks: list[dict[str, object]] = []
+    idx = 0
+    while idx < len(changed):
+        start = max(0, changed[idx] - context)
+        end = changed[idx] + context + 1
+        idx += 1
+        while idx < len(changed) and changed[idx] - context <= end:
+            end = changed[idx] + context + 1
+            idx += 1
+        end = min(end, len(rows))
+        first_a, first_b, _ = rows[start]
+        hunks.append({"a": first_a + 1, "b": first_b + 1, "lines": [line for _, _, line in rows[start:end]]})
+    return hunks
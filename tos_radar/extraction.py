@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Iterable
+
+# Shared by the Python tree walk below and BROWSER_EXTRACT_JS, which is generated from them.
+DROP_TAGS = frozenset(
+    {
+        "script", "style", "noscript", "svg", "nav", "footer", "header", "aside",
+        "form", "button", "input", "select", "textarea", "a", "iframe",
+    }
+)
+DROP_ROLES = frozenset({"navigation", "banner", "contentinfo"})
+DROP_CLASSES = frozenset(
+    {
+        "cookie", "cookies", "consent", "banner", "modal", "popup",
+        "newsletter", "subscribe", "social", "breadcrumbs", "breadcrumb",
+    }
+)
+DROP_IDS = frozenset({"cookie"})
+CANDIDATE_TAGS = frozenset({"main", "article"})
+CANDIDATE_ROLES = frozenset({"main"})
+CANDIDATE_CLASSES = frozenset({"content", "main-content", "terms", "tos", "legal"})
+MIN_LINE_LENGTH = 25
+
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+)
+_BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+        "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+        "header", "hr", "html", "li", "main", "nav", "ol", "p", "pre", "section", "summary",
+        "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+    }
+)
+# HTML5 implied end tags: a start tag in the key closes the innermost-scope open element of the
+# first set, searching no further up than the second set. Without this, valid pages that leave
+# out </p> or </li> nest every paragraph inside the previous one.
+_P_SCOPE = frozenset({"html", "body", "table", "td", "th", "caption", "button", "template", "object"})
+_P_CLOSERS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "details", "dd", "div", "dl", "dt", "fieldset",
+        "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+        "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table", "ul",
+    }
+)
+_TABLE_SECTIONS = frozenset({"thead", "tbody", "tfoot"})
+_IMPLIED_END: dict[str, tuple[frozenset[str], frozenset[str]]] = {
+    "li": (frozenset({"li"}), _P_SCOPE | {"ul", "ol"}),
+    "dt": (frozenset({"dt", "dd"}), _P_SCOPE | {"dl"}),
+    "dd": (frozenset({"dt", "dd"}), _P_SCOPE | {"dl"}),
+    "tr": (frozenset({"tr"}), frozenset({"table"}) | _TABLE_SECTIONS),
+    "td": (frozenset({"td", "th"}), frozenset({"table", "tr"})),
+    "th": (frozenset({"td", "th"}), frozenset({"table", "tr"})),
+    "thead": (frozenset({"tr"}) | _TABLE_SECTIONS, frozenset({"table"})),
+    "tbody": (frozenset({"tr"}) | _TABLE_SECTIONS, frozenset({"table"})),
+    "tfoot": (frozenset({"tr"}) | _TABLE_SECTIONS, frozenset({"table"})),
+    "option": (frozenset({"option"}), frozenset({"select", "datalist"})),
+    "optgroup": (frozenset({"option", "optgroup"}), frozenset({"select"})),
+}
+_URL_TOKEN_RE = re.compile(r"https?://", re.IGNORECASE)
+_NAV_LIKE_PATTERN = "(home|about|contact|pricing|blog|careers|help|support)"
+_NAV_LIKE_RE = re.compile(_NAV_LIKE_PATTERN, re.IGNORECASE)
+# Lines shorter than this that contain a noise token are page chrome, not document text.
+NOISE_MAX_LINE = 160
+_BOT_MARKERS = (
+    "captcha",
+    "cloudflare",
+    "ddos-guard",
+    "verify you are human",
+    "if you are not a bot",
+    "are you human",
+    "security check",
+    "access denied",
+    "подтвердите, что вы не робот",
+    "проверка безопасности",
+    "необычный трафик",
+)
+_BOT_MARKERS_RE = re.compile("|".join(re.escape(marker) for marker in _BOT_MARKERS))
+_WS_RE = re.compile(r"\s+")
+_CHARSET_RE = re.compile(r"charset=[\"']?([A-Za-z0-9_\-]+)", re.IGNORECASE)
+_JS_ONLY_MARKERS = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    "включите javascript",
+    "id=\"__next\"",
+    "id=\"root\"></div>",
+    "id=\"app\"></div>",
+)
+
+
+@dataclass(frozen=True)
+class ExtractionRules:
+    """Line filters applied to extracted text (browser text, HTML main text and PDF text alike).
+
+    `noise` maps a lowercase token to the longest line, in characters, that is still dropped
+    when it contains the token; None drops the line at any length.
+    """
+
+    noise: tuple[tuple[str, int | None], ...]
+
+    def with_overrides(self, overrides: Iterable[tuple[str, str]]) -> ExtractionRules:
+        """Apply `(kind, token)` pairs: `noise` (short lines), `drop` (any line), `keep` (remove a token)."""
+        noise = dict(self.noise)
+        for kind, token in overrides:
+            token = token.lower()
+            if kind == "keep":
+                noise.pop(token, None)
+            elif kind == "noise":
+                noise[token] = NOISE_MAX_LINE
+            elif kind == "drop":
+                noise[token] = None
+            else:
+                msg = f"Unknown extraction rule kind: {kind}"
+                raise ValueError(msg)
+        return ExtractionRules(noise=tuple(noise.items()))
+
+
+DEFAULT_RULES = ExtractionRules(
+    noise=(
+        ("cookie", NOISE_MAX_LINE),
+        ("privacy center", NOISE_MAX_LINE),
+        ("all rights reserved", NOISE_MAX_LINE),
+        ("follow us", NOISE_MAX_LINE),
+        ("subscribe", NOISE_MAX_LINE),
+        ("newsletter", NOISE_MAX_LINE),
+        ("accept all", NOISE_MAX_LINE),
+        ("reject all", NOISE_MAX_LINE),
+        ("help and feedback", NOISE_MAX_LINE),
+        ("помощь и обратная связь", 220),
+        ("лицензия банка россии", None),
+        ("сохраняем «куки»", None),
+        ("сохраняем \"куки\"", None),
+    )
+)
+RULE_KINDS = frozenset({"noise", "drop", "keep"})
+
+
+@dataclass
+class _Node:
+    tag: str
+    attrs: dict[str, str]
+    children: list[_Node | str] = field(default_factory=list)
+
+    @property
+    def classes(self) -> set[str]:
+        return set(self.attrs.get("class", "").split())
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = _Node(tag="#root", attrs={})
+        self._stack: list[_Node] = [self.root]
+        self.title = ""
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in _P_CLOSERS:
+            self._close_implied(frozenset({"p"}), _P_SCOPE)
+        if tag in _IMPLIED_END:
+            self._close_implied(*_IMPLIED_END[tag])
+        node = _Node(tag=tag, attrs={name: value or "" for name, value in attrs})
+        self._stack[-1].children.append(node)
+        if tag == "title":
+            self._in_title = True
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._stack[-1].children.append(_Node(tag=tag, attrs={name: value or "" for name, value in attrs}))
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        # Lenient recovery for unclosed tags: pop up to the nearest matching open element.
+        for idx in range(len(self._stack) - 1, 0, -1):
+            if self._stack[idx].tag == tag:
+                del self._stack[idx:]
+                return
+
+    def _close_implied(self, tags: frozenset[str], scope: frozenset[str]) -> None:
+        # The outermost match within the scope, so a cell also closes the inline tags still open in it.
+        match = None
+        for idx in range(len(self._stack) - 1, 0, -1):
+            open_tag = self._stack[idx].tag
+            if open_tag in tags:
+                match = idx
+            elif open_tag in scope:
+                break
+        if match is not None:
+            del self._stack[match:]
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        self._stack[-1].children.append(data)
+
+
+@dataclass(frozen=True)
+class HtmlDocument:
+    title: str
+    body_text: str
+    main_text: str
+
+
+def clean_extracted_text(text: str, rules: ExtractionRules = DEFAULT_RULES) -> str:
+    """Whitespace-collapsed lines of `text` without page chrome (cookie bars, copyright, link lists)."""
+    matchers = _compile_rules(rules)
+    out: list[str] = []
+    for raw in text.splitlines():
+        line = _WS_RE.sub(" ", raw).strip()
+        if len(line) < 3:
+            continue
+        lower = line.lower()
+        if lower.startswith("©"):
+            continue
+        if any((max_len is None or len(line) < max_len) and regex.search(lower) for max_len, regex in matchers):
+            continue
+        words = line.split()
+        if len(words) <= 8 and _URL_TOKEN_RE.search(line):
+            continue
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+@lru_cache(maxsize=64)
+def rules_for(overrides: tuple[tuple[str, str], ...]) -> ExtractionRules:
+    return DEFAULT_RULES.with_overrides(overrides) if overrides else DEFAULT_RULES
+
+
+def looks_like_bot_block(sample: str) -> bool:
+    """`sample` is lowercase page title and leading body text."""
+    return _BOT_MARKERS_RE.search(sample) is not None
+
+
+@lru_cache(maxsize=64)
+def _compile_rules(rules: ExtractionRules) -> tuple[tuple[int | None, re.Pattern[str]], ...]:
+    # One alternation per length limit: a line is scanned once per limit instead of once per token.
+    by_limit: dict[int | None, list[str]] = {}
+    for token, max_len in rules.noise:
+        by_limit.setdefault(max_len, []).append(token)
+    return tuple(
+        (max_len, re.compile("|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True))))
+        for max_len, tokens in by_limit.items()
+    )
+
+
+def decode_html(body: bytes, content_type: str) -> str:
+    """Body text in the charset of the Content-Type header or a leading meta tag, UTF-8 otherwise."""
+    match = _CHARSET_RE.search(content_type) or _CHARSET_RE.search(body[:2048].decode("ascii", errors="ignore"))
+    charset = match.group(1) if match else "utf-8"
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def parse_html_document(html: str) -> HtmlDocument:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    body = _find_first(builder.root, lambda node: node.tag == "body") or builder.root
+    return HtmlDocument(
+        title=_WS_RE.sub(" ", builder.title).strip(),
+        body_text=_inner_text(body, drop=False),
+        main_text=_extract_main_text(body),
+    )
+
+
+def extract_text_from_html(html: str) -> str:
+    return parse_html_document(html).main_text
+
+
+def looks_like_js_only_page(html: str, extracted_text: str, min_text_length: int) -> bool:
+    if len(extracted_text) >= min_text_length:
+        return False
+    lower = html.lower()
+    return any(marker in lower for marker in _JS_ONLY_MARKERS)
+
+
+def _extract_main_text(body: _Node) -> str:
+    candidates: list[_Node] = []
+    _collect(body, _is_candidate, candidates)
+    blocks = candidates or [body]
+
+    best_text = ""
+    for block in blocks:
+        lines = [line.strip() for line in _inner_text(block, drop=True).split("\n")]
+        scored = [line for line in lines if line and _keep_line(line)]
+        candidate_text = "\n".join(scored)
+        if len(candidate_text) > len(best_text):
+            best_text = candidate_text
+    return best_text
+
+
+def _keep_line(line: str) -> bool:
+    if len(line) < MIN_LINE_LENGTH:
+        return False
+    words = line.split()
+    url_tokens = sum(1 for word in words if _URL_TOKEN_RE.search(word))
+    nav_like = _NAV_LIKE_RE.search(line) is not None
+    return not (url_tokens > 0 and len(words) <= 8) and not nav_like
+
+
+def _is_dropped(node: _Node) -> bool:
+    if node.tag in DROP_TAGS:
+        return True
+    if node.attrs.get("role") in DROP_ROLES:
+        return True
+    if node.attrs.get("id") in DROP_IDS:
+        return True
+    return not node.classes.isdisjoint(DROP_CLASSES)
+
+
+def _is_candidate(node: _Node) -> bool:
+    if node.tag in CANDIDATE_TAGS:
+        return True
+    if node.attrs.get("role") in CANDIDATE_ROLES:
+        return True
+    return not node.classes.isdisjoint(CANDIDATE_CLASSES)
+
+
+# The tree walks below use explicit stacks: a deeply nested page must not hit the recursion limit.
+
+
+def _collect(node: _Node, predicate, out: list[_Node]) -> None:  # type: ignore[no-untyped-def]
+    # Mirrors querySelectorAll on a clone where dropped subtrees were already removed.
+    pending = list(reversed(node.children))
+    while pending:
+        child = pending.pop()
+        if isinstance(child, str) or _is_dropped(child):
+            continue
+        if predicate(child):
+            out.append(child)
+        pending.extend(reversed(child.children))
+
+
+def _find_first(node: _Node, predicate) -> _Node | None:  # type: ignore[no-untyped-def]
+    pending = list(reversed(node.children))
+    while pending:
+        child = pending.pop()
+        if isinstance(child, str):
+            continue
+        if predicate(child):
+            return child
+        pending.extend(reversed(child.children))
+    return None
+
+
+def _inner_text(node: _Node, drop: bool) -> str:
+    parts: list[str] = []
+    _render_text(node, drop, parts)
+    lines = [_WS_RE.sub(" ", line).strip() for line in "".join(parts).split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def _render_text(node: _Node, drop: bool, parts: list[str]) -> None:
+    # None marks the end of a block element.
+    pending: list[_Node | str | None] = list(reversed(node.children))
+    while pending:
+        child = pending.pop()
+        if child is None:
+            parts.append("\n")
+            continue
+        if isinstance(child, str):
+            parts.append(child.replace("\n", " "))
+            continue
+        if child.tag in ("script", "style", "template") or (drop and _is_dropped(child)):
+            continue
+        if child.tag == "br":
+            parts.append("\n")
+            continue
+        if child.tag in _BLOCK_TAGS:
+            parts.append("\n")
+            pending.append(None)
+        pending.extend(reversed(child.children))
+
+
+def _browser_extract_js() -> str:
+    drop = sorted(DROP_TAGS) + [f'[role="{role}"]' for role in sorted(DROP_ROLES)]
+    drop += [f".{name}" for name in sorted(DROP_CLASSES)] + [f"#{name}" for name in sorted(DROP_IDS)]
+    candidates = sorted(CANDIDATE_TAGS) + [f'[role="{role}"]' for role in sorted(CANDIDATE_ROLES)]
+    candidates += [f".{name}" for name in sorted(CANDIDATE_CLASSES)]
+    return """() => {
+  const body = document.body;
+  if (!body) return '';
+  const clone = body.cloneNode(true);
+  clone.querySelectorAll(%s).forEach((node) => node.remove());
+  const candidates = Array.from(clone.querySelectorAll(%s));
+  const blocks = candidates.length > 0 ? candidates : [clone];
+  let bestText = '';
+  for (const block of blocks) {
+    const lines = (block.innerText || '').split('\\n').map((x) => x.trim()).filter(Boolean);
+    const scored = lines.filter((line) => {
+      if (line.length < %d) return false;
+      const words = line.split(/\\s+/).filter(Boolean);
+      const urlTokens = words.filter((w) => /https?:\\/\\//i.test(w)).length;
+      const navLike = /%s/i.test(line);
+      return !(urlTokens > 0 && words.length <= 8) && !navLike;
+    });
+    const candidateText = scored.join('\\n');
+    if (candidateText.length > bestText.length) bestText = candidateText;
+  }
+  return bestText;
+}""" % (
+        json.dumps(",".join(drop)),
+        json.dumps(",".join(candidates)),
+        MIN_LINE_LENGTH,
+        _NAV_LIKE_PATTERN,
+    )
+
+
+# Same selectors and line scoring as `parse_html_document`, evaluated in the browser page.
+BROWSER_EXTRACT_JS = _browser_extract_js()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Mapping
+
+from tos_radar.models import FetchResult
+
+
+@dataclass
+class FanoutStats:
+    fetches: int = 0
+    saved: int = 0
+
+
+class FetchFanout:
+    """One fetch per URL shared by every tenant that tracks it (multi-tenant runs).
+
+    The first tenant to ask for a URL starts the fetch; the others await the same task and get
+    the same FetchResult. A result is dropped once all subscribers have asked for it, so memory
+    does not grow with the run. A failed fetch is not reused: the next subscriber tries again.
+    """
+
+    def __init__(self, subscribers: Mapping[str, int]) -> None:
+        self._subscribers = dict(subscribers)
+        self._remaining = dict(subscribers)
+        self._tasks: dict[str, asyncio.Task[FetchResult]] = {}
+        self.stats = FanoutStats()
+
+    def is_shared(self, url: str) -> bool:
+        return self._subscribers.get(url, 0) > 1
+
+    async def fetch(self, url: str, fetch: Callable[[], Awaitable[FetchResult]]) -> FetchResult:
+        task = self._tasks.get(url)
+        if task is None or _failed(task):
+            task = asyncio.ensure_future(fetch())
+            self.stats.fetches += 1
+        else:
+            self.stats.saved += 1
+        remaining = self._remaining.get(url, 1) - 1
+        if remaining > 0:
+            self._remaining[url] = remaining
+            self._tasks[url] = task
+        else:
+            self._remaining.pop(url, None)
+            self._tasks.pop(url, None)
+        # Shielded: one subscriber being cancelled must not cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+    def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+
+def _failed(task: asyncio.Task[FetchResult]) -> bool:
+    if not task.done():
+        return False
+    return task.cancelled() or task.exception() is not None or not task.result().ok
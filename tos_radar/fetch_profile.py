@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from typing import Any
+
+from tos_radar.models import FetchTier
+from tos_radar.state_store import read_service_json, write_service_json
+
+_PROFILE_FILE = "fetch_profile.json"
+_MAX_LATENCY_SAMPLES = 50
+_MAX_READY_SAMPLES = 20
+# After a bot-detection page the domain gets human-like delays for this long.
+HUMANIZE_SEC = 30 * 86400
+
+
+@dataclass(frozen=True)
+class FetchProfile:
+    """What we learned about fetching a domain on previous runs."""
+
+    tier: FetchTier | None = None
+    # Seconds per successful attempt, newest last; timeouts are kept as censored samples.
+    latencies: tuple[float, ...] = ()
+    # Seconds the browser waited for the page text to settle, newest last.
+    ready_waits: tuple[float, ...] = ()
+    # Unix time until which browser fetches add human-like delays (set on bot detection).
+    humanize_until: float | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FetchProfile:
+        tier = data.get("tier")
+        humanize_until = data.get("humanize_until")
+        return cls(
+            tier=FetchTier(tier) if tier in FetchTier._value2member_map_ else None,
+            latencies=_samples(data.get("latencies"))[-_MAX_LATENCY_SAMPLES:],
+            ready_waits=_samples(data.get("ready_waits"))[-_MAX_READY_SAMPLES:],
+            humanize_until=float(humanize_until) if isinstance(humanize_until, (int, float)) else None,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "tier": self.tier.value if self.tier else None,
+            "latencies": [round(value, 3) for value in self.latencies],
+            "ready_waits": [round(value, 3) for value in self.ready_waits],
+            "humanize_until": self.humanize_until,
+        }
+
+    def with_latency(self, seconds: float) -> FetchProfile:
+        return replace(self, latencies=(*self.latencies, seconds)[-_MAX_LATENCY_SAMPLES:])
+
+    def with_ready_wait(self, seconds: float) -> FetchProfile:
+        return replace(self, ready_waits=(*self.ready_waits, seconds)[-_MAX_READY_SAMPLES:])
+
+    def humanized(self, now: float) -> FetchProfile:
+        return replace(self, humanize_until=round(now + HUMANIZE_SEC))
+
+    def needs_humanize(self, now: float) -> bool:
+        return self.humanize_until is not None and now < self.humanize_until
+
+
+@dataclass(frozen=True)
+class AdaptiveTimeout:
+    attempt_sec: int
+    p99_sec: float | None
+    samples: int
+
+
+def latency_percentile(samples: tuple[float, ...], q: float) -> float | None:
+    """Nearest-rank percentile, q in (0, 1]."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def derive_attempt_timeout(
+    profile: FetchProfile,
+    default_sec: int,
+    min_sec: int,
+    max_sec: int,
+    factor: float,
+    min_samples: int = 5,
+) -> AdaptiveTimeout:
+    """p99 x factor clamped to [min_sec, max_sec]; the default until enough history exists."""
+    p99 = latency_percentile(profile.latencies, 0.99)
+    if p99 is None or len(profile.latencies) < min_samples:
+        return AdaptiveTimeout(attempt_sec=default_sec, p99_sec=p99, samples=len(profile.latencies))
+    attempt_sec = min(max_sec, max(min_sec, math.ceil(p99 * factor)))
+    return AdaptiveTimeout(attempt_sec=attempt_sec, p99_sec=p99, samples=len(profile.latencies))
+
+
+def derive_ready_max_ms(
+    profile: FetchProfile,
+    default_ms: int = 12000,
+    min_ms: int = 4000,
+    factor: float = 3.0,
+    min_samples: int = 3,
+) -> int:
+    """Longest wait for the page text to settle: p90 of past waits x factor, within [min_ms, default_ms]."""
+    p90 = latency_percentile(profile.ready_waits, 0.9)
+    if p90 is None or len(profile.ready_waits) < min_samples:
+        return default_ms
+    return min(default_ms, max(min_ms, math.ceil(p90 * factor * 1000)))
+
+
+def read_fetch_profile(tenant_id: str, domain: str) -> FetchProfile:
+    data = read_service_json(tenant_id, domain, _PROFILE_FILE)
+    if data is None:
+        return FetchProfile()
+    return FetchProfile.from_dict(data)
+
+
+def write_fetch_profile(tenant_id: str, domain: str, profile: FetchProfile) -> None:
+    write_service_json(tenant_id, domain, _PROFILE_FILE, profile.to_dict())
+
+
+def _samples(values: Any) -> tuple[float, ...]:
+    return tuple(float(value) for value in values or () if isinstance(value, (int, float)))
@@ -1,19 +1,50 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import http.client
 import logging
 import math
 import random
-import re
-from io import BytesIO
-from typing import TYPE_CHECKING, Sequence
-from urllib.error import URLError
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from typing import IO, TYPE_CHECKING, Awaitable, Callable, Sequence
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
 from urllib.request import ProxyHandler, Request, build_opener
 
-from tos_radar.models import ErrorCode, FetchResult, Proxy, Service, SourceType
+from tos_radar.browser_pool import BrowserPool
+from tos_radar.compute import ComputeStage
+from tos_radar.proxy_health import ProxyHealthRegistry
+from tos_radar.rate_limit import RequestScheduler
+from tos_radar.resource_blocking import should_block
+from tos_radar.text_cache import TextCache
+from tos_radar.extraction import (
+    BROWSER_EXTRACT_JS,
+    DEFAULT_RULES,
+    ExtractionRules,
+    clean_extracted_text,
+    decode_html,
+    looks_like_bot_block,
+    looks_like_js_only_page,
+    parse_html_document,
+    rules_for,
+)
+from tos_radar.pdf_text import DEFAULT_PDF_MAX_BYTES, extract_pdf_text, spooled_pdf
+from tos_radar.models import (
+    ErrorCode,
+    FetchMode,
+    FetchResult,
+    FetchTier,
+    HttpValidators,
+    Proxy,
+    Service,
+    SourceType,
+)
 
 if TYPE_CHECKING:
-    from playwright.async_api import Page
+    from playwright.async_api import BrowserContext, Page, Route
 
 LOGGER = logging.getLogger(__name__)
 REALISTIC_USER_AGENT = (
@@ -21,6 +52,45 @@ REALISTIC_USER_AGENT = (
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/133.0.0.0 Safari/537.36"
 )
+_HTML_ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+_PDF_ACCEPT = "application/pdf,text/html;q=0.9,*/*;q=0.8"
+_READ_CHUNK_BYTES = 256 * 1024
+_HTTP_TIER_TIMEOUT_SEC = 20
+# Less than this left of the attempt after the HTTP tier is not worth starting a browser page for.
+_MIN_BROWSER_TIMEOUT_SEC = 5
+# Mean of the fixed sleeps every browser fetch used to pay before the readiness check.
+FIXED_SETTLE_SEC = 2.475
+# The page text counts as settled after this long without growth.
+_READY_QUIET_MS = 500
+# Resolves once body text is at least `minChars` long and has not changed for `quietMs`, or after `maxMs`.
+# Shorter text (bot walls, error pages) must stay unchanged four times as long.
+_WAIT_FOR_TEXT_JS = """({minChars, quietMs, maxMs}) => new Promise((resolve) => {
+  const started = performance.now();
+  let lastChange = started;
+  let lastLength = -1;
+  const observer = new MutationObserver((mutations) => {
+    if (mutations.some((m) => m.type === 'characterData' || m.addedNodes.length > 0)) {
+      lastChange = performance.now();
+    }
+  });
+  observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+  const check = () => {
+    const now = performance.now();
+    const length = document.body ? document.body.textContent.length : 0;
+    if (length !== lastLength) {
+      lastLength = length;
+      lastChange = now;
+    }
+    const settled = now - lastChange >= (length >= minChars ? quietMs : quietMs * 4);
+    if (settled || now - started >= maxMs) {
+      observer.disconnect();
+      resolve({settled, length});
+      return;
+    }
+    setTimeout(check, 100);
+  };
+  check();
+})"""
 
 
 class FetchError(RuntimeError):
@@ -28,6 +98,55 @@ class FetchError(RuntimeError):
         super().__init__(message)
         self.code = code
 
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        # Keeps the error code when the exception crosses a process-pool boundary.
+        return (FetchError, (self.code, str(self)))
+
+
+@dataclass(frozen=True)
+class FetchOptions:
+    fetch_mode: FetchMode = FetchMode.BROWSER
+    tier_hint: FetchTier | None = None
+    min_text_length: int = 0
+    validators: HttpValidators | None = None
+    # See tos_radar.resource_blocking; empty loads every resource of the page.
+    blocked_resources: frozenset[str] = frozenset()
+    # Human-like delays before reading the page; only for domains with a bot-detection history.
+    humanize: bool = False
+    # Longest wait for the page text to settle (see tos_radar.fetch_profile.derive_ready_max_ms).
+    ready_max_ms: int = 12000
+    # Per-domain (kind, text) rule overrides, see tos_radar.extraction.ExtractionRules.
+    extraction_overrides: tuple[tuple[str, str], ...] = ()
+    # Larger PDFs fail with PDF_DOWNLOAD instead of being downloaded and parsed.
+    pdf_max_bytes: int = DEFAULT_PDF_MAX_BYTES
+
+
+@dataclass
+class _PageStats:
+    transferred_bytes: int = 0
+    blocked_requests: int = 0
+    ready_wait_sec: float | None = None
+
+
+@dataclass(frozen=True)
+class _HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    # Set when the body was streamed to a file instead of `body`.
+    body_sha256: str | None = None
+
+    def sha256(self) -> str:
+        return self.body_sha256 or hashlib.sha256(self.body).hexdigest()
+
+
+@dataclass(frozen=True)
+class _DirectFetch:
+    # text is None when the server confirmed the stored document is still current.
+    text: str | None
+    source_type: SourceType
+    validators: HttpValidators
+
 
 async def fetch_with_retries(
     service: Service,
@@ -37,19 +156,66 @@ async def fetch_with_retries(
     retry_backoff_max_sec: float,
     retry_jitter_sec: float,
     proxies: Sequence[Proxy],
+    browser_pool: BrowserPool | None = None,
+    options: FetchOptions | None = None,
+    compute_stage: ComputeStage | None = None,
+    scheduler: RequestScheduler | None = None,
+    proxy_health: ProxyHealthRegistry | None = None,
+    text_cache: TextCache | None = None,
 ) -> FetchResult:
-    attempts = build_attempts(proxies, retry_proxy_count)
+    options = options or FetchOptions()
+    if browser_pool is None:
+        # Standalone callers still share one driver across all attempts of this fetch.
+        async with BrowserPool(max_browsers=1) as own_pool:
+            return await fetch_with_retries(
+                service=service,
+                timeout_sec=timeout_sec,
+                retry_proxy_count=retry_proxy_count,
+                retry_backoff_base_sec=retry_backoff_base_sec,
+                retry_backoff_max_sec=retry_backoff_max_sec,
+                retry_jitter_sec=retry_jitter_sec,
+                proxies=proxies,
+                browser_pool=own_pool,
+                options=options,
+                compute_stage=compute_stage,
+                scheduler=scheduler,
+                proxy_health=proxy_health,
+                text_cache=text_cache,
+            )
+
+    start = scheduler.next_proxy_start(len(proxies), retry_proxy_count) if scheduler is not None else 0
+    if proxy_health is not None:
+        # Quarantined proxies are dropped; healthy ones are ordered by score (and domain affinity).
+        attempts = build_attempts(proxy_health.rank(proxies, service.domain, start), retry_proxy_count)
+    else:
+        attempts = build_attempts(proxies, retry_proxy_count, start)
     total_attempts = len(attempts)
     last_error = "unknown error"
     last_error_code = ErrorCode.UNKNOWN
+    bot_detected = False
 
     for idx, proxy in enumerate(attempts, start=1):
+        if scheduler is not None and proxy is not None:
+            await scheduler.acquire_proxy(proxy)
+        attempt_started = time.perf_counter()
         try:
             result = await asyncio.wait_for(
-                _fetch_single_attempt(service=service, timeout_sec=timeout_sec, proxy=proxy, attempt=idx),
+                _fetch_single_attempt(
+                    service=service,
+                    timeout_sec=timeout_sec,
+                    proxy=proxy,
+                    attempt=idx,
+                    browser_pool=browser_pool,
+                    options=options,
+                    compute_stage=compute_stage,
+                    text_cache=text_cache,
+                ),
                 timeout=timeout_sec + 20,
             )
-            return result
+            elapsed = time.perf_counter() - attempt_started
+            if proxy_health is not None and proxy is not None:
+                proxy_health.record(proxy, service.domain, True, elapsed)
+            return replace(result, elapsed_sec=elapsed, bot_detected=bot_detected)
         except TimeoutError:
             last_error = f"Attempt timed out after hard limit ({timeout_sec + 20}s)"
             last_error_code = ErrorCode.TIMEOUT
@@ -87,6 +253,11 @@ async def fetch_with_retries(
                 code.value,
                 exc,
             )
+        bot_detected = bot_detected or last_error_code == ErrorCode.BOT_DETECTED
+        if proxy_health is not None and proxy is not None:
+            proxy_health.record(
+                proxy, service.domain, False, time.perf_counter() - attempt_started, last_error_code
+            )
 
         if idx < total_attempts:
             delay = compute_retry_delay(
@@ -105,51 +276,73 @@ async def fetch_with_retries(
         proxy_used=None,
         error_code=last_error_code,
         error=last_error,
+        bot_detected=bot_detected,
     )
 
 
-async def _fetch_single_attempt(service: Service, timeout_sec: int, proxy: Proxy | None, attempt: int) -> FetchResult:
+async def _fetch_single_attempt(
+    service: Service,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    attempt: int,
+    browser_pool: BrowserPool,
+    options: FetchOptions,
+    compute_stage: ComputeStage | None = None,
+    text_cache: TextCache | None = None,
+) -> FetchResult:
+    proxy_used = proxy.to_proxy_url() if proxy else None
+    rules = rules_for(options.extraction_overrides)
     if service.url.lower().endswith(".pdf"):
-        text = await _fetch_pdf_text(service.url, timeout_sec, proxy)
-        cleaned_text = _clean_extracted_text(text)
-        if not cleaned_text:
-            raise FetchError(ErrorCode.EMPTY_CONTENT, "PDF contains no extractable text")
-        return FetchResult(
-            ok=True,
-            text=cleaned_text,
-            source_type=SourceType.PDF,
-            attempt=attempt,
-            proxy_used=proxy.to_proxy_url() if proxy else None,
+        direct = await _fetch_pdf_document(
+            service.url, timeout_sec, proxy, options.validators, compute_stage, rules, options.pdf_max_bytes, text_cache
         )
-
-    html_text, maybe_pdf = await _fetch_html_text(service.url, timeout_sec, proxy)
+        return _direct_result(direct, attempt, proxy_used, FetchTier.HTTP)
+
+    if options.fetch_mode == FetchMode.TIERED and options.tier_hint != FetchTier.BROWSER:
+        tier_started = time.perf_counter()
+        fast = await _fetch_http_tier(
+            service.url,
+            timeout_sec,
+            proxy,
+            options.min_text_length,
+            options.validators,
+            compute_stage,
+            rules,
+            text_cache,
+            options.pdf_max_bytes,
+        )
+        if fast is not None:
+            return _direct_result(fast, attempt, proxy_used, FetchTier.HTTP)
+        # Both tiers share one attempt budget, so escalation stays within the attempt's hard limit.
+        timeout_sec = math.floor(timeout_sec - (time.perf_counter() - tier_started))
+        if timeout_sec < _MIN_BROWSER_TIMEOUT_SEC:
+            raise FetchError(ErrorCode.TIMEOUT, "HTTP tier used up the attempt timeout before escalation")
+
+    stats = _PageStats()
+    html_text, maybe_pdf = await _fetch_html_text(service.url, timeout_sec, proxy, browser_pool, options, stats)
     if maybe_pdf:
-        text = await _fetch_pdf_text(service.url, timeout_sec, proxy)
-        cleaned_text = _clean_extracted_text(text)
-        if not cleaned_text:
-            raise FetchError(ErrorCode.EMPTY_CONTENT, "PDF contains no extractable text")
-        return FetchResult(
-            ok=True,
-            text=cleaned_text,
-            source_type=SourceType.PDF,
-            attempt=attempt,
-            proxy_used=proxy.to_proxy_url() if proxy else None,
+        direct = await _fetch_pdf_document(
+            service.url, timeout_sec, proxy, options.validators, compute_stage, rules, options.pdf_max_bytes, text_cache
         )
+        return _direct_result(direct, attempt, proxy_used, FetchTier.BROWSER)
 
-    cleaned_text = _clean_extracted_text(html_text)
+    cleaned_text = clean_extracted_text(html_text, rules)
     if not cleaned_text:
         if _looks_like_binary_doc_url(service.url):
-            pdf_text = await _fetch_pdf_text_with_browser(service.url, timeout_sec, proxy)
+            pdf_text = await _fetch_pdf_text_with_browser(
+                service.url, timeout_sec, proxy, browser_pool, compute_stage, options.pdf_max_bytes
+            )
             if not pdf_text:
-                pdf_text = await _fetch_pdf_text(service.url, timeout_sec, proxy)
-            cleaned_pdf_text = _clean_extracted_text(pdf_text)
+                pdf_text = await _fetch_pdf_text(service.url, timeout_sec, proxy, compute_stage, options.pdf_max_bytes)
+            cleaned_pdf_text = clean_extracted_text(pdf_text, rules)
             if cleaned_pdf_text:
                 return FetchResult(
                     ok=True,
                     text=cleaned_pdf_text,
                     source_type=SourceType.PDF,
                     attempt=attempt,
-                    proxy_used=proxy.to_proxy_url() if proxy else None,
+                    proxy_used=proxy_used,
+                    tier=FetchTier.BROWSER,
                 )
         raise FetchError(ErrorCode.EMPTY_CONTENT, "Page contains no extractable text")
 
@@ -158,13 +351,147 @@ async def _fetch_single_attempt(service: Service, timeout_sec: int, proxy: Proxy
         text=cleaned_text,
         source_type=SourceType.HTML,
         attempt=attempt,
-        proxy_used=proxy.to_proxy_url() if proxy else None,
+        proxy_used=proxy_used,
+        tier=FetchTier.BROWSER,
+        transferred_bytes=stats.transferred_bytes,
+        blocked_requests=stats.blocked_requests,
+        ready_wait_sec=stats.ready_wait_sec,
+    )
+
+
+def _direct_result(direct: _DirectFetch, attempt: int, proxy_used: str | None, tier: FetchTier) -> FetchResult:
+    return FetchResult(
+        ok=True,
+        text=direct.text or "",
+        source_type=direct.source_type,
+        attempt=attempt,
+        proxy_used=proxy_used,
+        tier=tier,
+        not_modified=direct.text is None,
+        validators=direct.validators,
+    )
+
+
+async def _fetch_http_tier(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    min_text_length: int,
+    known: HttpValidators | None = None,
+    compute_stage: ComputeStage | None = None,
+    rules: ExtractionRules = DEFAULT_RULES,
+    text_cache: TextCache | None = None,
+    max_bytes: int | None = None,
+) -> _DirectFetch | None:
+    """Plain GET + Python-side extraction; returns None when the page needs a real browser.
+
+    `max_bytes` caps the body, so a PDF behind an HTML-looking URL is not read past `PDF_MAX_MB`.
+    """
+    try:
+        response = await asyncio.to_thread(
+            _http_get, url, min(timeout_sec, _HTTP_TIER_TIMEOUT_SEC), proxy, _HTML_ACCEPT, known, max_bytes=max_bytes
+        )
+    except FetchError as exc:
+        LOGGER.debug("HTTP tier escalates url=%s reason=request-failed error=%s", url, exc)
+        return None
+    if known is not None and _is_not_modified(response, known):
+        return _DirectFetch(
+            text=None,
+            source_type=known.source_type or SourceType.HTML,
+            validators=_refreshed(response, known),
+        )
+    if response.status != 200:
+        LOGGER.debug("HTTP tier escalates url=%s reason=status-%s", url, response.status)
+        return None
+
+    content_type = response.headers.get("content-type", "").lower()
+    if "application/pdf" in content_type or response.body.startswith(b"%PDF"):
+        key = text_cache.key(rules, SourceType.PDF.value, response.sha256()) if text_cache else None
+        text = await _cache_get(text_cache, key)
+        if text is None:
+            try:
+                text = clean_extracted_text(await _pdf_to_text(response.body, compute_stage), rules)
+            except FetchError as exc:
+                LOGGER.debug("HTTP tier escalates url=%s reason=pdf-parse error=%s", url, exc)
+                return None
+            await _cache_put(text_cache, key, text)
+        if not text:
+            return None
+        return _DirectFetch(text=text, source_type=SourceType.PDF, validators=_observed(response))
+    if content_type and "html" not in content_type:
+        LOGGER.debug("HTTP tier escalates url=%s reason=content-type", url)
+        return None
+
+    # A cached text passed the bot-marker and JS-only checks when it was stored.
+    key = text_cache.key(rules, SourceType.HTML.value, response.sha256()) if text_cache else None
+    cached = await _cache_get(text_cache, key)
+    if cached is None:
+        html = decode_html(response.body, content_type)
+        try:
+            document = await asyncio.to_thread(parse_html_document, html)
+        except Exception as exc:  # noqa: BLE001
+            # Whatever the Python-side parser cannot handle, the browser may: escalate, do not fail.
+            LOGGER.debug("HTTP tier escalates url=%s reason=parse-failed error=%r", url, exc)
+            return None
+        if looks_like_bot_block(f"{document.title}\n{document.body_text[:2000]}".lower()):
+            LOGGER.debug("HTTP tier escalates url=%s reason=bot-marker", url)
+            return None
+        text = clean_extracted_text(document.main_text, rules)
+        if looks_like_js_only_page(html, text, min_text_length):
+            LOGGER.debug("HTTP tier escalates url=%s reason=js-only", url)
+            return None
+    else:
+        text = cached
+    if not text or len(text) < min_text_length:
+        LOGGER.debug("HTTP tier escalates url=%s reason=short-text length=%s", url, len(text))
+        return None
+    if cached is None:
+        await _cache_put(text_cache, key, text)
+    return _DirectFetch(text=text, source_type=SourceType.HTML, validators=_observed(response))
+
+
+async def _cache_get(text_cache: TextCache | None, key: str | None) -> str | None:
+    if text_cache is None or key is None:
+        return None
+    return await asyncio.to_thread(text_cache.get, key)
+
+
+async def _cache_put(text_cache: TextCache | None, key: str | None, text: str) -> None:
+    if text_cache is not None and key is not None and text:
+        await asyncio.to_thread(text_cache.put, key, text)
+
+
+def _observed(response: _HttpResponse) -> HttpValidators:
+    return HttpValidators(
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+        body_sha256=response.sha256(),
     )
 
 
-def build_attempts(proxies: Sequence[Proxy], retry_proxy_count: int) -> list[Proxy | None]:
+def _refreshed(response: _HttpResponse, known: HttpValidators) -> HttpValidators:
+    return replace(
+        known,
+        etag=response.headers.get("etag") or known.etag,
+        last_modified=response.headers.get("last-modified") or known.last_modified,
+    )
+
+
+def _is_not_modified(response: _HttpResponse, known: HttpValidators) -> bool:
+    if response.status == 304:
+        return True
+    if response.status != 200 or known.body_sha256 is None:
+        return False
+    return response.sha256() == known.body_sha256
+
+
+def build_attempts(proxies: Sequence[Proxy], retry_proxy_count: int, start: int = 0) -> list[Proxy | None]:
     attempts: list[Proxy | None] = [None]
-    attempts.extend(list(proxies)[:retry_proxy_count])
+    pool = list(proxies)
+    if pool:
+        # Rotate from `start` so consecutive services retry through different proxies.
+        offset = start % len(pool)
+        attempts.extend((pool[offset:] + pool[:offset])[:retry_proxy_count])
     return attempts
 
 
@@ -205,243 +532,291 @@ def classify_untyped_error(exc: Exception) -> ErrorCode:
     return ErrorCode.UNKNOWN
 
 
-async def _fetch_html_text(url: str, timeout_sec: int, proxy: Proxy | None) -> tuple[str, bool]:
+async def _fetch_html_text(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    browser_pool: BrowserPool,
+    options: FetchOptions | None = None,
+    stats: _PageStats | None = None,
+) -> tuple[str, bool]:
+    options = options or FetchOptions()
     try:
         from playwright.async_api import TimeoutError as PlaywrightTimeoutError
-        from playwright.async_api import async_playwright
     except Exception as exc:  # noqa: BLE001
         msg = "Playwright is not installed. Run: python -m playwright install chromium"
         raise FetchError(ErrorCode.BROWSER, msg) from exc
 
-    launch_kwargs: dict[str, object] = {
-        "headless": True,
-        "args": [
-            "--disable-blink-features=AutomationControlled",
-            "--disable-dev-shm-usage",
-            "--no-first-run",
-        ],
-    }
-    if proxy is not None:
-        launch_kwargs["proxy"] = proxy.to_playwright_proxy()
-
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(**launch_kwargs)
-            try:
-                context = await browser.new_context(
-                    user_agent=REALISTIC_USER_AGENT,
-                    locale="ru-RU",
-                    timezone_id="Europe/Moscow",
-                    viewport={"width": 1366, "height": 768},
-                    java_script_enabled=True,
-                    extra_http_headers={
-                        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                        "Upgrade-Insecure-Requests": "1",
-                        "DNT": "1",
-                    },
-                )
-                await context.add_init_script(
-                    """
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    Object.defineProperty(navigator, 'platform', {get: () => 'MacIntel'});
-                    Object.defineProperty(navigator, 'language', {get: () => 'ru-RU'});
-                    Object.defineProperty(navigator, 'languages', {get: () => ['ru-RU', 'ru', 'en-US', 'en']});
-                    window.chrome = window.chrome || { runtime: {} };
-                    """
-                )
-                page = await context.new_page()
-                response = await page.goto(url, timeout=timeout_sec * 1000, wait_until="domcontentloaded")
-                if response is None:
-                    raise FetchError(ErrorCode.NETWORK, "No response from target page")
-
-                content_type = response.headers.get("content-type", "").lower()
-                if "application/pdf" in content_type:
-                    return "", True
-
+        async with browser_pool.context(
+            proxy,
+            user_agent=REALISTIC_USER_AGENT,
+            locale="ru-RU",
+            timezone_id="Europe/Moscow",
+            viewport={"width": 1366, "height": 768},
+            java_script_enabled=True,
+            extra_http_headers={
+                "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+                "Upgrade-Insecure-Requests": "1",
+                "DNT": "1",
+            },
+        ) as context:
+            await context.add_init_script(
+                """
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                Object.defineProperty(navigator, 'platform', {get: () => 'MacIntel'});
+                Object.defineProperty(navigator, 'language', {get: () => 'ru-RU'});
+                Object.defineProperty(navigator, 'languages', {get: () => ['ru-RU', 'ru', 'en-US', 'en']});
+                window.chrome = window.chrome || { runtime: {} };
+                """
+            )
+            site = urlsplit(url).hostname or ""
+            if options.blocked_resources:
+                await context.route("**/*", _resource_router(options.blocked_resources, site, stats))
+            page = await context.new_page()
+            if stats is not None:
+                await _count_transferred_bytes(context, page, stats)
+            response = await page.goto(url, timeout=timeout_sec * 1000, wait_until="domcontentloaded")
+            if response is None:
+                raise FetchError(ErrorCode.NETWORK, "No response from target page")
+
+            content_type = response.headers.get("content-type", "").lower()
+            if "application/pdf" in content_type:
+                return "", True
+
+            settle_started = time.perf_counter()
+            if options.humanize:
                 await _simulate_human_interaction(page)
-                if await _looks_like_bot_block(page):
-                    raise FetchError(ErrorCode.BOT_DETECTED, "Anti-bot page detected")
-
-                text = await page.evaluate(
-                    """() => {
-                      const selectorsToDrop = [
-                        'script', 'style', 'noscript', 'svg', 'nav', 'footer', 'header', 'aside',
-                        'form', 'button', 'input', 'select', 'textarea', 'a', 'iframe',
-                        '[role="navigation"]', '[role="banner"]', '[role="contentinfo"]',
-                        '.cookie', '#cookie', '.cookies', '.consent', '.banner', '.modal', '.popup',
-                        '.newsletter', '.subscribe', '.social', '.breadcrumbs', '.breadcrumb'
-                      ];
-                      const body = document.body;
-                      if (!body) return '';
-                      const clone = body.cloneNode(true);
-                      clone.querySelectorAll(selectorsToDrop.join(',')).forEach((node) => node.remove());
-
-                      const candidates = Array.from(
-                        clone.querySelectorAll(
-                          'main, article, [role="main"], .content, .main-content, .terms, .tos, .legal'
-                        )
-                      );
-                      const blocks = candidates.length > 0 ? candidates : [clone];
-
-                      let bestText = '';
-                      for (const block of blocks) {
-                        const lines = (block.innerText || '')
-                          .split('\\n')
-                          .map((x) => x.trim())
-                          .filter(Boolean);
-                        const scored = lines.filter((line) => {
-                          if (line.length < 25) return false;
-                          const words = line.split(/\\s+/).filter(Boolean);
-                          const urlTokens = words.filter((w) => /https?:\\/\\//i.test(w)).length;
-                          const navLike = /(home|about|contact|pricing|blog|careers|help|support)/i.test(line);
-                          return !(urlTokens > 0 && words.length <= 8) && !navLike;
-                        });
-                        const candidateText = scored.join('\\n');
-                        if (candidateText.length > bestText.length) {
-                          bestText = candidateText;
-                        }
-                      }
-                      return bestText;
-                    }"""
-                )
-                if not text or not text.strip():
-                    text = await _extract_with_fallback(page, timeout_sec)
-                await context.close()
-                return text, False
-            except PlaywrightTimeoutError as exc:
-                raise FetchError(ErrorCode.TIMEOUT, f"Page timeout after {timeout_sec}s") from exc
-            except FetchError:
-                raise
-            except Exception as exc:  # noqa: BLE001
-                raise FetchError(classify_untyped_error(exc), str(exc)) from exc
-            finally:
-                await browser.close()
+            await _wait_for_text(page, options.min_text_length, min(options.ready_max_ms, max(2500, timeout_sec * 200)))
+            if stats is not None:
+                stats.ready_wait_sec = time.perf_counter() - settle_started
+            if await _looks_like_bot_block(page):
+                raise FetchError(ErrorCode.BOT_DETECTED, "Anti-bot page detected")
+
+            text = await page.evaluate(BROWSER_EXTRACT_JS)
+            if not text or not text.strip():
+                text = await _extract_with_fallback(page)
+            return text, False
+    except PlaywrightTimeoutError as exc:
+        raise FetchError(ErrorCode.TIMEOUT, f"Page timeout after {timeout_sec}s") from exc
     except FetchError:
         raise
     except Exception as exc:  # noqa: BLE001
         raise FetchError(classify_untyped_error(exc), str(exc)) from exc
 
 
-async def _fetch_pdf_text(url: str, timeout_sec: int, proxy: Proxy | None) -> str:
-    data = await asyncio.to_thread(_download_pdf, url, timeout_sec, proxy)
-    return await asyncio.to_thread(_extract_text_from_pdf, data)
+async def _fetch_pdf_text(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    compute_stage: ComputeStage | None = None,
+    max_bytes: int | None = None,
+) -> str:
+    with spooled_pdf() as sink:
+        response = await asyncio.to_thread(_download_pdf, url, timeout_sec, proxy, None, sink, max_bytes)
+        return await _pdf_file_to_text(sink.name, response.sha256(), compute_stage)
 
 
-async def _fetch_pdf_text_with_browser(url: str, timeout_sec: int, proxy: Proxy | None) -> str:
+async def _fetch_pdf_document(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    known: HttpValidators | None,
+    compute_stage: ComputeStage | None = None,
+    rules: ExtractionRules = DEFAULT_RULES,
+    max_bytes: int | None = None,
+    text_cache: TextCache | None = None,
+) -> _DirectFetch:
+    with spooled_pdf() as sink:
+        response = await asyncio.to_thread(_download_pdf, url, timeout_sec, proxy, known, sink, max_bytes)
+        if known is not None and _is_not_modified(response, known):
+            return _DirectFetch(text=None, source_type=SourceType.PDF, validators=_refreshed(response, known))
+        key = text_cache.key(rules, SourceType.PDF.value, response.sha256()) if text_cache else None
+        text = await _cache_get(text_cache, key)
+        if text is None:
+            text = clean_extracted_text(await _pdf_file_to_text(sink.name, response.sha256(), compute_stage), rules)
+            await _cache_put(text_cache, key, text)
+    if not text:
+        raise FetchError(ErrorCode.EMPTY_CONTENT, "PDF contains no extractable text")
+    return _DirectFetch(text=text, source_type=SourceType.PDF, validators=_observed(response))
+
+
+async def _fetch_pdf_text_with_browser(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    browser_pool: BrowserPool,
+    compute_stage: ComputeStage | None = None,
+    max_bytes: int | None = None,
+) -> str:
     try:
-        from playwright.async_api import async_playwright
+        import playwright.async_api  # noqa: F401
     except Exception:
         return ""
 
-    launch_kwargs: dict[str, object] = {
-        "headless": True,
-        "args": [
-            "--disable-blink-features=AutomationControlled",
-            "--disable-dev-shm-usage",
-            "--no-first-run",
-        ],
-    }
-    if proxy is not None:
-        launch_kwargs["proxy"] = proxy.to_playwright_proxy()
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(**launch_kwargs)
-        try:
-            context = await browser.new_context(
-                user_agent=REALISTIC_USER_AGENT,
-                locale="ru-RU",
-                timezone_id="Europe/Moscow",
-                extra_http_headers={
-                    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                    "Accept": "application/pdf,text/html;q=0.9,*/*;q=0.8",
-                },
-            )
-            response = await context.request.get(url, timeout=timeout_sec * 1000)
-            body = await response.body()
-            content_type = (response.headers.get("content-type") or "").lower()
-            if "application/pdf" in content_type or body.startswith(b"%PDF"):
-                return await asyncio.to_thread(_extract_text_from_pdf, body)
-
-            if _looks_like_bot_block_text(_safe_decode(body)):
-                raise FetchError(ErrorCode.BOT_DETECTED, "Anti-bot page detected for binary document URL")
-            return ""
-        finally:
-            await browser.close()
+    async with browser_pool.context(
+        proxy,
+        user_agent=REALISTIC_USER_AGENT,
+        locale="ru-RU",
+        timezone_id="Europe/Moscow",
+        extra_http_headers={
+            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Accept": "application/pdf,text/html;q=0.9,*/*;q=0.8",
+        },
+    ) as context:
+        response = await context.request.get(url, timeout=timeout_sec * 1000)
+        _check_body_size(response.headers.get("content-length") or "", max_bytes)
+        body = await response.body()
+        _check_body_size(str(len(body)), max_bytes)
+        content_type = (response.headers.get("content-type") or "").lower()
+        if "application/pdf" in content_type or body.startswith(b"%PDF"):
+            return await _pdf_to_text(body, compute_stage)
+
+        if looks_like_bot_block(_safe_decode(body)):
+            raise FetchError(ErrorCode.BOT_DETECTED, "Anti-bot page detected for binary document URL")
+        return ""
 
 
-def _download_pdf(url: str, timeout_sec: int, proxy: Proxy | None) -> bytes:
+def _download_pdf(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    known: HttpValidators | None = None,
+    sink: IO[bytes] | None = None,
+    max_bytes: int | None = None,
+) -> _HttpResponse:
+    try:
+        response = _http_get(url, timeout_sec, proxy, _PDF_ACCEPT, known, sink, max_bytes)
+    except FetchError as exc:
+        code = ErrorCode.PROXY if exc.code == ErrorCode.PROXY else ErrorCode.PDF_DOWNLOAD
+        raise FetchError(code, f"PDF download failed: {exc.__cause__ or exc}") from exc
+    if response.status == 304 or 200 <= response.status < 300:
+        return response
+    code = ErrorCode.PROXY if response.status == 407 else ErrorCode.PDF_DOWNLOAD
+    raise FetchError(code, f"PDF download failed: HTTP Error {response.status}")
+
+
+def _http_get(
+    url: str,
+    timeout_sec: int,
+    proxy: Proxy | None,
+    accept: str,
+    known: HttpValidators | None = None,
+    sink: IO[bytes] | None = None,
+    max_bytes: int | None = None,
+) -> _HttpResponse:
+    """GET with optional validators; with `sink` the body is streamed there and only its hash kept."""
     handlers = []
     if proxy is not None:
         proxy_url = proxy.to_proxy_url()
         handlers.append(ProxyHandler({"http": proxy_url, "https": proxy_url}))
 
     opener = build_opener(*handlers)
-    req = Request(
-        url,
-        headers={
-            "User-Agent": REALISTIC_USER_AGENT,
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Accept": "application/pdf,text/html;q=0.9,*/*;q=0.8",
-        },
-    )
+    headers = {
+        "User-Agent": REALISTIC_USER_AGENT,
+        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Accept": accept,
+    }
+    if known is not None and known.etag:
+        headers["If-None-Match"] = known.etag
+    if known is not None and known.last_modified:
+        headers["If-Modified-Since"] = known.last_modified
+    req = Request(url, headers=headers)
     try:
         with opener.open(req, timeout=timeout_sec) as response:  # type: ignore[arg-type]
-            return response.read()
-    except URLError as exc:
-        code = ErrorCode.PROXY if "407" in str(exc) or "proxy" in str(exc).lower() else ErrorCode.PDF_DOWNLOAD
-        raise FetchError(code, f"PDF download failed: {exc}") from exc
-
-
-def _extract_text_from_pdf(data: bytes) -> str:
-    from pypdf import PdfReader
-
+            response_headers = {key.lower(): value for key, value in response.headers.items()}
+            if sink is None and max_bytes is None:
+                return _HttpResponse(status=response.status, headers=response_headers, body=response.read())
+            _check_body_size(response_headers.get("content-length", ""), max_bytes)
+            body, digest = _read_body(response, sink, max_bytes)
+            return _HttpResponse(status=response.status, headers=response_headers, body=body, body_sha256=digest)
+    except HTTPError as exc:
+        response_headers = {key.lower(): value for key, value in exc.headers.items()} if exc.headers else {}
+        return _HttpResponse(status=exc.code, headers=response_headers, body=b"")
+    except (URLError, OSError) as exc:
+        code = ErrorCode.PROXY if "407" in str(exc) or "proxy" in str(exc).lower() else ErrorCode.NETWORK
+        raise FetchError(code, f"HTTP request failed: {exc}") from exc
+    except (http.client.HTTPException, ValueError) as exc:
+        # Truncated chunked bodies (IncompleteRead), bad status lines, malformed URLs or headers.
+        raise FetchError(ErrorCode.NETWORK, f"HTTP request failed: {exc!r}") from exc
+
+
+def _read_body(response: IO[bytes], sink: IO[bytes] | None, max_bytes: int | None) -> tuple[bytes, str | None]:
+    chunks: list[bytes] = []
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := response.read(_READ_CHUNK_BYTES):
+        size += len(chunk)
+        _check_body_size(str(size), max_bytes)
+        if sink is None:
+            chunks.append(chunk)
+        else:
+            sink.write(chunk)
+            digest.update(chunk)
+    if sink is None:
+        return b"".join(chunks), None
+    sink.flush()
+    return b"", digest.hexdigest()
+
+
+def _check_body_size(size: str, max_bytes: int | None) -> None:
+    if max_bytes is not None and size.isdigit() and int(size) > max_bytes:
+        raise FetchError(ErrorCode.PDF_DOWNLOAD, f"Body of {size} bytes exceeds the {max_bytes} byte limit")
+
+
+async def _pdf_to_text(data: bytes, compute_stage: ComputeStage | None) -> str:
+    with spooled_pdf() as sink:
+        await asyncio.to_thread(sink.write, data)
+        sink.flush()
+        return await _pdf_file_to_text(sink.name, hashlib.sha256(data).hexdigest(), compute_stage)
+
+
+async def _pdf_file_to_text(path: str, digest: str, compute_stage: ComputeStage | None) -> str:
     try:
-        reader = PdfReader(BytesIO(data))
-        chunks: list[str] = []
-        for page in reader.pages:
-            chunks.append(page.extract_text() or "")
-        return "\n".join(chunks)
+        return await extract_pdf_text(path, digest, compute_stage)
+    except BrokenProcessPool:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise FetchError(ErrorCode.PDF_PARSE, f"PDF parsing failed: {exc}") from exc
 
 
-def _clean_extracted_text(text: str) -> str:
-    lines = text.splitlines()
-    out: list[str] = []
-    noise_tokens = (
-        "cookie",
-        "privacy center",
-        "all rights reserved",
-        "follow us",
-        "subscribe",
-        "newsletter",
-        "accept all",
-        "reject all",
-        "мы сохраняем «куки»",
-        "мы сохраняем \"куки\"",
-        "help and feedback",
-    )
-    for raw in lines:
-        line = re.sub(r"\s+", " ", raw).strip()
-        if not line:
-            continue
-        lower = line.lower()
-        if lower.startswith("©") or "лицензия банка россии" in lower:
-            continue
-        if "помощь и обратная связь" in lower and len(line) < 220:
-            continue
-        if any(token in lower for token in noise_tokens) and len(line) < 160:
-            continue
-        if any(token in lower for token in ("сохраняем «куки»", "сохраняем \"куки\"")):
-            continue
-        words = line.split()
-        url_like = sum(1 for w in words if "http://" in w.lower() or "https://" in w.lower())
-        if url_like > 0 and len(words) <= 8:
-            continue
-        if len(line) < 3:
-            continue
-        out.append(line)
-    return "\n".join(out).strip()
+def _resource_router(
+    blocked: frozenset[str],
+    site: str,
+    stats: _PageStats | None,
+) -> Callable[["Route"], Awaitable[None]]:
+    async def route_request(route: "Route") -> None:
+        request = route.request
+        try:
+            subframe = request.is_navigation_request() and request.frame.parent_frame is not None
+        except Exception:  # noqa: BLE001
+            # Service-worker requests have no frame.
+            subframe = False
+        if should_block(blocked, request.resource_type, request.url, subframe=subframe, site=site):
+            if stats is not None:
+                stats.blocked_requests += 1
+            await route.abort("blockedbyclient")
+            return
+        await route.continue_()
+
+    return route_request
+
+
+async def _count_transferred_bytes(context: "BrowserContext", page: "Page", stats: _PageStats) -> None:
+    # Encoded (on-the-wire) size per finished request, as reported by Chromium's network domain.
+    try:
+        session = await context.new_cdp_session(page)
+        await session.send("Network.enable")
+    except Exception:  # noqa: BLE001
+        LOGGER.debug("CDP session unavailable, page traffic not measured")
+        return
+
+    def on_loading_finished(event: dict[str, object]) -> None:
+        size = event.get("encodedDataLength")
+        if isinstance(size, (int, float)):
+            stats.transferred_bytes += int(size)
+
+    session.on("Network.loadingFinished", on_loading_finished)
 
 
 def _looks_like_binary_doc_url(url: str) -> bool:
@@ -458,15 +833,22 @@ async def _simulate_human_interaction(page: "Page") -> None:
     await page.wait_for_timeout(random.randint(250, 700))
 
 
-async def _extract_with_fallback(page: "Page", timeout_sec: int) -> str:
-    # Some pages render legal text after delayed JS execution.
-    baseline = await page.evaluate("() => document.body ? document.body.innerText : ''")
-    if baseline and baseline.strip():
-        return baseline
+async def _wait_for_text(page: "Page", min_chars: int, max_ms: int) -> bool:
+    """Wait until the legal text stops growing (delayed JS rendering included); False if it never settled."""
+    try:
+        ready = await page.evaluate(
+            _WAIT_FOR_TEXT_JS, {"minChars": min_chars, "quietMs": _READY_QUIET_MS, "maxMs": max_ms}
+        )
+    except Exception as exc:  # noqa: BLE001
+        # A client-side redirect destroys the execution context: wait for the new document instead.
+        LOGGER.debug("Readiness check interrupted error=%s", exc)
+        await page.wait_for_load_state("domcontentloaded")
+        return False
+    return bool(ready and ready.get("settled"))
 
-    extra_wait_ms = min(12000, max(2500, int(timeout_sec * 200)))
-    await page.wait_for_timeout(extra_wait_ms)
 
+async def _extract_with_fallback(page: "Page") -> str:
+    # The readiness wait already covered delayed rendering; take whatever text the page has.
     text = await page.evaluate("() => document.body ? document.body.innerText : ''")
     if text and text.strip():
         return text
@@ -478,24 +860,7 @@ async def _looks_like_bot_block(page: "Page") -> bool:
     title = (await page.title()).lower()
     body_text = await page.evaluate("() => (document.body ? document.body.innerText : '')")
     sample = f"{title}\n{body_text[:2000]}".lower()
-    return _looks_like_bot_block_text(sample)
-
-
-def _looks_like_bot_block_text(sample: str) -> bool:
-    markers = (
-        "captcha",
-        "cloudflare",
-        "ddos-guard",
-        "verify you are human",
-        "if you are not a bot",
-        "are you human",
-        "security check",
-        "access denied",
-        "подтвердите, что вы не робот",
-        "проверка безопасности",
-        "необычный трафик",
-    )
-    return any(marker in sample for marker in markers)
+    return looks_like_bot_block(sample)
 
 
 def _safe_decode(data: bytes) -> str:
@@ -21,6 +21,8 @@ class ChangeLevel(str, Enum):
 class Service:
     domain: str
     url: str
+    # Higher runs earlier; set with a `priority=N` token after the URL in the URL list.
+    priority: int = 0
 
 
 class SourceType(str, Enum):
@@ -28,6 +30,21 @@ class SourceType(str, Enum):
     PDF = "PDF"
 
 
+class FetchTier(str, Enum):
+    HTTP = "HTTP"
+    BROWSER = "BROWSER"
+
+
+class FetchMode(str, Enum):
+    BROWSER = "browser"
+    TIERED = "tiered"
+
+
+class ReportLayout(str, Enum):
+    SINGLE = "single"
+    SHARDED = "sharded"
+
+
 class ErrorCode(str, Enum):
     BOT_DETECTED = "BOT_DETECTED"
     TECHNICAL_PAGE = "TECHNICAL_PAGE"
@@ -74,6 +91,42 @@ class AppSettings:
     retry_backoff_max_sec: float
     retry_jitter_sec: float
     min_text_length: int
+    fetch_mode: FetchMode
+    revalidate: bool
+    browser_pool_size: int
+    browser_max_pages: int
+    compute_workers: int
+    compute_queue_depth: int
+    report_layout: ReportLayout
+    rate_limit_domain_per_min: float
+    rate_limit_host_per_min: float
+    rate_limit_proxy_per_min: float
+    rate_limit_burst: int
+    rate_limit_resolve_hosts: bool
+    proxy_quarantine_failures: int
+    proxy_quarantine_sec: float
+    proxy_prefer_last_success: bool
+    adaptive_timeouts: bool
+    timeout_min_sec: int
+    timeout_max_sec: int
+    timeout_p99_factor: float
+    run_history_db: str
+    state_write_batch: int
+    tenants_dir: str
+    work_queue_db: str
+    work_queue_max_attempts: int
+    work_queue_poll_sec: float
+    schedule_min_interval_sec: float
+    schedule_max_interval_sec: float
+    schedule_default_interval_sec: float
+    schedule_report_sec: float
+    scan_order_by_cost: bool
+    browser_block_resources: frozenset[str]
+    browser_block_allowlist_file: str
+    extraction_rules_file: str
+    pdf_max_bytes: int
+    text_cache_dir: str
+    text_cache_max_bytes: int
     log_level: str
     api_host: str
     api_port: int
@@ -84,6 +137,15 @@ class AppSettings:
     mariadb_password: str
 
 
+@dataclass(frozen=True)
+class HttpValidators:
+    etag: str | None = None
+    last_modified: str | None = None
+    body_sha256: str | None = None
+    source_type: SourceType | None = None
+    text_length: int | None = None
+
+
 @dataclass(frozen=True)
 class FetchResult:
     ok: bool
@@ -93,6 +155,17 @@ class FetchResult:
     proxy_used: str | None = None
     error_code: ErrorCode | None = None
     error: str | None = None
+    tier: FetchTier | None = None
+    not_modified: bool = False
+    validators: HttpValidators | None = None
+    elapsed_sec: float | None = None
+    # Browser tier only: encoded bytes received by the page and requests aborted by resource blocking.
+    transferred_bytes: int | None = None
+    blocked_requests: int = 0
+    # Seconds spent waiting for the page text to settle (human-like delays included).
+    ready_wait_sec: float | None = None
+    # Some attempt of this fetch hit a bot-detection page.
+    bot_detected: bool = False
 
 
 @dataclass(frozen=True)
@@ -107,4 +180,8 @@ class RunEntry:
     change_ratio: float | None
     error_code: ErrorCode | None
     error: str | None
-    diff_html: str | None
+    diff: dict[str, object] | None
+    revalidated: bool = False
+    timeout_sec: int | None = None
+    attempt: int | None = None
+    proxy_used: str | None = None
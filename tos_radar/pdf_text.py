@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import mmap
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator, TypeVar
+
+from tos_radar.compute import ComputeStage
+
+T = TypeVar("T")
+
+# Pages parsed by one compute task; the first task also reports the page count.
+PAGES_PER_TASK = 16
+DEFAULT_PDF_MAX_BYTES = 50 * 1024 * 1024
+_CACHE_MAX_CHARS = 8_000_000
+
+
+@dataclass
+class PdfTextCacheStats:
+    hits: int = 0
+    misses: int = 0
+    pages: int = 0
+
+
+class PdfTextCache:
+    """Raw page text of recently parsed PDFs by body SHA-256, least recently used out first.
+
+    Lives as long as the process, so retries, `run-all` tenants and `schedule` cycles that see
+    the same bytes again skip parsing; across runs unchanged PDFs are caught earlier by the
+    body hash in `validators.json`.
+    """
+
+    def __init__(self, max_chars: int = _CACHE_MAX_CHARS) -> None:
+        self._max_chars = max(0, max_chars)
+        self._items: OrderedDict[str, str] = OrderedDict()
+        self._chars = 0
+        self.stats = PdfTextCacheStats()
+
+    def get(self, digest: str) -> str | None:
+        text = self._items.get(digest)
+        if text is None:
+            self.stats.misses += 1
+            return None
+        self._items.move_to_end(digest)
+        self.stats.hits += 1
+        return text
+
+    def put(self, digest: str, text: str) -> None:
+        if len(text) > self._max_chars:
+            return
+        previous = self._items.pop(digest, None)
+        if previous is not None:
+            self._chars -= len(previous)
+        self._items[digest] = text
+        self._chars += len(text)
+        while self._chars > self._max_chars:
+            _, evicted = self._items.popitem(last=False)
+            self._chars -= len(evicted)
+
+
+PDF_TEXT_CACHE = PdfTextCache()
+
+
+@contextmanager
+def spooled_pdf() -> Iterator[IO[bytes]]:
+    """Temporary file for a PDF body, removed on exit; compute workers open it by `.name`."""
+    handle = tempfile.NamedTemporaryFile(prefix="tos-radar-", suffix=".pdf", delete=False)
+    try:
+        yield handle
+    finally:
+        handle.close()
+        Path(handle.name).unlink(missing_ok=True)
+
+
+async def extract_pdf_text(
+    path: str,
+    digest: str,
+    compute_stage: ComputeStage | None,
+    cache: PdfTextCache = PDF_TEXT_CACHE,
+) -> str:
+    """Page text of the PDF at `path`, parsed in page ranges that run in parallel on the compute stage."""
+    cached = cache.get(digest)
+    if cached is not None:
+        return cached
+    first, page_count = await _run(compute_stage, extract_pages, path, 0, PAGES_PER_TASK)
+    rest = await asyncio.gather(
+        *(
+            _run(compute_stage, extract_pages, path, start, start + PAGES_PER_TASK)
+            for start in range(PAGES_PER_TASK, page_count, PAGES_PER_TASK)
+        )
+    )
+    pages = [*first, *(page for chunk, _ in rest for page in chunk)]
+    cache.stats.pages += len(pages)
+    text = "\n".join(pages)
+    cache.put(digest, text)
+    return text
+
+
+def extract_pages(path: str, start: int, stop: int) -> tuple[list[str], int]:
+    """Text of pages `start..stop` and the document's page count; runs in a compute worker."""
+    from pypdf import PdfReader
+
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        reader = PdfReader(view)
+        page_count = len(reader.pages)
+        return [reader.pages[idx].extract_text() or "" for idx in range(start, min(stop, page_count))], page_count
+
+
+async def _run(compute_stage: ComputeStage | None, func: Callable[..., T], *args: Any) -> T:
+    if compute_stage is None:
+        return await asyncio.to_thread(func, *args)
+    return await compute_stage.run("pdf", func, *args)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+from tos_radar.models import ErrorCode, Proxy
+
+LOGGER = logging.getLogger(__name__)
+_HEALTH_FILE = "proxy_health.json"
+_EWMA_ALPHA = 0.3
+# Failures that say something about the proxy itself. Proxies are only tried after the direct attempt
+# failed, so timeouts and bot walls mostly come from the target and would quarantine every proxy.
+_PROXY_FAULTS = frozenset({ErrorCode.PROXY, ErrorCode.NETWORK})
+
+
+@dataclass
+class ProxyHealth:
+    success_rate: float = 1.0
+    latency_ewma_sec: float | None = None
+    attempts: int = 0
+    consecutive_failures: int = 0
+    last_failure_at: float | None = None
+    errors: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def score(self) -> float:
+        latency = self.latency_ewma_sec or 0.0
+        return self.success_rate / (1.0 + latency / 10.0)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ProxyHealth:
+        return cls(
+            success_rate=float(data.get("success_rate", 1.0)),
+            latency_ewma_sec=data.get("latency_ewma_sec"),
+            attempts=int(data.get("attempts", 0)),
+            consecutive_failures=int(data.get("consecutive_failures", 0)),
+            last_failure_at=data.get("last_failure_at"),
+            errors=Counter({str(k): int(v) for k, v in (data.get("errors") or {}).items()}),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "success_rate": round(self.success_rate, 4),
+            "latency_ewma_sec": round(self.latency_ewma_sec, 3) if self.latency_ewma_sec is not None else None,
+            "attempts": self.attempts,
+            "consecutive_failures": self.consecutive_failures,
+            "last_failure_at": self.last_failure_at,
+            "errors": dict(self.errors),
+        }
+
+
+class ProxyHealthRegistry:
+    """Per-proxy success rate, latency EWMA and error histogram, persisted per tenant.
+
+    Proxies with `quarantine_failures` proxy-attributable failures in a row are skipped until
+    `quarantine_sec` has passed since the last one; then a single attempt probes them again.
+    Target-side failures only go to the error histogram and drop the domain's proxy preference.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        quarantine_failures: int = 3,
+        quarantine_sec: float = 1800.0,
+        prefer_last_success: bool = True,
+    ) -> None:
+        self._path = path
+        self._quarantine_failures = max(1, quarantine_failures)
+        self._quarantine_sec = quarantine_sec
+        self._prefer_last_success = prefer_last_success
+        self.proxies: dict[str, ProxyHealth] = {}
+        self.last_success: dict[str, str] = {}
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, tenant_id: str, **kwargs: Any) -> ProxyHealthRegistry:
+        registry = cls(Path("data") / tenant_id / _HEALTH_FILE, **kwargs)
+        if not registry._path.exists():
+            return registry
+        try:
+            data = json.loads(registry._path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            LOGGER.warning("Ignoring unreadable proxy health file %s", registry._path)
+            return registry
+        registry.proxies = {key: ProxyHealth.from_dict(value) for key, value in data.get("proxies", {}).items()}
+        registry.last_success = {str(k): str(v) for k, v in data.get("last_success", {}).items()}
+        return registry
+
+    def save(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "proxies": {key: health.to_dict() for key, health in sorted(self.proxies.items())},
+            "last_success": dict(sorted(self.last_success.items())),
+        }
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self._path)
+
+    def rank(self, proxies: Sequence[Proxy], domain: str, start: int = 0) -> list[Proxy]:
+        """Healthy proxies, best first; `start` rotates ties so equal proxies share the load."""
+        now = time.time()
+        count = len(proxies)
+        order = {id(proxy): (idx - start) % count for idx, proxy in enumerate(proxies)} if count else {}
+        healthy = [proxy for proxy in proxies if not self._quarantined(proxy_key(proxy), now)]
+        self.skipped += count - len(healthy)
+        healthy.sort(key=lambda proxy: (-round(self._health(proxy).score, 2), order[id(proxy)]))
+        preferred = self.last_success.get(domain) if self._prefer_last_success else None
+        if preferred is not None:
+            healthy.sort(key=lambda proxy: proxy_key(proxy) != preferred)
+        return healthy
+
+    def record(
+        self,
+        proxy: Proxy,
+        domain: str,
+        ok: bool,
+        latency_sec: float,
+        error_code: ErrorCode | None = None,
+    ) -> None:
+        key = proxy_key(proxy)
+        health = self.proxies.setdefault(key, ProxyHealth())
+        health.attempts += 1
+        if ok:
+            health.success_rate += _EWMA_ALPHA * (1.0 - health.success_rate)
+            health.consecutive_failures = 0
+            if health.latency_ewma_sec is None:
+                health.latency_ewma_sec = latency_sec
+            else:
+                health.latency_ewma_sec += _EWMA_ALPHA * (latency_sec - health.latency_ewma_sec)
+            self.last_success[domain] = key
+            return
+        code = error_code or ErrorCode.UNKNOWN
+        health.errors[code.value] += 1
+        if self.last_success.get(domain) == key:
+            del self.last_success[domain]
+        if code not in _PROXY_FAULTS:
+            return
+        health.success_rate -= _EWMA_ALPHA * health.success_rate
+        health.consecutive_failures += 1
+        health.last_failure_at = time.time()
+
+    def quarantined_count(self) -> int:
+        now = time.time()
+        return sum(1 for key in self.proxies if self._quarantined(key, now))
+
+    def _health(self, proxy: Proxy) -> ProxyHealth:
+        return self.proxies.get(proxy_key(proxy)) or ProxyHealth()
+
+    def _quarantined(self, key: str, now: float) -> bool:
+        health = self.proxies.get(key)
+        if health is None or health.consecutive_failures < self._quarantine_failures:
+            return False
+        return health.last_failure_at is not None and now - health.last_failure_at < self._quarantine_sec
+
+
+def proxy_key(proxy: Proxy) -> str:
+    # host:port only, so credentials never end up in the health file or logs.
+    return f"{proxy.host}:{proxy.port}"
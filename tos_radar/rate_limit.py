@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from tos_radar.models import Proxy
+
+_RESOLVE_TIMEOUT_SEC = 3.0
+# Public suffixes with a second level that is not itself registrable (not a full PSL, just the common ones).
+_SECOND_LEVEL_SUFFIXES = frozenset(
+    {
+        "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.jp", "ne.jp", "or.jp",
+        "com.br", "com.tr", "com.cn", "com.hk", "com.sg", "co.kr", "co.in", "co.il", "co.nz", "co.za",
+        "com.ua", "com.kz", "com.by", "com.ru", "net.ru", "org.ru", "msk.ru", "spb.ru", "com.mx", "com.ar",
+    }
+)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate_per_sec` refill, at most `burst` tokens banked."""
+
+    def __init__(self, rate_per_sec: float, burst: int) -> None:
+        self.rate = rate_per_sec
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1.0
+
+    def reserve(self, now: float) -> float:
+        """Take a token now, possibly going into debt; return how long the caller must wait."""
+        wait = self.delay(now)
+        self._tokens -= 1.0
+        return wait
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    # Requests per minute; 0 disables that bucket kind.
+    domain_per_min: float = 0.0
+    host_per_min: float = 0.0
+    proxy_per_min: float = 0.0
+    burst: int = 1
+    resolve_hosts: bool = False
+
+
+@dataclass
+class SchedulerStats:
+    throttled: Counter[str] = field(default_factory=Counter)
+    wait_sec: Counter[str] = field(default_factory=Counter)
+    proxy_attempts: Counter[str] = field(default_factory=Counter)
+
+
+@dataclass
+class _Waiter:
+    keys: tuple[str, ...]
+    future: asyncio.Future[None]
+    enqueued: float
+    blocked_by: set[str] = field(default_factory=set)
+
+
+class RequestScheduler:
+    """Concurrency slots plus token buckets per registrable domain, resolved host and proxy.
+
+    Waiters are served in FIFO order, but a waiter whose buckets are empty is skipped so
+    throttled hosts never hold a free slot while other domains are ready to go.
+    Proxies are handed out round-robin so retries are spread across the whole list.
+    """
+
+    def __init__(self, concurrency: int, limits: RateLimits) -> None:
+        self._concurrency = max(1, concurrency)
+        self._limits = limits
+        self._active = 0
+        self._waiters: list[_Waiter] = []
+        self._buckets: dict[str, TokenBucket] = {}
+        self._resolved: dict[str, str | None] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._proxy_cursor = 0
+        self.stats = SchedulerStats()
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        keys = await self._bucket_keys(domain)
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(keys=keys, future=loop.create_future(), enqueued=loop.time())
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def next_proxy_start(self, proxy_count: int, retry_proxy_count: int) -> int:
+        if proxy_count == 0:
+            return 0
+        start = self._proxy_cursor % proxy_count
+        self._proxy_cursor += max(1, retry_proxy_count)
+        return start
+
+    async def acquire_proxy(self, proxy: Proxy) -> None:
+        key = f"proxy:{proxy.host}:{proxy.port}"
+        self.stats.proxy_attempts[f"{proxy.host}:{proxy.port}"] += 1
+        if self._limits.proxy_per_min <= 0:
+            return
+        wait = self._bucket(key, self._limits.proxy_per_min).reserve(time.monotonic())
+        if wait > 0:
+            self.stats.throttled["proxy"] += 1
+            self.stats.wait_sec["proxy"] += wait
+            await asyncio.sleep(wait)
+
+    async def _bucket_keys(self, domain: str) -> tuple[str, ...]:
+        keys: list[str] = []
+        if self._limits.domain_per_min > 0:
+            keys.append(f"domain:{registrable_domain(domain)}")
+        if self._limits.host_per_min > 0:
+            address = await self._resolve(domain.split(":", 1)[0]) if self._limits.resolve_hosts else None
+            keys.append(f"host:{address or domain.split(':', 1)[0]}")
+        return tuple(keys)
+
+    async def _resolve(self, host: str) -> str | None:
+        if host in self._resolved:
+            return self._resolved[host]
+        try:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, 443),
+                timeout=_RESOLVE_TIMEOUT_SEC,
+            )
+            address = str(infos[0][4][0]) if infos else None
+        except (OSError, TimeoutError):
+            address = None
+        self._resolved[host] = address
+        return address
+
+    def _bucket(self, key: str, per_min: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(per_min / 60.0, self._limits.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _rate_for(self, key: str) -> float:
+        kind = key.split(":", 1)[0]
+        return self._limits.domain_per_min if kind == "domain" else self._limits.host_per_min
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        earliest: float | None = None
+        for waiter in list(self._waiters):
+            if self._active >= self._concurrency:
+                break
+            buckets = {key: self._bucket(key, self._rate_for(key)) for key in waiter.keys}
+            delays = {key: bucket.delay(now) for key, bucket in buckets.items()}
+            delay = max(delays.values(), default=0.0)
+            if delay > 0:
+                waiter.blocked_by.update(key.split(":", 1)[0] for key, value in delays.items() if value > 0)
+                earliest = delay if earliest is None else min(earliest, delay)
+                continue
+            for bucket in buckets.values():
+                bucket.take(now)
+            self._waiters.remove(waiter)
+            self._active += 1
+            waited = loop.time() - waiter.enqueued
+            for kind in waiter.blocked_by:
+                self.stats.throttled[kind] += 1
+                self.stats.wait_sec[kind] += waited
+            waiter.future.set_result(None)
+        if earliest is not None and self._waiters and self._active < self._concurrency:
+            self._timer = loop.call_later(earliest, self._dispatch)
+
+
+def registrable_domain(host: str) -> str:
+    """example.co.uk for www.legal.example.co.uk; IP literals and single labels are returned as-is."""
+    name = host.split(":", 1)[0].strip(".").lower()
+    try:
+        ipaddress.ip_address(name)
+        return name
+    except ValueError:
+        pass
+    labels = name.split(".")
+    if len(labels) <= 2:
+        return name
+    if ".".join(labels[-2:]) in _SECOND_LEVEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
@@ -1,40 +1,159 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import re
+import shutil
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
 from tos_radar.change_classifier import is_suspicious_changed
-from tos_radar.models import RunEntry
+from tos_radar.models import ReportLayout, RunEntry
 
 _REPORT_DATA_MARKER = "__REPORT_DATA_JSON__"
+_SHARDED_INDEX = "index.html"
+_DIFFS_DIR = "diffs"
+# Fragments are JSONP scripts: report pages are opened from file://, where fetch() is blocked.
+_DIFF_CALLBACK = "__reportDiff"
+_UNSAFE_NAME_RE = re.compile(r"[^a-z0-9.\-]")
 
 
-def write_report(entries: list[RunEntry], mode: str, tenant_id: str) -> Path:
-    reports_dir = Path("reports") / tenant_id
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    report_path = reports_dir / f"report-{ts}.html"
-    report_path.write_text(_render(entries, mode), encoding="utf-8")
-    return report_path
+class ReportWriter:
+    """Builds the HTML report incrementally so memory is bounded by the largest single item.
+
+    Items are serialized to an anonymous spool file as entries complete; a later entry for the
+    same domain (e.g. the retry of a failed one) replaces the earlier item. `finish` streams
+    template head, the items sorted by domain and template tail into the report file.
+
+    With the sharded layout the report is a directory: `index.html` carries only the item index
+    and every diff is written right away to `diffs/<domain>.js`, loaded when its card is opened.
+    """
+
+    def __init__(self, mode: str, tenant_id: str, layout: ReportLayout = ReportLayout.SINGLE) -> None:
+        self._mode = mode
+        self._layout = layout
+        self._reports_dir = Path("reports") / tenant_id
+        self._reports_dir.mkdir(parents=True, exist_ok=True)
+        self._name = f"report-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        self._shard_dir: Path | None = None
+        if layout == ReportLayout.SHARDED:
+            self._shard_dir = self._reports_dir / f"{self._name}.partial"
+            (self._shard_dir / _DIFFS_DIR).mkdir(parents=True, exist_ok=True)
+        self._spool = tempfile.TemporaryFile(dir=self._reports_dir)
+        self._offsets: dict[str, int] = {}
+
+    def add(self, entry: RunEntry) -> None:
+        item = _entry_to_item(entry)
+        if self._shard_dir is not None:
+            item = _shard_diff(self._shard_dir, entry.domain, item)
+        self._spool.seek(0, os.SEEK_END)
+        self._offsets[entry.domain] = self._spool.tell()
+        self._spool.write(_dump_json(item).encode("utf-8") + b"\n")
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def finish(self) -> Path:
+        head, tail = _load_template().split(_REPORT_DATA_MARKER, 1)
+        if self._shard_dir is not None:
+            report_path = self._shard_dir / _SHARDED_INDEX
+            partial_path = report_path
+        else:
+            report_path = self._reports_dir / f"{self._name}.html"
+            partial_path = report_path.with_name(report_path.name + ".partial")
+        with partial_path.open("wb") as out:
+            out.write(head.encode("utf-8"))
+            header = {"generated": datetime.now().isoformat(timespec="seconds"), "mode": self._mode}
+            out.write(_dump_json(header)[:-1].encode("utf-8") + b', "items": [')
+            for idx, domain in enumerate(sorted(self._offsets)):
+                self._spool.seek(self._offsets[domain])
+                if idx:
+                    out.write(b", ")
+                out.write(self._spool.readline().rstrip(b"\n"))
+            out.write(b"]}")
+            out.write(tail.encode("utf-8"))
+        if self._shard_dir is not None:
+            final_dir = self._reports_dir / self._name
+            os.replace(self._shard_dir, final_dir)
+            self._shard_dir = None
+            report_path = final_dir / _SHARDED_INDEX
+        else:
+            os.replace(partial_path, report_path)
+        self.close()
+        return report_path
+
+    def close(self) -> None:
+        self._spool.close()
+        if self._shard_dir is not None:
+            shutil.rmtree(self._shard_dir, ignore_errors=True)
+            self._shard_dir = None
+
+
+def write_report(
+    entries: list[RunEntry],
+    mode: str,
+    tenant_id: str,
+    layout: ReportLayout = ReportLayout.SINGLE,
+) -> Path:
+    writer = ReportWriter(mode, tenant_id, layout)
+    try:
+        for entry in entries:
+            writer.add(entry)
+        return writer.finish()
+    finally:
+        writer.close()
 
 
 def find_latest_report(tenant_id: str) -> Path | None:
     reports_dir = Path("reports") / tenant_id
     if not reports_dir.exists():
         return None
-    reports = sorted(reports_dir.glob("report-*.html"))
-    return reports[-1] if reports else None
+    reports = list(reports_dir.glob("report-*.html"))
+    reports.extend(
+        path / _SHARDED_INDEX
+        for path in reports_dir.glob("report-*")
+        if path.is_dir() and not path.name.endswith(".partial") and (path / _SHARDED_INDEX).exists()
+    )
+    return max(reports, key=_report_sort_key, default=None)
 
 
-def _render(entries: list[RunEntry], mode: str) -> str:
-    template = _load_template()
-    payload = {
-        "generated": datetime.now().isoformat(timespec="seconds"),
-        "mode": mode,
-        "items": [_entry_to_item(entry) for entry in entries],
-    }
-    return template.replace(_REPORT_DATA_MARKER, json.dumps(payload, ensure_ascii=False))
+def _report_sort_key(path: Path) -> str:
+    return path.parent.name if path.name == _SHARDED_INDEX else path.name.removesuffix(".html")
+
+
+def _shard_diff(shard_dir: Path, domain: str, item: dict[str, object]) -> dict[str, object]:
+    ref = f"{_DIFFS_DIR}/{_fragment_name(domain)}.js"
+    fragment = shard_dir / ref
+    diff = item.pop("diff")
+    if not isinstance(diff, dict):
+        # A retried domain may no longer have a diff; drop the stale fragment.
+        fragment.unlink(missing_ok=True)
+        return {**item, "diff": None}
+    fragment.write_text(f"{_DIFF_CALLBACK}({_dump_json(ref)}, {_dump_json(diff)});\n", encoding="utf-8")
+    summary = {key: diff.get(key) for key in ("added", "removed", "changed")}
+    return {**item, "diff": None, "diff_ref": ref, "diff_summary": summary}
+
+
+def _fragment_name(domain: str) -> str:
+    # Punycode keeps IDN domains (банк.рф, сайт.рф) apart; anything still unsafe gets a hash suffix.
+    host, _, port = domain.lower().partition(":")
+    try:
+        name = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        name = host
+    if port:
+        name = f"{name}_{port}"
+    safe = _UNSAFE_NAME_RE.sub("_", name)
+    if safe != name:
+        safe = f"{safe}-{hashlib.sha256(domain.encode('utf-8')).hexdigest()[:12]}"
+    return safe
+
+
+def _dump_json(value: object) -> str:
+    # "</" is escaped so document text can never close the surrounding <script> tag.
+    return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
 
 
 def _entry_to_item(entry: RunEntry) -> dict[str, object]:
@@ -52,11 +171,13 @@ def _entry_to_item(entry: RunEntry) -> dict[str, object]:
         "duration": f"{entry.duration_sec:.2f}s",
         "error_code": entry.error_code.value if entry.error_code else None,
         "error": entry.error,
-        "diff_html": entry.diff_html,
+        "diff": entry.diff,
         "text_length": entry.text_length,
         "change_level": entry.change_level.value if entry.change_level else None,
         "change_ratio": entry.change_ratio,
         "suspicious": suspicious,
+        "revalidated": entry.revalidated,
+        "timeout_sec": entry.timeout_sec,
     }
 
 
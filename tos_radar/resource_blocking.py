@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Mapping
+from urllib.parse import urlsplit
+
+# Playwright `request.resource_type` values, plus two pseudo-types handled here.
+RESOURCE_TYPES = frozenset(
+    {
+        "stylesheet",
+        "image",
+        "media",
+        "font",
+        "script",
+        "texttrack",
+        "xhr",
+        "fetch",
+        "eventsource",
+        "websocket",
+        "manifest",
+        "other",
+    }
+)
+TRACKER = "tracker"
+SUBFRAME = "subframe"
+DEFAULT_BLOCKED_RESOURCES = "image,media,font,tracker,subframe"
+# Analytics, ad and pixel hosts; subdomains match too. Their responses never carry document text.
+_TRACKER_HOSTS = frozenset(
+    {
+        "google-analytics.com",
+        "googletagmanager.com",
+        "googleadservices.com",
+        "googlesyndication.com",
+        "doubleclick.net",
+        "connect.facebook.net",
+        "mc.yandex.ru",
+        "mc.yandex.com",
+        "an.yandex.ru",
+        "top-fwz1.mail.ru",
+        "hotjar.com",
+        "clarity.ms",
+        "criteo.com",
+        "criteo.net",
+        "segment.io",
+        "cdn.segment.com",
+        "mixpanel.com",
+        "amplitude.com",
+        "newrelic.com",
+        "nr-data.net",
+        "sentry.io",
+        "analytics.tiktok.com",
+        "bat.bing.com",
+        "ads.linkedin.com",
+        "snap.licdn.com",
+        "static.ads-twitter.com",
+    }
+)
+
+
+def parse_blocked_resources(value: str) -> frozenset[str]:
+    """Comma-separated resource types, `tracker` and `subframe`; an empty value blocks nothing."""
+    tokens = frozenset(token.strip().lower() for token in value.split(",") if token.strip())
+    unknown = tokens - RESOURCE_TYPES - {TRACKER, SUBFRAME}
+    if unknown:
+        msg = f"Unknown resource types to block: {', '.join(sorted(unknown))}"
+        raise ValueError(msg)
+    return tokens
+
+
+def blocked_for(domain: str, blocked: frozenset[str], allowlist: Mapping[str, frozenset[str]]) -> frozenset[str]:
+    """What to block on one domain: the allowlist entry removes its tokens, an empty entry removes all."""
+    allowed = allowlist.get(domain)
+    if allowed is None:
+        return blocked
+    if not allowed:
+        return frozenset()
+    return blocked - allowed
+
+
+def should_block(
+    blocked: frozenset[str],
+    resource_type: str,
+    url: str,
+    subframe: bool = False,
+    site: str = "",
+) -> bool:
+    """Whether a request of the page on `site` is aborted; the page's own document always loads."""
+    if not blocked:
+        return False
+    if subframe and SUBFRAME in blocked:
+        return True
+    if resource_type == "document" and not subframe:
+        return False
+    if resource_type in blocked:
+        return True
+    return TRACKER in blocked and is_tracker_host(urlsplit(url).hostname or "", site)
+
+
+def is_tracker_host(host: str, site: str = "") -> bool:
+    host = host.lower().rstrip(".")
+    site = site.lower().removeprefix("www.")
+    if site and (host == site or host.endswith("." + site) or site.endswith("." + host)):
+        # The tracker's own pages (analytics vendors have terms too) are first-party there.
+        return False
+    while host:
+        if host in _TRACKER_HOSTS:
+            return True
+        _, _, host = host.partition(".")
+    return False
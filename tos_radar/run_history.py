@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from tos_radar.models import RunEntry
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        finished_at TEXT NOT NULL,
+        services INTEGER NOT NULL,
+        report_path TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        run_id INTEGER NOT NULL REFERENCES runs(id),
+        tenant_id TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        ts TEXT NOT NULL,
+        url TEXT NOT NULL,
+        status TEXT NOT NULL,
+        source_type TEXT,
+        duration_sec REAL NOT NULL,
+        text_length INTEGER,
+        change_level TEXT,
+        change_ratio REAL,
+        error_code TEXT,
+        error TEXT,
+        attempt INTEGER,
+        proxy TEXT,
+        timeout_sec INTEGER,
+        revalidated INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_entries_tenant_domain_ts ON entries (tenant_id, domain, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_entries_tenant_ts ON entries (tenant_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_tenant_started ON runs (tenant_id, started_at)",
+)
+
+
+@dataclass(frozen=True)
+class DomainSummary:
+    domain: str
+    runs: int
+    failed: int
+    changed: int
+    top_error: str | None
+    last_status: str
+    avg_duration_sec: float
+
+
+class RunHistory:
+    """Embedded SQLite index over all runs of all tenants (one row per RunEntry)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+
+    def record_run(
+        self,
+        tenant_id: str,
+        mode: str,
+        started_at: datetime,
+        finished_at: datetime,
+        entries: Sequence[RunEntry],
+        report_path: Path | None = None,
+    ) -> int:
+        # One transaction per run: a single fsync no matter how many domains were scanned.
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (tenant_id, mode, started_at, finished_at, services, report_path) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    tenant_id,
+                    mode,
+                    _ts(started_at),
+                    _ts(finished_at),
+                    len(entries),
+                    str(report_path) if report_path else None,
+                ),
+            )
+            run_id = int(cursor.lastrowid or 0)
+            conn.executemany(
+                "INSERT INTO entries (run_id, tenant_id, domain, ts, url, status, source_type, duration_sec, "
+                "text_length, change_level, change_ratio, error_code, error, attempt, proxy, timeout_sec, revalidated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [_entry_row(run_id, tenant_id, _ts(finished_at), entry) for entry in entries],
+            )
+        return run_id
+
+    def domain_summaries(self, tenant_id: str, since: datetime, limit: int | None = 20) -> list[DomainSummary]:
+        """Per-domain run counts since `since`, most failing first; `limit=None` returns every domain."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT domain,
+                       COUNT(*) AS runs,
+                       SUM(status = 'FAILED') AS failed,
+                       SUM(status = 'CHANGED') AS changed,
+                       (SELECT error_code FROM entries e2
+                         WHERE e2.tenant_id = e.tenant_id AND e2.domain = e.domain AND e2.ts >= ?
+                           AND e2.error_code IS NOT NULL
+                         GROUP BY error_code ORDER BY COUNT(*) DESC, error_code LIMIT 1) AS top_error,
+                       (SELECT status FROM entries e3
+                         WHERE e3.tenant_id = e.tenant_id AND e3.domain = e.domain
+                         ORDER BY ts DESC, run_id DESC LIMIT 1) AS last_status,
+                       AVG(duration_sec) AS avg_duration
+                  FROM entries e
+                 WHERE tenant_id = ? AND ts >= ?
+                 GROUP BY domain
+                 ORDER BY failed DESC, changed DESC, domain
+                 LIMIT ?
+                """,
+                # SQLite reads a negative LIMIT as no limit.
+                (_ts(since), tenant_id, _ts(since), limit if limit is not None else -1),
+            ).fetchall()
+        return [
+            DomainSummary(
+                domain=row[0],
+                runs=int(row[1]),
+                failed=int(row[2] or 0),
+                changed=int(row[3] or 0),
+                top_error=row[4],
+                last_status=row[5],
+                avg_duration_sec=float(row[6] or 0.0),
+            )
+            for row in rows
+        ]
+
+    def domain_entries(self, tenant_id: str, domain: str, limit: int = 20) -> list[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT ts, status, source_type, duration_sec, change_level, change_ratio, error_code, "
+                "attempt, proxy, timeout_sec FROM entries WHERE tenant_id = ? AND domain = ? "
+                "ORDER BY ts DESC, run_id DESC LIMIT ?",
+                (tenant_id, domain, limit),
+            ).fetchall()
+
+    def recent_runs(self, tenant_id: str, limit: int = 20) -> list[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                """
+                SELECT r.id, r.mode, r.started_at, r.finished_at, r.services,
+                       SUM(e.status = 'FAILED') AS failed, SUM(e.status = 'CHANGED') AS changed
+                  FROM runs r LEFT JOIN entries e ON e.run_id = r.id
+                 WHERE r.tenant_id = ?
+                 GROUP BY r.id
+                 ORDER BY r.started_at DESC, r.id DESC
+                 LIMIT ?
+                """,
+                (tenant_id, limit),
+            ).fetchall()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def history_lines(
+    history: RunHistory,
+    tenant_id: str,
+    domain: str | None,
+    days: int,
+    limit: int,
+    runs: bool,
+) -> list[str]:
+    """Plain-text tables for the `history` CLI command."""
+    if runs:
+        lines = [
+            f"{'run':>5} {'mode':<8} {'started':<19} {'finished':<19} {'services':>8} {'failed':>6} {'changed':>7}"
+        ]
+        for row in history.recent_runs(tenant_id, limit):
+            lines.append(
+                f"{row['id']:>5} {row['mode']:<8} {row['started_at']:<19} {row['finished_at']:<19} "
+                f"{row['services']:>8} {row['failed'] or 0:>6} {row['changed'] or 0:>7}"
+            )
+        return lines
+    if domain:
+        lines = [
+            f"{'ts':<19} {'status':<9} {'source':<6} {'sec':>7} {'level':<6} {'ratio':>7} "
+            f"{'error':<16} {'try':>3} proxy"
+        ]
+        for row in history.domain_entries(tenant_id, domain, limit):
+            ratio = f"{row['change_ratio']:.4f}" if row["change_ratio"] is not None else "-"
+            lines.append(
+                f"{row['ts']:<19} {row['status']:<9} {row['source_type'] or '-':<6} {row['duration_sec']:>7.2f} "
+                f"{row['change_level'] or '-':<6} {ratio:>7} {row['error_code'] or '-':<16} "
+                f"{row['attempt'] if row['attempt'] is not None else '-':>3} {row['proxy'] or '-'}"
+            )
+        return lines
+    since = datetime.now() - timedelta(days=days)
+    lines = [
+        f"{'domain':<40} {'runs':>5} {'failed':>6} {'fail%':>6} {'changed':>7} {'avg_sec':>7} {'top_error':<16} last"
+    ]
+    for item in history.domain_summaries(tenant_id, since, limit):
+        lines.append(
+            f"{item.domain:<40} {item.runs:>5} {item.failed:>6} {100.0 * item.failed / item.runs:>5.1f}% "
+            f"{item.changed:>7} {item.avg_duration_sec:>7.2f} {item.top_error or '-':<16} {item.last_status}"
+        )
+    return lines
+
+
+def _entry_row(run_id: int, tenant_id: str, ts: str, entry: RunEntry) -> tuple[object, ...]:
+    return (
+        run_id,
+        tenant_id,
+        entry.domain,
+        ts,
+        entry.url,
+        entry.status.value,
+        entry.source_type.value if entry.source_type else None,
+        entry.duration_sec,
+        entry.text_length,
+        entry.change_level.value if entry.change_level else None,
+        entry.change_ratio,
+        entry.error_code.value if entry.error_code else None,
+        entry.error,
+        entry.attempt,
+        entry.proxy_used,
+        entry.timeout_sec,
+        int(entry.revalidated),
+    )
+
+
+def _ts(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
@@ -4,30 +4,114 @@ import asyncio
 import logging
 import os
 import platform
+import sqlite3
 import subprocess
 import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Awaitable, Callable
 from urllib.parse import urlparse
 
-from tos_radar.config import load_proxies, load_services
+from tos_radar.browser_pool import BrowserPool
+from tos_radar.config import (
+    load_extraction_overrides,
+    load_proxies,
+    load_resource_allowlist,
+    load_services,
+    load_tenant_services,
+)
 from tos_radar.change_classifier import classify_change
-from tos_radar.diff_utils import build_diff_html, is_changed
-from tos_radar.fetcher import fetch_with_retries
+from tos_radar.check_schedule import CheckSchedule, SchedulePolicy, write_schedule
+from tos_radar.checkpoint import RunCheckpoint
+from tos_radar.compute import ComputeStage
+from tos_radar.diff_utils import build_diff, compare_digest
+from tos_radar.fanout import FetchFanout
+from tos_radar.fetch_profile import (
+    FetchProfile,
+    derive_attempt_timeout,
+    derive_ready_max_ms,
+    read_fetch_profile,
+    write_fetch_profile,
+)
+from tos_radar.fetcher import FIXED_SETTLE_SEC, FetchOptions, fetch_with_retries
 from tos_radar.models import AppSettings
-from tos_radar.models import ErrorCode, RunEntry, Service, SourceType, Status
+from tos_radar.models import ErrorCode, FetchResult, FetchTier, Proxy, RunEntry, Service, SourceType, Status
 from tos_radar.normalize import normalize_for_storage
-from tos_radar.report import find_latest_report, write_report
-from tos_radar.state_store import read_current, write_current_and_rotate
+from tos_radar.pdf_text import PDF_TEXT_CACHE
+from tos_radar.proxy_health import ProxyHealthRegistry
+from tos_radar.rate_limit import RateLimits, RequestScheduler
+from tos_radar.report import ReportWriter, find_latest_report
+from tos_radar.resource_blocking import blocked_for
+from tos_radar.run_history import RunHistory
+from tos_radar.scan_planner import ScanPlan, estimate_services, plan_lines, plan_scan
+from tos_radar.state_store import (
+    has_current,
+    read_current,
+    read_current_digest,
+    read_validators,
+    recover_journal,
+    write_validators,
+)
+from tos_radar.state_writer import StateWriter
+from tos_radar.text_cache import TextCache
+from tos_radar.work_queue import FetchJob, QueueFetcher, WorkQueue
 
 LOGGER = logging.getLogger(__name__)
+# Run history window the scan planner estimates durations and failure rates from.
+_PLAN_HISTORY_DAYS = 30
+# Upper bound for one idle sleep of the schedule daemon, so URL list edits are picked up promptly.
+_SCHEDULE_MAX_SLEEP_SEC = 60.0
+
+
+@dataclass(frozen=True)
+class _ScanResources:
+    """Shared by all tenants of one process run: fetch slots, browsers, compute workers, proxies."""
+
+    proxies: list[Proxy]
+    scheduler: RequestScheduler
+    browser_pool: BrowserPool
+    compute_stage: ComputeStage
+    fanout: FetchFanout | None = None
+    remote: QueueFetcher | None = None
+    text_cache: TextCache | None = None
+
+
+class _StateWriteError(RuntimeError):
+    """The state writer could not store a new document version."""
 
 
 def run_init(settings: AppSettings) -> int:
     return asyncio.run(_run(mode="init", settings=settings))
 
 
-def run_scan(settings: AppSettings) -> int:
-    return asyncio.run(_run(mode="run", settings=settings))
+def run_scan(settings: AppSettings, resume: bool = False) -> int:
+    return asyncio.run(_run(mode="run", settings=settings, resume=resume))
+
+
+def run_coordinator(settings: AppSettings, resume: bool = False) -> int:
+    return asyncio.run(_run(mode="run", settings=settings, distributed=True, resume=resume))
+
+
+def run_worker(settings: AppSettings, idle_exit_sec: float | None = None) -> int:
+    return asyncio.run(_work(settings, idle_exit_sec))
+
+
+def run_schedule(settings: AppSettings) -> int:
+    return asyncio.run(_schedule(settings))
+
+
+def run_all_tenants(settings: AppSettings, resume: bool = False) -> int:
+    return asyncio.run(_run_all(settings, resume))
+
+
+def scan_plan_lines(settings: AppSettings) -> list[str]:
+    """Dispatch order and predicted makespan of a `run`, without fetching anything."""
+    services = load_services(settings.tos_urls_file)
+    if not services:
+        return [f"No URLs found in {settings.tos_urls_file}"]
+    return plan_lines(_plan_scan(settings, services))
 
 
 def run_rerun_failed(settings: AppSettings) -> int:
@@ -59,162 +143,554 @@ def open_last_report(settings: AppSettings) -> int:
     return 0
 
 
-async def _run(mode: str, settings: AppSettings, services_override: list[Service] | None = None) -> int:
+async def _run(
+    mode: str,
+    settings: AppSettings,
+    services_override: list[Service] | None = None,
+    distributed: bool = False,
+    resume: bool = False,
+) -> int:
     services = services_override if services_override is not None else load_services(settings.tos_urls_file)
-    proxies = load_proxies(settings.proxies_file)
     if not services:
         LOGGER.error("No URLs found in %s", settings.tos_urls_file)
         return 1
 
     LOGGER.info(
-        "Starting mode=%s services=%s concurrency=%s timeout=%ss proxy_retries=%s",
+        "Starting mode=%s services=%s concurrency=%s timeout=%ss proxy_retries=%s fetch_mode=%s",
         mode,
         len(services),
         settings.concurrency,
         settings.timeout_sec,
         settings.retry_proxy_count,
+        settings.fetch_mode.value,
+    )
+    resources = _scan_resources(settings, fanout=None)
+    if distributed:
+        scan_id = f"{settings.tenant_id}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        LOGGER.info("Coordinating scan=%s via work queue %s", scan_id, settings.work_queue_db)
+        queue = WorkQueue(settings.work_queue_db, max_attempts=settings.work_queue_max_attempts)
+        resources = replace(
+            resources,
+            remote=QueueFetcher(queue, scan_id, settings.tenant_id, poll_sec=settings.work_queue_poll_sec),
+        )
+    try:
+        async with resources.browser_pool, resources.compute_stage:
+            await _scan_tenant(mode, settings, services, resources, resume)
+    finally:
+        if resources.remote is not None:
+            resources.remote.close()
+    _log_resource_stats(resources)
+    return 0
+
+
+async def _run_all(settings: AppSettings, resume: bool = False) -> int:
+    tenants = load_tenant_services(settings.tenants_dir)
+    if not tenants:
+        LOGGER.error("No tenant URL lists found in %s", settings.tenants_dir)
+        return 1
+
+    subscribers = Counter(service.url for services in tenants.values() for service in services)
+    LOGGER.info(
+        "Starting mode=run-all tenants=%s services=%s unique_urls=%s concurrency=%s timeout=%ss fetch_mode=%s",
+        len(tenants),
+        sum(subscribers.values()),
+        len(subscribers),
+        settings.concurrency,
+        settings.timeout_sec,
+        settings.fetch_mode.value,
     )
+    fanout = FetchFanout(subscribers)
+    resources = _scan_resources(settings, fanout=fanout)
+    async with resources.browser_pool, resources.compute_stage:
+        try:
+            await asyncio.gather(
+                *(
+                    _scan_tenant("run", _tenant_settings(settings, tenant_id), services, resources, resume)
+                    for tenant_id, services in tenants.items()
+                )
+            )
+        finally:
+            fanout.close()
+    _log_resource_stats(resources)
+    LOGGER.info(
+        "Fetch fan-out tenants=%s subscriptions=%s unique_urls=%s fetches=%s saved=%s",
+        len(tenants),
+        sum(subscribers.values()),
+        len(subscribers),
+        fanout.stats.fetches,
+        fanout.stats.saved,
+    )
+    return 0
+
+
+async def _work(settings: AppSettings, idle_exit_sec: float | None) -> int:
+    """Worker loop: lease fetch jobs from the shared queue, fetch them and write the results back."""
+    worker_id = f"{platform.node() or 'worker'}-{os.getpid()}"
+    queue = WorkQueue(settings.work_queue_db, max_attempts=settings.work_queue_max_attempts)
+    resources = _scan_resources(settings, fanout=None)
+    health: dict[str, ProxyHealthRegistry] = {}
+    running: set[asyncio.Task[None]] = set()
+    done_jobs = 0
+    LOGGER.info("Worker %s started queue=%s concurrency=%s", worker_id, settings.work_queue_db, settings.concurrency)
+
+    async def execute(job: FetchJob) -> None:
+        proxy_health = health.get(job.tenant_id)
+        if proxy_health is None:
+            proxy_health = ProxyHealthRegistry.load(
+                job.tenant_id,
+                quarantine_failures=settings.proxy_quarantine_failures,
+                quarantine_sec=settings.proxy_quarantine_sec,
+                prefer_last_success=settings.proxy_prefer_last_success,
+            )
+            health[job.tenant_id] = proxy_health
+        async def fetch() -> FetchResult:
+            # The slot wait is inside the hard timeout: time spent throttled must not outlive the lease.
+            async with resources.scheduler.slot(job.service.domain):
+                return await fetch_with_retries(
+                    service=job.service,
+                    timeout_sec=job.timeout_sec,
+                    retry_proxy_count=settings.retry_proxy_count,
+                    retry_backoff_base_sec=settings.retry_backoff_base_sec,
+                    retry_backoff_max_sec=settings.retry_backoff_max_sec,
+                    retry_jitter_sec=settings.retry_jitter_sec,
+                    proxies=resources.proxies,
+                    browser_pool=resources.browser_pool,
+                    compute_stage=resources.compute_stage,
+                    scheduler=resources.scheduler,
+                    proxy_health=proxy_health,
+                    text_cache=resources.text_cache,
+                    options=job.options,
+                )
+
+        try:
+            result = await asyncio.wait_for(fetch(), timeout=job.hard_timeout_sec)
+        except TimeoutError:
+            result = _failed_fetch(ErrorCode.TIMEOUT, f"Service hard-timeout after {job.hard_timeout_sec}s")
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("Job failed id=%s domain=%s due to unhandled error", job.id, job.service.domain)
+            result = _failed_fetch(ErrorCode.UNKNOWN, f"Unhandled worker error: {exc}")
+        if await asyncio.to_thread(queue.complete, job.id, worker_id, result):
+            LOGGER.info("Job done id=%s domain=%s ok=%s lease=%s", job.id, job.service.domain, result.ok, job.attempts)
+        else:
+            LOGGER.warning("Job result discarded id=%s domain=%s: lease lost", job.id, job.service.domain)
+
+    async with resources.browser_pool, resources.compute_stage:
+        idle_since = time.monotonic()
+        try:
+            while True:
+                jobs = await asyncio.to_thread(queue.lease, worker_id, settings.concurrency - len(running))
+                for job in jobs:
+                    task = asyncio.create_task(execute(job))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                done_jobs += len(jobs)
+                if jobs or running:
+                    idle_since = time.monotonic()
+                elif idle_exit_sec is not None and time.monotonic() - idle_since >= idle_exit_sec:
+                    break
+                await asyncio.sleep(0 if jobs else settings.work_queue_poll_sec)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            for proxy_health in health.values():
+                proxy_health.save()
+    _log_resource_stats(resources)
+    LOGGER.info("Worker %s stopped jobs=%s", worker_id, done_jobs)
+    return 0
+
+
+async def _schedule(settings: AppSettings) -> int:
+    """Daemon loop: check every domain when it is due and publish a rolling report per window.
+
+    Each report window is one `_scan_tenant` run whose workers pull due domains from the schedule
+    as they free up; each outcome moves the domain's next check closer (changed, failed) or
+    further away (unchanged). The window gets one report and one run history record.
+    """
+    policy = SchedulePolicy(
+        min_interval_sec=settings.schedule_min_interval_sec,
+        max_interval_sec=settings.schedule_max_interval_sec,
+        default_interval_sec=settings.schedule_default_interval_sec,
+    )
+    schedule = CheckSchedule(settings.tenant_id, policy)
+    schedule.sync(load_services(settings.tos_urls_file), time.time())
+    if not len(schedule):
+        LOGGER.error("No URLs found in %s", settings.tos_urls_file)
+        return 1
+
+    LOGGER.info(
+        "Starting mode=schedule services=%s concurrency=%s interval=%ss..%ss default=%ss report_every=%ss",
+        len(schedule),
+        settings.concurrency,
+        policy.min_interval_sec,
+        policy.max_interval_sec,
+        policy.default_interval_sec,
+        settings.schedule_report_sec,
+    )
+    resources = _scan_resources(settings, fanout=None)
+    report: ReportWriter | None = None
+    window_ends = 0.0
+    synced_at = time.monotonic()
+
+    async def next_due() -> Service | None:
+        nonlocal synced_at
+        while True:
+            now = time.time()
+            if now >= window_ends:
+                return None
+            if time.monotonic() - synced_at >= _SCHEDULE_MAX_SLEEP_SEC:
+                schedule.sync(load_services(settings.tos_urls_file), now)
+                synced_at = time.monotonic()
+            due = schedule.pop_due(now, limit=1)
+            if due:
+                return due[0]
+            wake_at = min(schedule.next_due_at() or window_ends, window_ends)
+            await asyncio.sleep(min(_SCHEDULE_MAX_SLEEP_SEC, max(0.0, wake_at - now)))
 
-    semaphore = asyncio.Semaphore(settings.concurrency)
+    async def record(entry: RunEntry, state_writer: StateWriter) -> None:
+        planned = schedule.record(entry.domain, entry.status, time.time(), persist=False)
+        if planned is not None:
+            await state_writer.submit_file(write_schedule, settings.tenant_id, entry.domain, planned)
+
+    def publish() -> None:
+        nonlocal report
+        if report is None:
+            return
+        if len(report):
+            LOGGER.info("Rolling report published entries=%s: %s", len(report), report.finish())
+        else:
+            report.close()
+        report = None
+
+    async with resources.browser_pool, resources.compute_stage:
+        try:
+            while True:
+                window_ends = time.time() + settings.schedule_report_sec
+                report = ReportWriter("schedule", settings.tenant_id, settings.report_layout)
+                entries = await _scan_tenant(
+                    "schedule", settings, [], resources, report=report, feed=next_due, on_entry=record
+                )
+                publish()
+                _log_resource_stats(resources)
+                LOGGER.info("Schedule window done checked=%s services=%s", len(entries), len(schedule))
+        finally:
+            # Interrupted or stopped: the checks of the current window still get their report.
+            publish()
+    return 0
+
+
+def _failed_fetch(code: ErrorCode, message: str) -> FetchResult:
+    return FetchResult(ok=False, text="", source_type=SourceType.HTML, attempt=0, error_code=code, error=message)
+
+
+def _scan_resources(settings: AppSettings, fanout: FetchFanout | None) -> _ScanResources:
+    proxies = load_proxies(settings.proxies_file)
+    limits = RateLimits(
+        domain_per_min=settings.rate_limit_domain_per_min,
+        host_per_min=settings.rate_limit_host_per_min,
+        proxy_per_min=settings.rate_limit_proxy_per_min,
+        burst=settings.rate_limit_burst,
+        resolve_hosts=settings.rate_limit_resolve_hosts,
+    )
+    LOGGER.info(
+        "Rate limits per_min domain=%s host=%s proxy=%s burst=%s resolve_hosts=%s proxies=%s",
+        limits.domain_per_min,
+        limits.host_per_min,
+        limits.proxy_per_min,
+        limits.burst,
+        limits.resolve_hosts,
+        len(proxies),
+    )
+    text_cache = None
+    if settings.text_cache_max_bytes > 0:
+        text_cache = TextCache(settings.text_cache_dir, settings.text_cache_max_bytes)
+    return _ScanResources(
+        proxies=proxies,
+        scheduler=RequestScheduler(settings.concurrency, limits),
+        browser_pool=BrowserPool(
+            max_browsers=settings.browser_pool_size,
+            max_pages_per_browser=settings.browser_max_pages,
+        ),
+        compute_stage=ComputeStage(workers=settings.compute_workers, max_pending=settings.compute_queue_depth),
+        fanout=fanout,
+        text_cache=text_cache,
+    )
+
+
+def _tenant_settings(settings: AppSettings, tenant_id: str) -> AppSettings:
+    return replace(settings, tenant_id=tenant_id, tos_urls_file=str(Path(settings.tenants_dir) / f"{tenant_id}.txt"))
+
+
+async def _scan_tenant(
+    mode: str,
+    settings: AppSettings,
+    services: list[Service],
+    resources: _ScanResources,
+    resume: bool = False,
+    report: ReportWriter | None = None,
+    feed: Callable[[], Awaitable[Service | None]] | None = None,
+    on_entry: Callable[[RunEntry, StateWriter], Awaitable[None]] | None = None,
+) -> list[RunEntry]:
+    """Fetch, compare and store one tenant's services; writes its report, failed list and history.
+
+    Every finished entry is checkpointed; with `resume` the domains of an interrupted run are
+    taken from the checkpoint instead of being fetched again. With a caller-owned `report`
+    (the rolling report of the schedule daemon) the entries are only added to it, and neither
+    the failed list nor the checkpoint is touched.
+
+    With a `feed`, `concurrency` workers keep pulling services from it until it returns None;
+    `on_entry` sees each of their entries as soon as it is done, with the state writer for its own files.
+    """
+    if settings.scan_order_by_cost and services:
+        plan = _plan_scan(settings, services)
+        services = plan.services
+        LOGGER.info(
+            "Scan plan tenant=%s services=%s predicted_makespan=%.0fs file_order=%.0fs",
+            settings.tenant_id,
+            len(services),
+            plan.makespan_sec,
+            plan.file_order_makespan_sec,
+        )
+    proxy_health = ProxyHealthRegistry.load(
+        settings.tenant_id,
+        quarantine_failures=settings.proxy_quarantine_failures,
+        quarantine_sec=settings.proxy_quarantine_sec,
+        prefer_last_success=settings.proxy_prefer_last_success,
+    )
+    recovered = recover_journal(settings.tenant_id)
+    if recovered is not None:
+        LOGGER.warning("Interrupted state batch from previous run resolved outcome=%s", recovered)
+    state_writer = StateWriter(settings.tenant_id, batch_size=settings.state_write_batch)
+    own_report = report is None
+    if report is None:
+        report = ReportWriter(mode, settings.tenant_id, settings.report_layout)
     entries: list[RunEntry] = []
+    tier_counts: Counter[str] = Counter()
+    page_traffic: Counter[str] = Counter()
+    ready_waits: list[float] = []
+    resource_allowlist = load_resource_allowlist(settings.browser_block_allowlist_file)
+    extraction_overrides = load_extraction_overrides(settings.extraction_rules_file)
+    attempt_timeouts: dict[str, int] = {}
+    fetch_attempts: dict[str, tuple[int, str | None]] = {}
+    started_at = datetime.now()
 
-    async def process(service_idx: int) -> RunEntry:
-        service = services[service_idx]
-        async with semaphore:
-            started = time.perf_counter()
-            try:
-                service_hard_timeout = ((settings.retry_proxy_count + 1) * (settings.timeout_sec + 20)) + 15
-                try:
-                    result = await asyncio.wait_for(
+    checkpoint = RunCheckpoint(settings.tenant_id) if own_report else None
+    resumed_at = checkpoint.started_at(mode) if checkpoint is not None and resume else None
+    # Entries go to the report spool one at a time; only their lightweight copies stay in memory.
+    resumed: dict[str, RunEntry] = {}
+    if checkpoint is not None and resumed_at is not None:
+        current_domains = {service.domain for service in services}
+        stale = 0
+        for entry in checkpoint.entries():
+            if entry.domain not in current_domains:
+                stale += 1
+                continue
+            resumed[entry.domain] = _spooled(report, entry)
+        if stale:
+            # Domains removed from the URL list since the interrupted run: neither reported nor retried.
+            LOGGER.info(
+                "Dropping checkpoint entries of removed domains tenant=%s entries=%s", settings.tenant_id, stale
+            )
+    if resumed_at is not None:
+        started_at = resumed_at
+        LOGGER.info("Resuming run tenant=%s started_at=%s done=%s", settings.tenant_id, resumed_at, len(resumed))
+    elif resume:
+        LOGGER.warning("Nothing to resume tenant=%s, starting a full run", settings.tenant_id)
+    elif checkpoint is not None and checkpoint.exists():
+        LOGGER.warning("Discarding checkpoint of an interrupted run tenant=%s (see --resume)", settings.tenant_id)
+    if checkpoint is not None:
+        checkpoint.open(mode, started_at, resume=resumed_at is not None)
+    done_domains = set(resumed)
+    entries.extend(resumed.values())
+    # Domains whose new version could not be stored: reported FAILED, never checkpointed.
+    unstored: set[str] = set()
+
+    async def process(service: Service) -> RunEntry:
+        started = time.perf_counter()
+        unstored.discard(service.domain)
+        try:
+            profile = read_fetch_profile(settings.tenant_id, service.domain)
+            known_validators = None
+            # A fetch shared with other tenants must return the full text, not a 304 for one tenant.
+            shared = resources.fanout is not None and resources.fanout.is_shared(service.url)
+            revalidate = mode != "init" and settings.revalidate and not shared
+            if revalidate and has_current(settings.tenant_id, service.domain):
+                known_validators = read_validators(settings.tenant_id, service.domain)
+            attempt_timeout = _attempt_timeout(service.domain, profile, settings)
+            attempt_timeouts[service.domain] = attempt_timeout
+            service_hard_timeout = _service_timeout(attempt_timeout, settings.retry_proxy_count)
+
+            options = FetchOptions(
+                fetch_mode=settings.fetch_mode,
+                tier_hint=profile.tier,
+                min_text_length=settings.min_text_length,
+                validators=known_validators,
+                blocked_resources=blocked_for(service.domain, settings.browser_block_resources, resource_allowlist),
+                humanize=profile.needs_humanize(time.time()),
+                ready_max_ms=derive_ready_max_ms(profile),
+                extraction_overrides=extraction_overrides.get(service.domain, ()),
+                pdf_max_bytes=settings.pdf_max_bytes,
+            )
+
+            async def fetch_document() -> FetchResult:
+                nonlocal started
+                async with resources.scheduler.slot(service.domain):
+                    started = time.perf_counter()
+                    return await asyncio.wait_for(
                         fetch_with_retries(
                             service=service,
-                            timeout_sec=settings.timeout_sec,
+                            timeout_sec=attempt_timeout,
                             retry_proxy_count=settings.retry_proxy_count,
                             retry_backoff_base_sec=settings.retry_backoff_base_sec,
                             retry_backoff_max_sec=settings.retry_backoff_max_sec,
                             retry_jitter_sec=settings.retry_jitter_sec,
-                            proxies=proxies,
+                            proxies=resources.proxies,
+                            browser_pool=resources.browser_pool,
+                            compute_stage=resources.compute_stage,
+                            scheduler=resources.scheduler,
+                            proxy_health=proxy_health,
+                            text_cache=resources.text_cache,
+                            options=options,
                         ),
                         timeout=service_hard_timeout,
                     )
-                except TimeoutError:
-                    elapsed = time.perf_counter() - started
-                    err = f"Service hard-timeout after {service_hard_timeout}s"
-                    LOGGER.error("FAILED domain=%s error=%s", service.domain, err)
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.FAILED,
-                        source_type=None,
-                        duration_sec=elapsed,
-                        text_length=None,
-                        change_level=None,
-                        change_ratio=None,
-                        error_code=ErrorCode.TIMEOUT,
-                        error=err,
-                        diff_html=None,
-                    )
+
+            try:
+                if resources.remote is not None:
+                    # Workers enforce the hard timeout and report it as a TIMEOUT result.
+                    result = await resources.remote.fetch(service, attempt_timeout, service_hard_timeout, options)
+                elif resources.fanout is not None:
+                    result = await resources.fanout.fetch(service.url, fetch_document)
+                else:
+                    result = await fetch_document()
+            except TimeoutError:
                 elapsed = time.perf_counter() - started
-                if not result.ok:
-                    LOGGER.error("FAILED domain=%s error=%s", service.domain, result.error)
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.FAILED,
-                        source_type=None,
-                        duration_sec=elapsed,
-                        text_length=None,
-                        change_level=None,
-                        change_ratio=None,
-                        error_code=result.error_code,
-                        error=result.error,
-                        diff_html=None,
-                    )
+                err = f"Service hard-timeout after {service_hard_timeout}s"
+                # Censored sample: the next run allows factor x this timeout.
+                await state_writer.submit_file(
+                    write_fetch_profile, settings.tenant_id, service.domain, profile.with_latency(attempt_timeout)
+                )
+                LOGGER.error("FAILED domain=%s error=%s", service.domain, err)
+                return RunEntry(
+                    domain=service.domain,
+                    url=service.url,
+                    status=Status.FAILED,
+                    source_type=None,
+                    duration_sec=elapsed,
+                    text_length=None,
+                    change_level=None,
+                    change_ratio=None,
+                    error_code=ErrorCode.TIMEOUT,
+                    error=err,
+                    diff=None,
+                )
+            elapsed = time.perf_counter() - started
+            fetch_attempts[service.domain] = (result.attempt, _proxy_label(result.proxy_used))
+            if result.transferred_bytes is not None:
+                page_traffic["pages"] += 1
+                page_traffic["bytes"] += result.transferred_bytes
+                page_traffic["blocked"] += result.blocked_requests
+            learned = profile
+            if result.ready_wait_sec is not None:
+                ready_waits.append(result.ready_wait_sec)
+                page_traffic["humanized"] += int(options.humanize)
+                learned = learned.with_ready_wait(result.ready_wait_sec)
+            if result.bot_detected:
+                learned = learned.humanized(time.time())
+            if result.ok and result.elapsed_sec is not None:
+                learned = learned.with_latency(result.elapsed_sec)
+            elif result.error_code == ErrorCode.TIMEOUT:
+                learned = learned.with_latency(attempt_timeout)
+            if learned != profile:
+                profile = learned
+                await state_writer.submit_file(write_fetch_profile, settings.tenant_id, service.domain, profile)
+            if not result.ok:
+                LOGGER.error("FAILED domain=%s error=%s", service.domain, result.error)
+                return RunEntry(
+                    domain=service.domain,
+                    url=service.url,
+                    status=Status.FAILED,
+                    source_type=None,
+                    duration_sec=elapsed,
+                    text_length=None,
+                    change_level=None,
+                    change_ratio=None,
+                    error_code=result.error_code,
+                    error=result.error,
+                    diff=None,
+                )
 
-                text = normalize_for_storage(result.text)
-                quality_issue = _quality_gate_error(text, result.source_type, settings.min_text_length)
-                if quality_issue is not None:
-                    code, message = quality_issue
-                    LOGGER.error("FAILED domain=%s error=%s", service.domain, message)
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.FAILED,
-                        source_type=result.source_type,
-                        duration_sec=elapsed,
-                        text_length=len(text),
-                        change_level=None,
-                        change_ratio=None,
-                        error_code=code,
-                        error=message,
-                        diff_html=None,
+            if result.not_modified:
+                if result.validators != known_validators:
+                    await state_writer.submit_file(
+                        write_validators, settings.tenant_id, service.domain, result.validators
                     )
+                LOGGER.info(
+                    "UNCHANGED domain=%s source=%s revalidated=true",
+                    service.domain,
+                    result.source_type.value,
+                )
+                return RunEntry(
+                    domain=service.domain,
+                    url=service.url,
+                    status=Status.UNCHANGED,
+                    source_type=result.source_type,
+                    duration_sec=elapsed,
+                    text_length=result.validators.text_length if result.validators else None,
+                    change_level=None,
+                    change_ratio=None,
+                    error_code=None,
+                    error=None,
+                    diff=None,
+                    revalidated=True,
+                )
 
-                if mode == "init":
-                    write_current_and_rotate(settings.tenant_id, service.domain, text)
-                    LOGGER.info("NEW domain=%s source=%s", service.domain, result.source_type.value)
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.NEW,
-                        source_type=result.source_type,
-                        duration_sec=elapsed,
-                        text_length=len(text),
-                        change_level=None,
-                        change_ratio=None,
-                        error_code=None,
-                        error=None,
-                        diff_html=None,
-                    )
+            text = normalize_for_storage(result.text)
+            quality_issue = _quality_gate_error(text, result.source_type, settings.min_text_length)
+            if quality_issue is not None:
+                code, message = quality_issue
+                LOGGER.error("FAILED domain=%s error=%s", service.domain, message)
+                return RunEntry(
+                    domain=service.domain,
+                    url=service.url,
+                    status=Status.FAILED,
+                    source_type=result.source_type,
+                    duration_sec=elapsed,
+                    text_length=len(text),
+                    change_level=None,
+                    change_ratio=None,
+                    error_code=code,
+                    error=message,
+                    diff=None,
+                )
 
-                prev = read_current(settings.tenant_id, service.domain)
-                if prev is None:
-                    write_current_and_rotate(settings.tenant_id, service.domain, text)
-                    LOGGER.info("NEW domain=%s source=%s", service.domain, result.source_type.value)
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.NEW,
-                        source_type=result.source_type,
-                        duration_sec=elapsed,
-                        text_length=len(text),
-                        change_level=None,
-                        change_ratio=None,
-                        error_code=None,
-                        error=None,
-                        diff_html=None,
-                    )
+            if result.tier is not None:
+                tier_counts[result.tier.value] += 1
+            if result.tier is not None and result.tier != profile.tier:
+                await state_writer.submit_file(
+                    write_fetch_profile, settings.tenant_id, service.domain, replace(profile, tier=result.tier)
+                )
+            validators = None
+            if result.validators is not None:
+                validators = replace(result.validators, source_type=result.source_type, text_length=len(text))
 
-                if is_changed(prev, text):
-                    change_level, change_ratio = classify_change(prev, text)
-                    diff_html = build_diff_html(prev, text)
-                    write_current_and_rotate(settings.tenant_id, service.domain, text)
-                    LOGGER.info(
-                        "CHANGED domain=%s source=%s change_level=%s change_ratio=%.4f",
-                        service.domain,
-                        result.source_type.value,
-                        change_level.value,
-                        change_ratio,
-                    )
-                    return RunEntry(
-                        domain=service.domain,
-                        url=service.url,
-                        status=Status.CHANGED,
-                        source_type=result.source_type,
-                        duration_sec=elapsed,
-                        text_length=len(text),
-                        change_level=change_level,
-                        change_ratio=change_ratio,
-                        error_code=None,
-                        error=None,
-                        diff_html=diff_html,
-                    )
+            async def store() -> None:
+                try:
+                    await state_writer.write(service.domain, text, digest)
+                except OSError as exc:
+                    raise _StateWriteError(f"New version not stored: {exc}") from exc
+                # Only once the body is stored: a 304 or hash match later implies the stored text is current.
+                if validators != known_validators:
+                    await state_writer.submit_file(write_validators, settings.tenant_id, service.domain, validators)
 
-                LOGGER.info("UNCHANGED domain=%s source=%s", service.domain, result.source_type.value)
+            digest = compare_digest(text)
+            if mode == "init":
+                await store()
+                LOGGER.info("NEW domain=%s source=%s", service.domain, result.source_type.value)
                 return RunEntry(
                     domain=service.domain,
                     url=service.url,
-                    status=Status.UNCHANGED,
+                    status=Status.NEW,
                     source_type=result.source_type,
                     duration_sec=elapsed,
                     text_length=len(text),
@@ -222,61 +698,370 @@ async def _run(mode: str, settings: AppSettings, services_override: list[Service
                     change_ratio=None,
                     error_code=None,
                     error=None,
-                    diff_html=None,
+                    diff=None,
                 )
-            except Exception as exc:  # noqa: BLE001
-                elapsed = time.perf_counter() - started
-                LOGGER.exception("FAILED domain=%s due to unhandled error", service.domain)
+
+            # Digest first: the stored body is only read when a diff is actually needed.
+            stored_digest = read_current_digest(settings.tenant_id, service.domain)
+            prev = None
+            if stored_digest is not None and stored_digest != digest:
+                prev = read_current(settings.tenant_id, service.domain)
+            if stored_digest is None or (stored_digest != digest and prev is None):
+                await store()
+                LOGGER.info("NEW domain=%s source=%s", service.domain, result.source_type.value)
                 return RunEntry(
                     domain=service.domain,
                     url=service.url,
-                    status=Status.FAILED,
-                    source_type=None,
+                    status=Status.NEW,
+                    source_type=result.source_type,
                     duration_sec=elapsed,
-                    text_length=None,
+                    text_length=len(text),
                     change_level=None,
                     change_ratio=None,
-                    error_code=ErrorCode.UNKNOWN,
-                    error=f"Unhandled runner error: {exc}",
-                    diff_html=None,
+                    error_code=None,
+                    error=None,
+                    diff=None,
                 )
 
-    tasks = [asyncio.create_task(process(i)) for i in range(len(services))]
-    try:
-        for task in asyncio.as_completed(tasks):
-            entries.append(await task)
-    except KeyboardInterrupt:
-        LOGGER.warning("Interrupted by user. Cancelling pending tasks...")
-        for t in tasks:
-            t.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-        raise
-    except asyncio.CancelledError:
-        LOGGER.warning("Run cancelled. Cancelling pending tasks...")
-        for t in tasks:
-            t.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-        raise
-
-    if mode == "run":
-        domain_to_index = {service.domain: idx for idx, service in enumerate(services)}
-        failed_domains = sorted({entry.domain for entry in entries if entry.status == Status.FAILED})
-        if failed_domains:
-            LOGGER.info("Retrying failed domains once: %s", len(failed_domains))
-            retry_tasks = [asyncio.create_task(process(domain_to_index[domain])) for domain in failed_domains]
-            retry_entries: list[RunEntry] = []
-            for task in asyncio.as_completed(retry_tasks):
-                retry_entries.append(await task)
-            merged_entries = {entry.domain: entry for entry in entries}
-            for retried in retry_entries:
-                merged_entries[retried.domain] = retried
-            entries = list(merged_entries.values())
+            if prev is not None:
+                (change_level, change_ratio), diff = await asyncio.gather(
+                    resources.compute_stage.run("classify", classify_change, prev, text),
+                    resources.compute_stage.run("diff", build_diff, prev, text),
+                )
+                await store()
+                LOGGER.info(
+                    "CHANGED domain=%s source=%s change_level=%s change_ratio=%.4f",
+                    service.domain,
+                    result.source_type.value,
+                    change_level.value,
+                    change_ratio,
+                )
+                return RunEntry(
+                    domain=service.domain,
+                    url=service.url,
+                    status=Status.CHANGED,
+                    source_type=result.source_type,
+                    duration_sec=elapsed,
+                    text_length=len(text),
+                    change_level=change_level,
+                    change_ratio=change_ratio,
+                    error_code=None,
+                    error=None,
+                    diff=diff,
+                )
+
+            if validators != known_validators:
+                await state_writer.submit_file(write_validators, settings.tenant_id, service.domain, validators)
+            LOGGER.info("UNCHANGED domain=%s source=%s", service.domain, result.source_type.value)
+            return RunEntry(
+                domain=service.domain,
+                url=service.url,
+                status=Status.UNCHANGED,
+                source_type=result.source_type,
+                duration_sec=elapsed,
+                text_length=len(text),
+                change_level=None,
+                change_ratio=None,
+                error_code=None,
+                error=None,
+                diff=None,
+            )
+        except _StateWriteError as exc:
+            unstored.add(service.domain)
+            LOGGER.error("FAILED domain=%s error=%s", service.domain, exc)
+            return RunEntry(
+                domain=service.domain,
+                url=service.url,
+                status=Status.FAILED,
+                source_type=None,
+                duration_sec=time.perf_counter() - started,
+                text_length=None,
+                change_level=None,
+                change_ratio=None,
+                error_code=ErrorCode.UNKNOWN,
+                error=str(exc),
+                diff=None,
+            )
+        except Exception as exc:  # noqa: BLE001
+            elapsed = time.perf_counter() - started
+            LOGGER.exception("FAILED domain=%s due to unhandled error", service.domain)
+            return RunEntry(
+                domain=service.domain,
+                url=service.url,
+                status=Status.FAILED,
+                source_type=None,
+                duration_sec=elapsed,
+                text_length=None,
+                change_level=None,
+                change_ratio=None,
+                error_code=ErrorCode.UNKNOWN,
+                error=f"Unhandled runner error: {exc}",
+                diff=None,
+            )
+
+    def finalize(entry: RunEntry) -> RunEntry:
+        attempt, proxy_label = fetch_attempts.get(entry.domain, (None, None))
+        entry = replace(
+            entry,
+            timeout_sec=attempt_timeouts.get(entry.domain),
+            attempt=attempt,
+            proxy_used=proxy_label,
+        )
+        if checkpoint is not None and entry.domain not in unstored:
+            checkpoint.append(entry)
+        return _spooled(report, entry)
+
+    async def drain(feed: Callable[[], Awaitable[Service | None]]) -> None:
+        while (service := await feed()) is not None:
+            entry = finalize(await process(service))
+            entries.append(entry)
+            if on_entry is not None:
+                await on_entry(entry, state_writer)
+
+    async with state_writer:
+        tasks: list[asyncio.Task[RunEntry | None]]
+        if feed is None:
+            tasks = [
+                asyncio.create_task(process(service)) for service in services if service.domain not in done_domains
+            ]
+        else:
+            # A worker takes the next service as soon as it is free: no batch waits for its slowest domain.
+            tasks = [asyncio.create_task(drain(feed)) for _ in range(settings.concurrency)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                entry = await task
+                if entry is not None:
+                    entries.append(finalize(entry))
+        except KeyboardInterrupt:
+            LOGGER.warning("Interrupted by user. Cancelling pending tasks...")
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if own_report:
+                report.close()
+            elif entries:
+                # The caller publishes its report: the checks done so far still belong in the history.
+                _record_history(settings, mode, started_at, sorted(entries, key=lambda e: e.domain), None)
+            if checkpoint is not None:
+                checkpoint.close()
+            raise
+        except asyncio.CancelledError:
+            LOGGER.warning("Run cancelled. Cancelling pending tasks...")
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if own_report:
+                report.close()
+            elif entries:
+                # The caller publishes its report: the checks done so far still belong in the history.
+                _record_history(settings, mode, started_at, sorted(entries, key=lambda e: e.domain), None)
+            if checkpoint is not None:
+                checkpoint.close()
+            raise
+
+        if mode == "run":
+            domain_to_index = {service.domain: idx for idx, service in enumerate(services)}
+            failed_domains = sorted(
+                {entry.domain for entry in entries if entry.status == Status.FAILED and entry.domain in domain_to_index}
+            )
+            if failed_domains:
+                LOGGER.info("Retrying failed domains once: %s", len(failed_domains))
+                retry_tasks = [
+                    asyncio.create_task(process(services[domain_to_index[domain]])) for domain in failed_domains
+                ]
+                retry_entries: list[RunEntry] = []
+                for task in asyncio.as_completed(retry_tasks):
+                    retry_entries.append(finalize(await task))
+                merged_entries = {entry.domain: entry for entry in entries}
+                for retried in retry_entries:
+                    merged_entries[retried.domain] = retried
+                entries = list(merged_entries.values())
+
+    if attempt_timeouts:
+        LOGGER.info(
+            "Attempt timeouts tenant=%s adapted=%s min=%ss max=%ss default=%ss",
+            settings.tenant_id,
+            sum(1 for value in attempt_timeouts.values() if value != settings.timeout_sec),
+            min(attempt_timeouts.values()),
+            max(attempt_timeouts.values()),
+            settings.timeout_sec,
+        )
+    LOGGER.info(
+        "Fetch tiers tenant=%s http=%s browser=%s revalidated=%s",
+        settings.tenant_id,
+        tier_counts[FetchTier.HTTP.value],
+        tier_counts[FetchTier.BROWSER.value],
+        sum(1 for entry in entries if entry.revalidated),
+    )
+    if page_traffic["pages"]:
+        LOGGER.info(
+            "Browser traffic tenant=%s pages=%s transferred_kb=%s avg_kb=%s blocked_requests=%s",
+            settings.tenant_id,
+            page_traffic["pages"],
+            page_traffic["bytes"] // 1024,
+            page_traffic["bytes"] // 1024 // page_traffic["pages"],
+            page_traffic["blocked"],
+        )
+    if ready_waits:
+        LOGGER.info(
+            "Page readiness tenant=%s pages=%s waited=%.1fs fixed_sleeps=%.1fs saved=%.1fs humanized=%s",
+            settings.tenant_id,
+            len(ready_waits),
+            sum(ready_waits),
+            len(ready_waits) * FIXED_SETTLE_SEC,
+            len(ready_waits) * FIXED_SETTLE_SEC - sum(ready_waits),
+            page_traffic["humanized"],
+        )
+    proxy_health.save()
+    LOGGER.info(
+        "Proxy health tenant=%s tracked=%s quarantined=%s skipped_in_attempts=%s",
+        settings.tenant_id,
+        len(proxy_health.proxies),
+        proxy_health.quarantined_count(),
+        proxy_health.skipped,
+    )
+    LOGGER.info(
+        "State writes tenant=%s batches=%s updates=%s new_versions=%s max_batch=%s failed=%s "
+        "files=%s failed_files=%s",
+        settings.tenant_id,
+        state_writer.stats.batches,
+        state_writer.stats.updates,
+        state_writer.stats.versions,
+        state_writer.stats.max_batch,
+        state_writer.stats.failed,
+        state_writer.stats.files,
+        state_writer.stats.failed_files,
+    )
 
     entries.sort(key=lambda e: e.domain)
+    if not own_report:
+        # A schedule window without a single check is not a run.
+        if entries:
+            _record_history(settings, mode, started_at, entries, None)
+        return entries
     _write_last_failed_urls(settings.tenant_id, entries)
-    report_path = write_report(entries, mode, settings.tenant_id)
-    LOGGER.info("Report generated: %s", report_path)
-    return 0
+    report_path = report.finish()
+    LOGGER.info("Report generated tenant=%s: %s", settings.tenant_id, report_path)
+    _record_history(settings, mode, started_at, entries, report_path)
+    checkpoint.discard()
+    return entries
+
+
+def _log_resource_stats(resources: _ScanResources) -> None:
+    browser_pool = resources.browser_pool
+    scheduler = resources.scheduler
+    LOGGER.info(
+        "Browser pool hits=%s misses=%s launches=%s recycles=%s crashes=%s contexts=%s",
+        browser_pool.stats.hits,
+        browser_pool.stats.misses,
+        browser_pool.stats.launches,
+        browser_pool.stats.recycles,
+        browser_pool.stats.crashes,
+        browser_pool.stats.contexts,
+    )
+    LOGGER.info(
+        "Rate limiting throttled=%s wait=%s proxy_attempts=%s",
+        dict(scheduler.stats.throttled),
+        {kind: round(sec, 2) for kind, sec in scheduler.stats.wait_sec.items()},
+        dict(scheduler.stats.proxy_attempts.most_common(10)),
+    )
+    LOGGER.info(
+        "PDF text cache hits=%s misses=%s pages=%s",
+        PDF_TEXT_CACHE.stats.hits,
+        PDF_TEXT_CACHE.stats.misses,
+        PDF_TEXT_CACHE.stats.pages,
+    )
+    if resources.text_cache is not None:
+        cache_stats = resources.text_cache.stats
+        LOGGER.info(
+            "Text cache hits=%s misses=%s hit_rate=%.1f%% stores=%s evicted=%s",
+            cache_stats.hits,
+            cache_stats.misses,
+            100.0 * cache_stats.hit_rate,
+            cache_stats.stores,
+            cache_stats.evicted,
+        )
+    for stage_name, stage_stats in sorted(resources.compute_stage.stats.items()):
+        LOGGER.info(
+            "Compute stage=%s tasks=%s queue_wait=%.2fs max_queue_wait=%.2fs cpu=%.2fs",
+            stage_name,
+            stage_stats.tasks,
+            stage_stats.queue_wait_sec,
+            stage_stats.max_queue_wait_sec,
+            stage_stats.cpu_sec,
+        )
+
+
+def _plan_scan(settings: AppSettings, services: list[Service]) -> ScanPlan:
+    since = datetime.now() - timedelta(days=_PLAN_HISTORY_DAYS)
+    try:
+        summaries = RunHistory(settings.run_history_db).domain_summaries(settings.tenant_id, since, limit=None)
+    except sqlite3.Error as exc:
+        LOGGER.warning("Run history not read, scanning in file order db=%s error=%s", settings.run_history_db, exc)
+        summaries = []
+    estimates = estimate_services(
+        services,
+        {summary.domain: summary for summary in summaries},
+        default_sec=settings.timeout_sec,
+    )
+    return plan_scan(estimates, settings.concurrency)
+
+
+def _attempt_timeout(domain: str, profile: FetchProfile, settings: AppSettings) -> int:
+    if not settings.adaptive_timeouts:
+        return settings.timeout_sec
+    derived = derive_attempt_timeout(
+        profile,
+        default_sec=settings.timeout_sec,
+        min_sec=settings.timeout_min_sec,
+        max_sec=settings.timeout_max_sec,
+        factor=settings.timeout_p99_factor,
+    )
+    if derived.attempt_sec != settings.timeout_sec:
+        LOGGER.info(
+            "Adaptive timeout domain=%s attempt=%ss service=%ss p99=%.2fs samples=%s",
+            domain,
+            derived.attempt_sec,
+            _service_timeout(derived.attempt_sec, settings.retry_proxy_count),
+            derived.p99_sec or 0.0,
+            derived.samples,
+        )
+    return derived.attempt_sec
+
+
+def _record_history(
+    settings: AppSettings,
+    mode: str,
+    started_at: datetime,
+    entries: list[RunEntry],
+    report_path: Path | None,
+) -> None:
+    try:
+        run_id = RunHistory(settings.run_history_db).record_run(
+            settings.tenant_id, mode, started_at, datetime.now(), entries, report_path
+        )
+    except sqlite3.Error as exc:
+        LOGGER.warning("Run history not recorded db=%s error=%s", settings.run_history_db, exc)
+        return
+    LOGGER.info("Run history recorded run_id=%s entries=%s db=%s", run_id, len(entries), settings.run_history_db)
+
+
+def _proxy_label(proxy_url: str | None) -> str | None:
+    # host:port only; proxy URLs carry credentials.
+    if not proxy_url:
+        return None
+    parsed = urlparse(proxy_url)
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+
+def _service_timeout(attempt_timeout: int, retry_proxy_count: int) -> int:
+    return ((retry_proxy_count + 1) * (attempt_timeout + 20)) + 15
+
+
+def _spooled(report: ReportWriter, entry: RunEntry) -> RunEntry:
+    # The diff lives only in the report spool; the run keeps the lightweight entry.
+    report.add(entry)
+    return replace(entry, diff=None)
 
 
 def sys_platform() -> str:
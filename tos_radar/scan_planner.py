@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+from tos_radar.models import Service
+from tos_radar.run_history import DomainSummary
+
+
+@dataclass(frozen=True)
+class ServiceEstimate:
+    service: Service
+    expected_sec: float
+    failure_rate: float
+    samples: int
+
+
+@dataclass(frozen=True)
+class ScanPlan:
+    """Services in dispatch order with the makespan predicted for them and for file order."""
+
+    estimates: list[ServiceEstimate]
+    concurrency: int
+    makespan_sec: float
+    file_order_makespan_sec: float
+
+    @property
+    def services(self) -> list[Service]:
+        return [estimate.service for estimate in self.estimates]
+
+
+def estimate_services(
+    services: Sequence[Service],
+    summaries: Mapping[str, DomainSummary],
+    default_sec: float,
+) -> list[ServiceEstimate]:
+    """Expected seconds per service from run history, in the given order.
+
+    A failing domain costs its average duration plus, in proportion to its failure rate, the
+    end-of-run retry. Domains without history get the mean of the known ones (or `default_sec`).
+    """
+    known: dict[str, ServiceEstimate] = {}
+    for service in services:
+        summary = summaries.get(service.domain)
+        if summary is None or summary.runs <= 0:
+            continue
+        failure_rate = summary.failed / summary.runs
+        known[service.domain] = ServiceEstimate(
+            service=service,
+            expected_sec=summary.avg_duration_sec * (1.0 + failure_rate),
+            failure_rate=failure_rate,
+            samples=summary.runs,
+        )
+    fallback_sec = sum(item.expected_sec for item in known.values()) / len(known) if known else default_sec
+    return [
+        known.get(service.domain)
+        or ServiceEstimate(service=service, expected_sec=fallback_sec, failure_rate=0.0, samples=0)
+        for service in services
+    ]
+
+
+def plan_scan(estimates: Sequence[ServiceEstimate], concurrency: int) -> ScanPlan:
+    """Priority first, then longest expected time first (LPT), which keeps stragglers off the tail."""
+    ordered = sorted(estimates, key=lambda item: (-item.service.priority, -item.expected_sec))
+    return ScanPlan(
+        estimates=ordered,
+        concurrency=concurrency,
+        makespan_sec=predict_makespan([item.expected_sec for item in ordered], concurrency),
+        file_order_makespan_sec=predict_makespan([item.expected_sec for item in estimates], concurrency),
+    )
+
+
+def predict_makespan(durations: Sequence[float], concurrency: int) -> float:
+    """Finish time of list scheduling: each job starts on the first slot that frees up."""
+    slots = [0.0] * max(1, min(concurrency, len(durations)))
+    for duration in durations:
+        heapq.heappush(slots, heapq.heappop(slots) + duration)
+    return max(slots) if durations else 0.0
+
+
+def plan_lines(plan: ScanPlan) -> list[str]:
+    """Plain-text table for `run --dry-run`."""
+    lines = [f"{'#':>4} {'domain':<40} {'prio':>4} {'exp_sec':>8} {'fail%':>6} {'runs':>5}"]
+    for idx, item in enumerate(plan.estimates, start=1):
+        lines.append(
+            f"{idx:>4} {item.service.domain:<40} {item.service.priority:>4} {item.expected_sec:>8.2f} "
+            f"{100.0 * item.failure_rate:>5.1f}% {item.samples:>5}"
+        )
+    lines.append(
+        f"predicted makespan: {plan.makespan_sec:.1f}s planned, {plan.file_order_makespan_sec:.1f}s file order "
+        f"(services={len(plan.estimates)} concurrency={plan.concurrency})"
+    )
+    return lines
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Hashable, Sequence
+
+# Regions smaller than this (len(a) * len(b)) are aligned exactly with difflib.
+_SMALL_REGION = 40_000
+_ANCHOR_WIDTHS = (1, 2, 4, 8)
+
+
+def intern_tokens(*sequences: Sequence[str]) -> list[list[int]]:
+    """Map tokens to small ints shared across all sequences, so comparisons are int compares."""
+    table: dict[str, int] = {}
+    return [[table.setdefault(token, len(table)) for token in seq] for seq in sequences]
+
+
+def matching_blocks(a: Sequence[Hashable], b: Sequence[Hashable]) -> list[tuple[int, int, int]]:
+    """Return (i, j, size) blocks of a common subsequence, sorted, without the difflib sentinel.
+
+    Patience style: trim common prefix/suffix, anchor on tokens (or short token runs when no
+    single token is unique) that occur exactly once on both sides, keep the longest increasing
+    chain of anchors and recurse between them. Memory is linear and real documents are aligned
+    in near-linear time; only small regions are aligned exactly with difflib.
+    """
+    pairs: list[tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors: list[tuple[int, int]] = []
+        width = 1
+        if (ahi - alo) * (bhi - blo) > _SMALL_REGION:
+            for width in _ANCHOR_WIDTHS:
+                anchors = _unique_anchors(a, alo, ahi, b, blo, bhi, width)
+                if anchors:
+                    break
+            else:
+                # Nothing unique (e.g. a rewritten section sharing only stop words): pair the
+                # n-th occurrences of the rarest shared tokens instead of a quadratic search.
+                width = 1
+                anchors = _rare_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, size in matcher.get_matching_blocks():
+                pairs.extend((alo + i + k, blo + j + k) for k in range(size))
+            continue
+
+        prev_i, prev_j = alo, blo
+        for i, j in anchors:
+            pairs.extend((i + k, j + k) for k in range(width))
+            stack.append((prev_i, i, prev_j, j))
+            prev_i, prev_j = i + width, j + width
+        stack.append((prev_i, ahi, prev_j, bhi))
+
+    pairs.sort()
+    return _coalesce(pairs)
+
+
+def _unique_anchors(
+    a: Sequence[Hashable],
+    alo: int,
+    ahi: int,
+    b: Sequence[Hashable],
+    blo: int,
+    bhi: int,
+    width: int,
+) -> list[tuple[int, int]]:
+    keys_a = _window_keys(a, alo, ahi, width)
+    keys_b = _window_keys(b, blo, bhi, width)
+    count_a = Counter(keys_a)
+    count_b = Counter(keys_b)
+    positions_b = {key: blo + offset for offset, key in enumerate(keys_b) if count_b[key] == 1}
+    candidates = [
+        (alo + offset, positions_b[key])
+        for offset, key in enumerate(keys_a)
+        if count_a[key] == 1 and key in positions_b
+    ]
+    chain = _longest_increasing_by_j(candidates)
+    if width == 1:
+        return chain
+    # Multi-token anchors must not overlap each other.
+    out: list[tuple[int, int]] = []
+    for i, j in chain:
+        if not out or (i >= out[-1][0] + width and j >= out[-1][1] + width):
+            out.append((i, j))
+    return out
+
+
+def _rare_anchors(
+    a: Sequence[Hashable],
+    alo: int,
+    ahi: int,
+    b: Sequence[Hashable],
+    blo: int,
+    bhi: int,
+) -> list[tuple[int, int]]:
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    common = [token for token in count_a if token in count_b]
+    if not common:
+        return []
+    rarity = min(max(count_a[token], count_b[token]) for token in common)
+    rare = {token for token in common if max(count_a[token], count_b[token]) == rarity}
+
+    positions_b: dict[Hashable, list[int]] = {}
+    for j in range(blo, bhi):
+        if b[j] in rare:
+            positions_b.setdefault(b[j], []).append(j)
+    seen: Counter[Hashable] = Counter()
+    candidates: list[tuple[int, int]] = []
+    for i in range(alo, ahi):
+        token = a[i]
+        if token not in rare:
+            continue
+        nth = seen[token]
+        seen[token] += 1
+        if nth < len(positions_b[token]):
+            candidates.append((i, positions_b[token][nth]))
+    return _longest_increasing_by_j(candidates)
+
+
+def _window_keys(seq: Sequence[Hashable], lo: int, hi: int, width: int) -> list[Hashable]:
+    if width == 1:
+        return list(seq[lo:hi])
+    return [tuple(seq[i : i + width]) for i in range(lo, hi - width + 1)]
+
+
+def _longest_increasing_by_j(candidates: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    # Patience sorting over j (candidates are already ordered by i).
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    parent = [-1] * len(candidates)
+    for idx, (_, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+        parent[idx] = tail_idx[pos - 1] if pos > 0 else -1
+    out: list[tuple[int, int]] = []
+    idx = tail_idx[-1] if tail_idx else -1
+    while idx >= 0:
+        out.append(candidates[idx])
+        idx = parent[idx]
+    out.reverse()
+    return out
+
+
+def _coalesce(pairs: list[tuple[int, int]]) -> list[tuple[int, int, int]]:
+    blocks: list[tuple[int, int, int]] = []
+    for i, j in pairs:
+        if blocks:
+            bi, bj, size = blocks[-1]
+            if bi + size == i and bj + size == j:
+                blocks[-1] = (bi, bj, size + 1)
+                continue
+        blocks.append((i, j, 1))
+    return blocks
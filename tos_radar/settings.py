@@ -4,7 +4,8 @@ import os
 
 from dotenv import load_dotenv
 
-from tos_radar.models import AppSettings
+from tos_radar.models import AppSettings, FetchMode, ReportLayout
+from tos_radar.resource_blocking import DEFAULT_BLOCKED_RESOURCES, parse_blocked_resources
 
 
 def load_settings() -> AppSettings:
@@ -20,6 +21,44 @@ def load_settings() -> AppSettings:
         retry_backoff_max_sec=float(os.getenv("RETRY_BACKOFF_MAX_SEC", "8.0")),
         retry_jitter_sec=float(os.getenv("RETRY_JITTER_SEC", "0.4")),
         min_text_length=int(os.getenv("MIN_TEXT_LENGTH", "350")),
+        fetch_mode=FetchMode(os.getenv("FETCH_MODE", "browser").strip().lower()),
+        revalidate=os.getenv("REVALIDATE", "1").strip().lower() in {"1", "true", "yes"},
+        browser_pool_size=int(os.getenv("BROWSER_POOL_SIZE", "4")),
+        browser_max_pages=int(os.getenv("BROWSER_MAX_PAGES", "100")),
+        compute_workers=int(os.getenv("COMPUTE_WORKERS", "2")),
+        compute_queue_depth=int(os.getenv("COMPUTE_QUEUE_DEPTH", "8")),
+        report_layout=ReportLayout(os.getenv("REPORT_LAYOUT", "single").strip().lower()),
+        rate_limit_domain_per_min=float(os.getenv("RATE_LIMIT_DOMAIN_PER_MIN", "0")),
+        rate_limit_host_per_min=float(os.getenv("RATE_LIMIT_HOST_PER_MIN", "0")),
+        rate_limit_proxy_per_min=float(os.getenv("RATE_LIMIT_PROXY_PER_MIN", "0")),
+        rate_limit_burst=int(os.getenv("RATE_LIMIT_BURST", "3")),
+        rate_limit_resolve_hosts=os.getenv("RATE_LIMIT_RESOLVE_HOSTS", "0").strip().lower() in {"1", "true", "yes"},
+        proxy_quarantine_failures=int(os.getenv("PROXY_QUARANTINE_FAILURES", "3")),
+        proxy_quarantine_sec=float(os.getenv("PROXY_QUARANTINE_SEC", "1800")),
+        proxy_prefer_last_success=os.getenv("PROXY_PREFER_LAST_SUCCESS", "1").strip().lower() in {"1", "true", "yes"},
+        adaptive_timeouts=os.getenv("ADAPTIVE_TIMEOUTS", "1").strip().lower() in {"1", "true", "yes"},
+        timeout_min_sec=int(os.getenv("TIMEOUT_MIN_SEC", "10")),
+        timeout_max_sec=int(os.getenv("TIMEOUT_MAX_SEC", "120")),
+        timeout_p99_factor=float(os.getenv("TIMEOUT_P99_FACTOR", "3.0")),
+        run_history_db=os.getenv("RUN_HISTORY_DB", "data/run_history.sqlite3"),
+        state_write_batch=int(os.getenv("STATE_WRITE_BATCH", "64")),
+        tenants_dir=os.getenv("TENANTS_DIR", "config/tenants"),
+        work_queue_db=os.getenv("WORK_QUEUE_DB", "data/work_queue.sqlite3"),
+        work_queue_max_attempts=int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3")),
+        work_queue_poll_sec=float(os.getenv("WORK_QUEUE_POLL_SEC", "1.0")),
+        schedule_min_interval_sec=float(os.getenv("SCHEDULE_MIN_INTERVAL_SEC", "3600")),
+        schedule_max_interval_sec=float(os.getenv("SCHEDULE_MAX_INTERVAL_SEC", "604800")),
+        schedule_default_interval_sec=float(os.getenv("SCHEDULE_DEFAULT_INTERVAL_SEC", "86400")),
+        schedule_report_sec=float(os.getenv("SCHEDULE_REPORT_SEC", "3600")),
+        browser_block_resources=parse_blocked_resources(
+            os.getenv("BROWSER_BLOCK_RESOURCES", DEFAULT_BLOCKED_RESOURCES)
+        ),
+        browser_block_allowlist_file=os.getenv("BROWSER_BLOCK_ALLOWLIST_FILE", "config/resource_allowlist.txt"),
+        extraction_rules_file=os.getenv("EXTRACTION_RULES_FILE", "config/extraction_rules.txt"),
+        pdf_max_bytes=int(float(os.getenv("PDF_MAX_MB", "50")) * 1024 * 1024),
+        text_cache_dir=os.getenv("TEXT_CACHE_DIR", "data/cache/text"),
+        text_cache_max_bytes=int(float(os.getenv("TEXT_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        scan_order_by_cost=os.getenv("SCAN_ORDER_BY_COST", "1").strip().lower() in {"1", "true", "yes"},
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         api_host=os.getenv("API_HOST", "127.0.0.1"),
         api_port=int(os.getenv("API_PORT", "8080")),
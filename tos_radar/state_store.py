@@ -1,26 +1,360 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Sequence
+
+from tos_radar.diff_utils import compare_digest
+from tos_radar.models import HttpValidators, SourceType
+
+_VALIDATORS_FILE = "validators.json"
+_MANIFEST_FILE = "manifest.json"
+_LEGACY_FILES = ("previous.txt", "current.txt", "current.digest")
+# The blob store is shared by tenants and processes: a temp blob younger than this may be another writer's.
+_STALE_TMP_SEC = 3600.0
+
+
+@dataclass(frozen=True)
+class DocumentUpdate:
+    domain: str
+    text: str
+    digest: str | None = None
+
+
+@dataclass(frozen=True)
+class DocumentVersion:
+    sha256: str
+    digest: str
+    ts: str
+    length: int
 
 
 def _service_dir(tenant_id: str, domain: str) -> Path:
     return Path("data") / "state" / tenant_id / domain
 
 
+def _blob_path(sha256: str) -> Path:
+    # Shared by all tenants: the same document text is stored once no matter who tracks it.
+    return Path("data") / "blobs" / sha256[:2] / f"{sha256}.txt.gz"
+
+
+def _journal_path(tenant_id: str) -> Path:
+    return Path("data") / "state" / tenant_id / "journal.json"
+
+
+def has_current(tenant_id: str, domain: str) -> bool:
+    service_dir = _service_dir(tenant_id, domain)
+    return (service_dir / _MANIFEST_FILE).exists() or (service_dir / "current.txt").exists()
+
+
 def read_current(tenant_id: str, domain: str) -> str | None:
-    path = _service_dir(tenant_id, domain) / "current.txt"
+    return read_version(tenant_id, domain, 0)
+
+
+def read_current_digest(tenant_id: str, domain: str) -> str | None:
+    versions = _read_manifest(tenant_id, domain)
+    if versions:
+        return versions[-1].digest
+    service_dir = _service_dir(tenant_id, domain)
+    digest_path = service_dir / "current.digest"
+    if digest_path.exists():
+        return digest_path.read_text(encoding="utf-8").strip()
+    current = _read_legacy(service_dir / "current.txt")
+    if current is None:
+        return None
+    # State written before digests existed: compute once and keep it next to the document.
+    digest = compare_digest(current)
+    digest_path.write_text(digest, encoding="utf-8")
+    return digest
+
+
+def list_versions(tenant_id: str, domain: str) -> list[DocumentVersion]:
+    """All stored versions of the document, newest first."""
+    versions = _read_manifest(tenant_id, domain)
+    if versions:
+        return versions[::-1]
+    return _legacy_versions(_service_dir(tenant_id, domain))[::-1]
+
+
+def read_version(tenant_id: str, domain: str, n: int = 0) -> str | None:
+    """Text of the version `n` steps back from the current one (0 = current, 1 = previous)."""
+    if n < 0:
+        return None
+    versions = _read_manifest(tenant_id, domain)
+    if not versions:
+        # Not migrated yet: only current.txt/previous.txt exist.
+        legacy = ("current.txt", "previous.txt")
+        return _read_legacy(_service_dir(tenant_id, domain) / legacy[n]) if n < len(legacy) else None
+    if n >= len(versions):
+        return None
+    return _read_blob(versions[-1 - n].sha256)
+
+
+def write_current_and_rotate(tenant_id: str, domain: str, text: str, digest: str | None = None) -> None:
+    """Append `text` as the newest version; unchanged text and already stored blobs are not rewritten."""
+    commit_documents(tenant_id, [DocumentUpdate(domain=domain, text=text, digest=digest)])
+
+
+def commit_documents(tenant_id: str, updates: Sequence[DocumentUpdate]) -> int:
+    """Append a batch of document versions atomically; return how many domains got a new version.
+
+    Order on disk: journal, blobs, manifests, then the journal is dropped. Every file is written
+    to a temp name, fsynced and renamed; directories are fsynced once per batch. A crash at any
+    point leaves a journal that `recover_journal` commits or rolls back on the next start.
+    If a domain occurs more than once in the batch, its last update wins.
+    """
+    ts = datetime.now().isoformat(timespec="seconds")
+    planned: list[tuple[Path, list[DocumentVersion], DocumentVersion, bool]] = []
+    for domain, update in {update.domain: update for update in updates}.items():
+        service_dir = _service_dir(tenant_id, domain)
+        versions = _read_manifest(tenant_id, domain)
+        migrated = not versions
+        if migrated:
+            # previous.txt/current.txt from before the blob store become the first two versions.
+            versions = _legacy_versions(service_dir)
+        sha256 = hashlib.sha256(update.text.encode("utf-8")).hexdigest()
+        if versions and versions[-1].sha256 == sha256:
+            continue
+        version = DocumentVersion(
+            sha256=sha256,
+            digest=update.digest or compare_digest(update.text),
+            ts=ts,
+            length=len(update.text),
+        )
+        planned.append((service_dir, versions, version, migrated))
+    if not planned:
+        return 0
+
+    journal = _journal_path(tenant_id)
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    _write_durable(
+        journal,
+        json.dumps(
+            {
+                "updates": [
+                    {"domain": service_dir.name, "prev_sha256": versions[-1].sha256 if versions else None}
+                    | asdict(version)
+                    for service_dir, versions, version, _ in planned
+                ]
+            },
+            ensure_ascii=False,
+        ),
+    )
+    _fsync_dir(journal.parent)
+
+    texts = {update.domain: update.text for update in updates}
+    dirty: set[Path] = set()
+    for service_dir, versions, version, migrated in planned:
+        _write_blob(texts[service_dir.name])
+        dirty.add(_blob_path(version.sha256).parent)
+        if migrated:
+            dirty.update(_blob_path(legacy.sha256).parent for legacy in _legacy_versions(service_dir, store=True))
+    for directory in dirty:
+        _fsync_dir(directory)
+
+    for service_dir, versions, version, _ in planned:
+        _store_manifest(service_dir, [*versions, version])
+
+    journal.unlink()
+    _fsync_dir(journal.parent)
+    return len(planned)
+
+
+def recover_journal(tenant_id: str) -> str | None:
+    """Finish or undo a batch interrupted by a crash: "committed", "rolled_back" or None if clean.
+
+    A batch is committed only if every blob it references made it to disk; otherwise manifests
+    that already point at the new versions are reverted, so no domain ends up half-written.
+    Only temp files of the journal's own blobs are removed, and only once they are stale.
+    """
+    journal = _journal_path(tenant_id)
+    if not journal.exists():
+        return None
+    try:
+        updates = json.loads(journal.read_text(encoding="utf-8")).get("updates", [])
+    except (OSError, ValueError, AttributeError):
+        updates = []
+    complete = all(_blob_path(item["sha256"]).exists() for item in updates)
+    for item in updates:
+        domain = item["domain"]
+        service_dir = _service_dir(tenant_id, domain)
+        versions = _read_manifest(tenant_id, domain) or _legacy_versions(service_dir, store=True)
+        head = versions[-1].sha256 if versions else None
+        if complete and head == item["prev_sha256"]:
+            version = DocumentVersion(
+                sha256=item["sha256"],
+                digest=item["digest"],
+                ts=item["ts"],
+                length=item["length"],
+            )
+            _store_manifest(service_dir, [*versions, version])
+        elif not complete and head == item["sha256"] and len(versions) > 1:
+            if versions[-2].sha256 == item["prev_sha256"]:
+                _store_manifest(service_dir, versions[:-1])
+    stale_before = time.time() - _STALE_TMP_SEC
+    for item in updates:
+        blob = _blob_path(item["sha256"])
+        for leftover in blob.parent.glob(f"{item['sha256']}.*.tmp"):
+            try:
+                if leftover.stat().st_mtime < stale_before:
+                    leftover.unlink()
+            except OSError:
+                continue
+    journal.unlink()
+    return "committed" if complete else "rolled_back"
+
+
+def read_service_json(tenant_id: str, domain: str, name: str) -> dict[str, Any] | None:
+    path = _service_dir(tenant_id, domain) / name
     if not path.exists():
         return None
-    return path.read_text(encoding="utf-8")
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
 
+def write_service_json(tenant_id: str, domain: str, name: str, data: dict[str, Any]) -> None:
+    """Replace a per-domain JSON file atomically: a crash leaves the old or the new file, never half of one.
 
-def write_current_and_rotate(tenant_id: str, domain: str, text: str) -> None:
+    Not safe for concurrent writers of the same file; the runner routes these writes through `StateWriter`.
+    """
     service_dir = _service_dir(tenant_id, domain)
     service_dir.mkdir(parents=True, exist_ok=True)
+    _write_durable(service_dir / name, json.dumps(data, ensure_ascii=False, sort_keys=True))
+
+
+def read_validators(tenant_id: str, domain: str) -> HttpValidators | None:
+    data = read_service_json(tenant_id, domain, _VALIDATORS_FILE)
+    if data is None:
+        return None
+    source_type = data.get("source_type")
+    return HttpValidators(
+        etag=data.get("etag"),
+        last_modified=data.get("last_modified"),
+        body_sha256=data.get("body_sha256"),
+        source_type=SourceType(source_type) if source_type in SourceType._value2member_map_ else None,
+        text_length=data.get("text_length"),
+    )
+
+
+def write_validators(tenant_id: str, domain: str, validators: HttpValidators | None) -> None:
+    if validators is None:
+        path = _service_dir(tenant_id, domain) / _VALIDATORS_FILE
+        path.unlink(missing_ok=True)
+        return
+    write_service_json(
+        tenant_id,
+        domain,
+        _VALIDATORS_FILE,
+        {
+            "etag": validators.etag,
+            "last_modified": validators.last_modified,
+            "body_sha256": validators.body_sha256,
+            "source_type": validators.source_type.value if validators.source_type else None,
+            "text_length": validators.text_length,
+        },
+    )
+
+
+def _read_manifest(tenant_id: str, domain: str) -> list[DocumentVersion]:
+    data = read_service_json(tenant_id, domain, _MANIFEST_FILE)
+    if data is None:
+        return []
+    try:
+        return [DocumentVersion(**item) for item in data.get("versions", [])]
+    except TypeError:
+        return []
+
+
+def _store_manifest(service_dir: Path, versions: list[DocumentVersion]) -> None:
+    service_dir.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps({"versions": [asdict(version) for version in versions]}, ensure_ascii=False)
+    _write_durable(service_dir / _MANIFEST_FILE, payload)
+    for name in _LEGACY_FILES:
+        (service_dir / name).unlink(missing_ok=True)
+    _fsync_dir(service_dir)
+
+
+def _write_durable(path: Path, payload: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+    tmp_path.replace(path)
+
+
+def _fsync_dir(path: Path) -> None:
+    # Makes renames durable; not supported for directories on Windows.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_blob(text: str) -> str:
+    data = text.encode("utf-8")
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = _blob_path(sha256)
+    if path.exists():
+        return sha256
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the blob bytes a pure function of the text.
+    # The hash prefix lets `recover_journal` find the temp files of the blobs its journal names.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{sha256}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(gzip.compress(data, compresslevel=6, mtime=0))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return sha256
+
+
+def _read_blob(sha256: str) -> str | None:
+    path = _blob_path(sha256)
+    if not path.exists():
+        return None
+    return gzip.decompress(path.read_bytes()).decode("utf-8")
+
+
+def _read_legacy(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    return path.read_text(encoding="utf-8")
+
 
-    current = service_dir / "current.txt"
-    previous = service_dir / "previous.txt"
-    if current.exists():
-        previous.write_text(current.read_text(encoding="utf-8"), encoding="utf-8")
+def _legacy_versions(service_dir: Path, store: bool = False) -> list[DocumentVersion]:
+    versions: list[DocumentVersion] = []
+    for name in _LEGACY_FILES[:2]:
+        text = _read_legacy(service_dir / name)
+        if text is None:
+            continue
+        versions.append(
+            DocumentVersion(
+                sha256=_write_blob(text) if store else hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                digest=compare_digest(text),
+                ts=datetime.fromtimestamp((service_dir / name).stat().st_mtime).isoformat(timespec="seconds"),
+                length=len(text),
+            )
+        )
+    return versions
 
-    current.write_text(text, encoding="utf-8")
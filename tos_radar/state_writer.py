@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Union
+
+from tos_radar.state_store import DocumentUpdate, commit_documents, recover_journal
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class StateWriterStats:
+    batches: int = 0
+    updates: int = 0
+    versions: int = 0
+    failed: int = 0
+    max_batch: int = 0
+    files: int = 0
+    failed_files: int = 0
+
+
+@dataclass(frozen=True)
+class _FileWrite:
+    func: Callable[..., None]
+    args: tuple[Any, ...]
+
+
+_Item = Union[DocumentUpdate, _FileWrite]
+
+
+class StateWriter:
+    """Writes document versions off the event loop in journaled, fsync-grouped batches.
+
+    `submit` only enqueues; a single consumer drains whatever has piled up (at most `batch_size`
+    updates) and hands it to `commit_documents` in a worker thread. While one batch is on disk
+    the next one accumulates, so the fsync count follows disk speed, not the number of domains.
+    At most `max_pending` updates wait in the queue; further submitters are held back.
+
+    Small per-domain files (validators, fetch profile, schedule) go through the same queue with
+    `submit_file`, so they are written off the loop and in order with the document batches.
+    """
+
+    def __init__(self, tenant_id: str, batch_size: int = 64, max_pending: int = 256) -> None:
+        self._tenant_id = tenant_id
+        self._batch_size = max(1, batch_size)
+        self._max_pending = max(1, max_pending)
+        self._queue: asyncio.Queue[tuple[_Item, asyncio.Future[None] | None]] | None = None
+        self._consumer: asyncio.Task[None] | None = None
+        self.stats = StateWriterStats()
+
+    async def __aenter__(self) -> StateWriter:
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._consumer = asyncio.create_task(self._consume(self._queue))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        await self.close()
+
+    async def submit(self, domain: str, text: str, digest: str | None = None) -> None:
+        if self._queue is None:
+            raise RuntimeError("StateWriter is not started")
+        await self._queue.put((DocumentUpdate(domain=domain, text=text, digest=digest), None))
+
+    async def write(self, domain: str, text: str, digest: str | None = None) -> None:
+        """Like `submit`, but return only once the batch holding the update is on disk.
+
+        Raises OSError when that batch could not be written (already logged and counted).
+        """
+        if self._queue is None:
+            raise RuntimeError("StateWriter is not started")
+        done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        await self._queue.put((DocumentUpdate(domain=domain, text=text, digest=digest), done))
+        await done
+
+    async def submit_file(self, func: Callable[..., None], *args: Any) -> None:
+        """Queue `func(*args)`, a small state file write; it runs after everything queued before it.
+
+        Failures are logged and counted, not raised: these files only speed up or tune later runs.
+        """
+        if self._queue is None:
+            raise RuntimeError("StateWriter is not started")
+        await self._queue.put((_FileWrite(func=func, args=args), None))
+
+    async def flush(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        if self._consumer is None:
+            return
+        # Drain even when the run is being cancelled: accepted updates must reach the disk.
+        await asyncio.shield(self.flush())
+        self._consumer.cancel()
+        await asyncio.gather(self._consumer, return_exceptions=True)
+        self._consumer = None
+        self._queue = None
+
+    async def _consume(self, queue: asyncio.Queue[tuple[_Item, asyncio.Future[None] | None]]) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self._batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                # Documents queued before a file write are committed before it runs.
+                documents: list[tuple[DocumentUpdate, asyncio.Future[None] | None]] = []
+                for item, done in batch:
+                    if isinstance(item, DocumentUpdate):
+                        documents.append((item, done))
+                        continue
+                    await self._commit(documents)
+                    documents = []
+                    await self._write_file(item)
+                await self._commit(documents)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _commit(self, batch: list[tuple[DocumentUpdate, asyncio.Future[None] | None]]) -> None:
+        if not batch:
+            return
+        committed = False
+        try:
+            versions = await asyncio.to_thread(commit_documents, self._tenant_id, [item for item, _ in batch])
+        except Exception:  # noqa: BLE001
+            LOGGER.exception("State batch not written tenant=%s updates=%s", self._tenant_id, len(batch))
+            self.stats.failed += len(batch)
+            await self._resolve_journal()
+        else:
+            committed = True
+            self.stats.batches += 1
+            self.stats.updates += len(batch)
+            self.stats.versions += versions
+            self.stats.max_batch = max(self.stats.max_batch, len(batch))
+        finally:
+            for _, done in batch:
+                if done is not None and not done.done():
+                    if committed:
+                        done.set_result(None)
+                    else:
+                        done.set_exception(OSError("State batch not written"))
+
+    async def _write_file(self, item: _FileWrite) -> None:
+        try:
+            await asyncio.to_thread(item.func, *item.args)
+        except Exception:  # noqa: BLE001
+            LOGGER.exception("State file not written tenant=%s write=%s", self._tenant_id, item.func.__name__)
+            self.stats.failed_files += 1
+        else:
+            self.stats.files += 1
+
+    async def _resolve_journal(self) -> None:
+        # Settle the broken batch now so the next one does not overwrite its journal.
+        try:
+            outcome = await asyncio.to_thread(recover_journal, self._tenant_id)
+        except OSError:
+            LOGGER.exception("State journal left for next start tenant=%s", self._tenant_id)
+            return
+        LOGGER.warning("State journal resolved tenant=%s outcome=%s", self._tenant_id, outcome)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import inspect
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from tos_radar import extraction, pdf_text
+from tos_radar.extraction import ExtractionRules
+
+LOGGER = logging.getLogger(__name__)
+
+# Eviction trims the cache to this share of its limit, so it does not run on every store.
+_EVICT_TO = 0.9
+# The fetcher functions that turn a raw body into the cached text.
+_FETCHER_EXTRACTION = ("_fetch_http_tier", "_fetch_pdf_document", "_pdf_to_text", "_pdf_file_to_text")
+
+
+@dataclass
+class TextCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evicted: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TextCache:
+    """Extracted text by (extractor version, kind, raw body SHA-256), gzip files under `root`.
+
+    The extractor version hashes the code of the extraction (HTML decoding included) and PDF
+    modules, the fetcher functions that apply them and the domain's rule overrides, so a change
+    to either makes old entries unreachable; they age out through the size limit. The text is
+    cached before `normalize_for_storage`, which the runner applies to hits and misses alike.
+    Hits refresh the file mtime and eviction removes the oldest files first, which makes the
+    limit an LRU bound.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int) -> None:
+        self._root = Path(root)
+        self._max_bytes = max(0, max_bytes)
+        self._size: int | None = None
+        self._lock = threading.Lock()
+        self.stats = TextCacheStats()
+
+    def key(self, rules: ExtractionRules, kind: str, body_sha256: str) -> str:
+        return hashlib.sha256(f"{extractor_version(rules)}:{kind}:{body_sha256}".encode("ascii")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            text = gzip.decompress(path.read_bytes()).decode("utf-8")
+            os.utime(path)
+        except (OSError, EOFError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        data = gzip.compress(text.encode("utf-8"), compresslevel=6, mtime=0)
+        if len(data) > self._max_bytes:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(data)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            LOGGER.warning("Text cache entry not written key=%s error=%s", key, exc)
+            return
+        with self._lock:
+            self.stats.stores += 1
+            # The first store measures the directory (the new file included); later ones add up.
+            self._size = self._disk_size() if self._size is None else self._size + len(data)
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self._root / key[:2] / f"{key}.gz"
+
+    def _files(self) -> list[tuple[Path, os.stat_result]]:
+        files: list[tuple[Path, os.stat_result]] = []
+        for path in self._root.glob("*/*.gz"):
+            try:
+                files.append((path, path.stat()))
+            except OSError:
+                continue
+        return files
+
+    def _disk_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _evict(self) -> None:
+        files = sorted(self._files(), key=lambda item: item[1].st_mtime)
+        size = sum(stat.st_size for _, stat in files)
+        target = self._max_bytes * _EVICT_TO
+        for path, stat in files:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= stat.st_size
+            self.stats.evicted += 1
+        self._size = size
+
+
+@lru_cache(maxsize=64)
+def extractor_version(rules: ExtractionRules) -> str:
+    digest = hashlib.sha256(_code_version().encode("ascii"))
+    digest.update(repr(rules.noise).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def _code_version() -> str:
+    # Imported here: the fetcher itself imports this module.
+    from tos_radar import fetcher
+
+    digest = hashlib.sha256()
+    for module in (extraction, pdf_text):
+        digest.update(Path(module.__file__ or "").read_bytes())
+    for name in _FETCHER_EXTRACTION:
+        digest.update(inspect.getsource(getattr(fetcher, name)).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import urlparse
+
+from tos_radar.fetcher import FetchOptions
+from tos_radar.models import ErrorCode, FetchMode, FetchResult, FetchTier, HttpValidators, Service, SourceType
+
+LOGGER = logging.getLogger(__name__)
+# Extra lease time on top of the job's hard timeout before another worker may take it over.
+_LEASE_MARGIN_SEC = 30.0
+_PROGRESS_LOG_SEC = 30.0
+# Finished and cancelled jobs are kept this long (for `counts` and debugging), then deleted.
+_FINISHED_RETENTION_SEC = 86400.0
+# Stays below SQLite's bound-parameter limit.
+_IDS_PER_QUERY = 500
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scan_id TEXT NOT NULL,
+        tenant_id TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        url TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_owner TEXT,
+        lease_expires REAL,
+        result TEXT,
+        created_at REAL NOT NULL,
+        finished_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_id ON jobs (status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_scan_status ON jobs (scan_id, status)",
+)
+
+
+@dataclass(frozen=True)
+class FetchJob:
+    id: int
+    scan_id: str
+    tenant_id: str
+    service: Service
+    timeout_sec: int
+    hard_timeout_sec: int
+    options: FetchOptions
+    attempts: int
+
+
+class WorkQueue:
+    """Leased fetch jobs in a SQLite table shared by one coordinator and any number of workers.
+
+    Job states: pending -> leased -> done (or cancelled). A lease lasts the job's hard timeout
+    plus a margin; an expired lease puts the job back to pending, and after `max_attempts`
+    expired leases the job is finished with a TIMEOUT result instead. Results of a worker
+    that lost its lease are discarded.
+    """
+
+    def __init__(self, path: str | Path, max_attempts: int = 3) -> None:
+        self._path = Path(path)
+        self._max_attempts = max(1, max_attempts)
+
+    def job_deadline_sec(self, hard_timeout_sec: int) -> float:
+        """How long a job may take end to end: every lease it is allowed, back to back."""
+        return self._max_attempts * (hard_timeout_sec + _LEASE_MARGIN_SEC)
+
+    def submit(
+        self,
+        scan_id: str,
+        tenant_id: str,
+        service: Service,
+        timeout_sec: int,
+        hard_timeout_sec: int,
+        options: FetchOptions,
+    ) -> int:
+        payload = {
+            "timeout_sec": timeout_sec,
+            "hard_timeout_sec": hard_timeout_sec,
+            "fetch_mode": options.fetch_mode.value,
+            "tier_hint": options.tier_hint.value if options.tier_hint else None,
+            "min_text_length": options.min_text_length,
+            "validators": _validators_to_dict(options.validators),
+            "blocked_resources": sorted(options.blocked_resources),
+            "humanize": options.humanize,
+            "ready_max_ms": options.ready_max_ms,
+            "extraction_overrides": [list(pair) for pair in options.extraction_overrides],
+            "pdf_max_bytes": options.pdf_max_bytes,
+        }
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (scan_id, tenant_id, domain, url, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (scan_id, tenant_id, service.domain, service.url, json.dumps(payload), time.time()),
+            )
+            return int(cursor.lastrowid or 0)
+
+    def lease(self, worker_id: str, limit: int = 1) -> list[FetchJob]:
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._connect() as conn:
+            self._reap(conn, now)
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+            jobs: list[FetchJob] = []
+            for row in rows:
+                job = _job_from_row(row)
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker_id, now + job.hard_timeout_sec + _LEASE_MARGIN_SEC, job.id),
+                )
+                jobs.append(job)
+        return jobs
+
+    def complete(self, job_id: int, worker_id: str, result: FetchResult) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished_at = ?, lease_expires = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(_result_to_dict(result), ensure_ascii=False), time.time(), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def finished(self, scan_id: str, job_ids: Iterable[int]) -> dict[int, FetchResult]:
+        """Results of the given jobs that are done; each result is handed out once, then dropped."""
+        wanted = sorted(set(job_ids))
+        results: dict[int, FetchResult] = {}
+        if not wanted:
+            return results
+        with self._connect() as conn:
+            self._reap(conn, time.time())
+            for start in range(0, len(wanted), _IDS_PER_QUERY):
+                chunk = wanted[start : start + _IDS_PER_QUERY]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id, result FROM jobs WHERE scan_id = ? AND status = 'done' AND result IS NOT NULL "
+                    f"AND id IN ({marks})",
+                    (scan_id, *chunk),
+                ).fetchall()
+                delivered = [row["id"] for row in rows]
+                for row in rows:
+                    results[row["id"]] = _result_from_dict(json.loads(row["result"]))
+                if delivered:
+                    conn.execute(
+                        f"UPDATE jobs SET result = NULL WHERE id IN ({','.join('?' * len(delivered))})",
+                        delivered,
+                    )
+        return results
+
+    def cancel_scan(self, scan_id: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE scan_id = ? AND status IN ('pending', 'leased')",
+                (time.time(), scan_id),
+            )
+            return cursor.rowcount
+
+    def expire_pending(self, job_ids: Iterable[int]) -> list[int]:
+        """Cancel those of the given jobs that no worker has leased yet; return their ids."""
+        wanted = sorted(set(job_ids))
+        expired: list[int] = []
+        with self._connect() as conn:
+            for start in range(0, len(wanted), _IDS_PER_QUERY):
+                chunk = wanted[start : start + _IDS_PER_QUERY]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id FROM jobs WHERE status = 'pending' AND id IN ({marks})",
+                    chunk,
+                ).fetchall()
+                ids = [row["id"] for row in rows]
+                if ids:
+                    marks = ",".join("?" * len(ids))
+                    conn.execute(
+                        f"UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id IN ({marks})",
+                        (time.time(), *ids),
+                    )
+                expired.extend(ids)
+        return expired
+
+    def purge(self, older_than_sec: float = _FINISHED_RETENTION_SEC) -> int:
+        """Delete done and cancelled jobs finished more than `older_than_sec` ago."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'cancelled') AND finished_at < ?",
+                (time.time() - older_than_sec,),
+            )
+            return cursor.rowcount
+
+    def counts(self, scan_id: str) -> Counter[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE scan_id = ? GROUP BY status",
+                (scan_id,),
+            ).fetchall()
+        return Counter({row[0]: int(row[1]) for row in rows})
+
+    def _reap(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            "SELECT id, attempts, lease_owner FROM jobs WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        ).fetchall()
+        for row in expired:
+            if row["attempts"] < self._max_attempts:
+                LOGGER.warning("Job lease expired id=%s worker=%s, requeued", row["id"], row["lease_owner"])
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                    (row["id"],),
+                )
+                continue
+            result = FetchResult(
+                ok=False,
+                text="",
+                source_type=SourceType.HTML,
+                attempt=0,
+                error_code=ErrorCode.TIMEOUT,
+                error=f"Job lease expired {row['attempts']} times, last worker {row['lease_owner']}",
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished_at = ?, lease_expires = NULL WHERE id = ?",
+                (json.dumps(_result_to_dict(result)), now, row["id"]),
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None + BEGIN IMMEDIATE: the write lock is taken up front, so two
+        # workers can never select and lease the same pending job.
+        conn = sqlite3.connect(self._path, timeout=30.0, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+
+class QueueFetcher:
+    """Coordinator side: turns a fetch into a queued job and waits until some worker finishes it.
+
+    A job nobody leases within `WorkQueue.job_deadline_sec` fails with TIMEOUT, so a scan without
+    workers ends instead of waiting forever. The clock restarts whenever any job of the scan
+    finishes: a long backlog behind busy workers is not a reason to give up.
+    """
+
+    def __init__(self, queue: WorkQueue, scan_id: str, tenant_id: str, poll_sec: float = 1.0) -> None:
+        self._queue = queue
+        self._scan_id = scan_id
+        self._tenant_id = tenant_id
+        self._poll_sec = poll_sec
+        self._waiting: dict[int, asyncio.Future[FetchResult]] = {}
+        # Job id -> (enqueued at, seconds it may wait for a worker), monotonic clock.
+        self._deadlines: dict[int, tuple[float, float]] = {}
+        self._last_result_at = 0.0
+        self._poller: asyncio.Task[None] | None = None
+
+    async def fetch(
+        self,
+        service: Service,
+        timeout_sec: int,
+        hard_timeout_sec: int,
+        options: FetchOptions,
+    ) -> FetchResult:
+        job_id = await asyncio.to_thread(
+            self._queue.submit,
+            self._scan_id,
+            self._tenant_id,
+            service,
+            timeout_sec,
+            hard_timeout_sec,
+            options,
+        )
+        future: asyncio.Future[FetchResult] = asyncio.get_running_loop().create_future()
+        self._waiting[job_id] = future
+        self._deadlines[job_id] = (time.monotonic(), self._queue.job_deadline_sec(hard_timeout_sec))
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        return await future
+
+    def close(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        cancelled = self._queue.cancel_scan(self._scan_id)
+        if cancelled:
+            LOGGER.warning("Cancelled unfinished jobs scan=%s jobs=%s", self._scan_id, cancelled)
+        self._queue.purge()
+
+    async def _poll(self) -> None:
+        last_progress = time.monotonic()
+        while self._waiting:
+            await asyncio.sleep(self._poll_sec)
+            results = await asyncio.to_thread(self._queue.finished, self._scan_id, list(self._waiting))
+            if results:
+                self._last_result_at = time.monotonic()
+            now = time.monotonic()
+            overdue = [
+                job_id
+                for job_id, (enqueued_at, window) in self._deadlines.items()
+                if job_id not in results and now - max(enqueued_at, self._last_result_at) > window
+            ]
+            if overdue:
+                for job_id in await asyncio.to_thread(self._queue.expire_pending, overdue):
+                    window = self._deadlines[job_id][1]
+                    LOGGER.error(
+                        "Job not leased by any worker id=%s scan=%s after=%.0fs", job_id, self._scan_id, window
+                    )
+                    results[job_id] = FetchResult(
+                        ok=False,
+                        text="",
+                        source_type=SourceType.HTML,
+                        attempt=0,
+                        error_code=ErrorCode.TIMEOUT,
+                        error=f"No worker leased the job within {window:.0f}s",
+                    )
+            for job_id, result in results.items():
+                self._deadlines.pop(job_id, None)
+                future = self._waiting.pop(job_id)
+                if not future.done():
+                    future.set_result(result)
+            if time.monotonic() - last_progress >= _PROGRESS_LOG_SEC:
+                last_progress = time.monotonic()
+                counts = await asyncio.to_thread(self._queue.counts, self._scan_id)
+                LOGGER.info("Work queue scan=%s jobs=%s waiting=%s", self._scan_id, dict(counts), len(self._waiting))
+
+
+def _job_from_row(row: sqlite3.Row) -> FetchJob:
+    payload = json.loads(row["payload"])
+    return FetchJob(
+        id=int(row["id"]),
+        scan_id=row["scan_id"],
+        tenant_id=row["tenant_id"],
+        service=Service(domain=row["domain"], url=row["url"]),
+        timeout_sec=int(payload["timeout_sec"]),
+        hard_timeout_sec=int(payload["hard_timeout_sec"]),
+        options=FetchOptions(
+            fetch_mode=FetchMode(payload["fetch_mode"]),
+            tier_hint=FetchTier(payload["tier_hint"]) if payload.get("tier_hint") else None,
+            min_text_length=int(payload.get("min_text_length", 0)),
+            validators=_validators_from_dict(payload.get("validators")),
+            blocked_resources=frozenset(payload.get("blocked_resources") or ()),
+            humanize=bool(payload.get("humanize")),
+            ready_max_ms=int(payload.get("ready_max_ms") or FetchOptions.ready_max_ms),
+            extraction_overrides=tuple(
+                (str(kind), str(token)) for kind, token in payload.get("extraction_overrides") or ()
+            ),
+            pdf_max_bytes=int(payload.get("pdf_max_bytes") or FetchOptions.pdf_max_bytes),
+        ),
+        attempts=int(row["attempts"]) + 1,
+    )
+
+
+def _validators_to_dict(validators: HttpValidators | None) -> dict[str, Any] | None:
+    if validators is None:
+        return None
+    return {
+        "etag": validators.etag,
+        "last_modified": validators.last_modified,
+        "body_sha256": validators.body_sha256,
+        "source_type": validators.source_type.value if validators.source_type else None,
+        "text_length": validators.text_length,
+    }
+
+
+def _validators_from_dict(data: dict[str, Any] | None) -> HttpValidators | None:
+    if data is None:
+        return None
+    return HttpValidators(
+        etag=data.get("etag"),
+        last_modified=data.get("last_modified"),
+        body_sha256=data.get("body_sha256"),
+        source_type=SourceType(data["source_type"]) if data.get("source_type") else None,
+        text_length=data.get("text_length"),
+    )
+
+
+def _result_to_dict(result: FetchResult) -> dict[str, Any]:
+    return {
+        "ok": result.ok,
+        "text": result.text,
+        "source_type": result.source_type.value,
+        "attempt": result.attempt,
+        "proxy_used": _without_credentials(result.proxy_used),
+        "error_code": result.error_code.value if result.error_code else None,
+        "error": result.error,
+        "tier": result.tier.value if result.tier else None,
+        "not_modified": result.not_modified,
+        "validators": _validators_to_dict(result.validators),
+        "elapsed_sec": result.elapsed_sec,
+        "transferred_bytes": result.transferred_bytes,
+        "blocked_requests": result.blocked_requests,
+        "ready_wait_sec": result.ready_wait_sec,
+        "bot_detected": result.bot_detected,
+    }
+
+
+def _without_credentials(proxy_url: str | None) -> str | None:
+    # The queue database is shared by processes; proxy logins stay in each worker's proxies file.
+    if not proxy_url:
+        return None
+    parsed = urlparse(proxy_url)
+    if parsed.hostname is None:
+        return None
+    return f"{parsed.scheme or 'http'}://{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+
+def _result_from_dict(data: dict[str, Any]) -> FetchResult:
+    return FetchResult(
+        ok=bool(data["ok"]),
+        text=data.get("text") or "",
+        source_type=SourceType(data["source_type"]),
+        attempt=int(data.get("attempt") or 0),
+        proxy_used=data.get("proxy_used"),
+        error_code=ErrorCode(data["error_code"]) if data.get("error_code") else None,
+        error=data.get("error"),
+        tier=FetchTier(data["tier"]) if data.get("tier") else None,
+        not_modified=bool(data.get("not_modified")),
+        validators=_validators_from_dict(data.get("validators")),
+        elapsed_sec=data.get("elapsed_sec"),
+        transferred_bytes=data.get("transferred_bytes"),
+        blocked_requests=int(data.get("blocked_requests") or 0),
+        ready_wait_sec=data.get("ready_wait_sec"),
+        bot_detected=bool(data.get("bot_detected")),
+    )